@@ -0,0 +1,162 @@
+import importlib
+import importlib.util
+import marshal
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from django.conf import settings
+
+
+class CompiledData(Mapping):
+    """
+    Read-only mapping over a large dictionary literal, such as DISASTER_PROTOCOLS, loaded from a compiled data file.
+
+    The Python module holding the literal stays the source of truth. It is compiled into a marshal file with one blob
+    per top-level key and an index of their offsets; the file is memory-mapped on first access, so worker processes
+    share its pages, and each entry is unmarshalled only when it is first read. The file is rebuilt automatically
+    when the source module is newer than it, and the module itself is only imported when compiling.
+    """
+
+    MAGIC = b'CVD1'
+    HEADER = struct.Struct('<4sI')
+
+    def __init__(self, module: str, name: str):
+        """
+        :param module: Dotted path of the module defining the dictionary, such as 'disasterplans.data.disaster_protocols'.
+        :param name: Name of the dictionary in the module, such as 'DISASTER_PROTOCOLS'.
+        """
+        self.module = module
+        self.name = name
+        self._lock = threading.Lock()
+        self._buffer: Optional[mmap.mmap] = None
+        self._index: Optional[Dict[str, Tuple[int, int]]] = None
+        self._keys: List[str] = []
+        self._entries: Dict[str, Any] = {}
+
+    def __repr__(self):
+        return f"<CompiledData {self.module}.{self.name}>"
+
+    def source_path(self) -> Path:
+        return Path(importlib.util.find_spec(self.module).origin)
+
+    def compiled_path(self) -> Path:
+        directory = Path(settings.COMPILED_DATA_DIR)
+        return directory / f"{self.module}.{self.name}.marshal"
+
+    def stamp(self) -> Tuple[int, int, int, int]:
+        # marshal output is only guaranteed to be readable by the same Python version
+        source = self.source_path().stat()
+        return sys.version_info[0], sys.version_info[1], source.st_mtime_ns, source.st_size
+
+    def compile(self) -> Path:
+        """
+        Write the compiled data file from the source module.
+
+        :return: The path of the compiled file.
+        """
+        data = getattr(importlib.import_module(self.module), self.name)
+        stamp = self.stamp()
+        blobs = [(key, marshal.dumps(value)) for key, value in data.items()]
+        index, offset = [], 0
+        for key, blob in blobs:
+            index.append((key, offset, len(blob)))
+            offset += len(blob)
+        header = marshal.dumps((stamp, index))
+
+        path = self.compiled_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                output.write(self.HEADER.pack(self.MAGIC, len(header)))
+                output.write(header)
+                for _, blob in blobs:
+                    output.write(blob)
+            # Readers never see a partially written file
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return path
+
+    def _open(self, path: Path) -> Optional[Tuple[mmap.mmap, Dict[str, Tuple[int, int]], List[str]]]:
+        """Map a compiled file, returning None if it is missing, corrupt or out of date."""
+        try:
+            with open(path, 'rb') as source:
+                buffer = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, header_length = self.HEADER.unpack_from(buffer, 0)
+            stamp, index = marshal.loads(buffer[self.HEADER.size:self.HEADER.size + header_length])
+        except (struct.error, EOFError, ValueError, TypeError):
+            magic, stamp, index = None, None, None
+        if magic != self.MAGIC or tuple(stamp) != self.stamp():
+            buffer.close()
+            return None
+        start = self.HEADER.size + header_length
+        return buffer, {key: (start + offset, length) for key, offset, length in index}, [key for key, _, _ in index]
+
+    def _load(self):
+        if self._index is not None:
+            return
+        with self._lock:
+            if self._index is not None:
+                return
+            path = self.compiled_path()
+            opened = self._open(path)
+            if opened is None:
+                try:
+                    opened = self._open(self.compile())
+                except OSError:
+                    opened = None
+            if opened is None:
+                # The data directory is not writable, so fall back to the source module
+                data = getattr(importlib.import_module(self.module), self.name)
+                self._entries = dict(data)
+                self._keys = list(data)
+                self._index = {}
+                return
+            self._buffer, index, self._keys = opened
+            self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        self._load()
+        if key in self._entries:
+            return self._entries[key]
+        offset, length = self._index[key]
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = marshal.loads(self._buffer[offset:offset + length])
+        return self._entries[key]
+
+    def __contains__(self, key: object) -> bool:
+        self._load()
+        return key in self._index or key in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        self._load()
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._keys)
+
+    def reload(self):
+        """Drop the loaded entries so the next access re-reads, and if needed recompiles, the data file."""
+        with self._lock:
+            if self._buffer is not None:
+                self._buffer.close()
+            self._buffer = None
+            self._index = None
+            self._keys = []
+            self._entries = {}
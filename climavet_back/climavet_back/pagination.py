@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination ordered by descending primary key.
+
+    The primary key is unique and indexed, so every page is fetched with an index seek
+    from the cursor position instead of an OFFSET scan, and pages stay stable while rows are inserted.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
@@ -43,6 +43,8 @@ INSTALLED_APPS = [
     'clinics',
     'disasterplans',
     'resourcechecklists',
+    'jobs',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -87,6 +89,31 @@ DATABASES = {
     }
 }
 
+# Files written at runtime: caches, rendered PDFs and compiled data. Kept inside the project rather than
+# the shared system temp directory, where other local users could plant or read the pickled cache entries.
+VAR_DIR = BASE_DIR / 'var'
+
+# Cache shared by every worker process on the host, used for cross-process invalidation stamps.
+# Point this at Redis or Memcached when running on more than one host.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': VAR_DIR / 'cache',
+    }
+}
+
+# Runs the tests against a local-memory cache instead of the file-based one above
+TEST_RUNNER = 'climavet_back.testing.TestRunner'
+
+# Rendered disaster plan PDFs, keyed by a hash of the plan content
+PLAN_PDF_CACHE_DIR = VAR_DIR / 'plan_pdfs'
+
+# Compiled forms of the large static data modules, rebuilt automatically when a source module changes
+COMPILED_DATA_DIR = VAR_DIR / 'compiled_data'
+
+# Full-text search index storage. Left unset, SQLite databases use the FTS5 backend and other databases the
+# DatabaseScanBackend; set SEARCH_BACKEND to the dotted path of a SearchBackend subclass to plug in another one.
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,50 @@
+from django import test
+from django.core.cache import cache
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from disasterplans.models import DisasterProtocol
+from disasterplans.services.disaster_type_registry import DisasterTypeRegistry
+from disasterplans.services.protocol_cache import ProtocolResponseCache
+
+
+def reset_process_caches():
+    """
+    Empty the shared cache and every in-process cache filled from the database.
+
+    Inside a TestCase the transaction.on_commit invalidations never fire, so state cached by one test
+    would otherwise be served to the next, after its rows were rolled back.
+    """
+    cache.clear()
+    DisasterTypeRegistry.reset()
+    ProtocolResponseCache.clear()
+    with DisasterProtocol._lock:
+        DisasterProtocol._by_id.clear()
+        DisasterProtocol._current.clear()
+        DisasterProtocol._merged.clear()
+
+
+class TestCase(test.TestCase):
+    """TestCase starting and ending with empty process caches; use it for every test touching the database."""
+
+    def setUp(self):
+        super().setUp()
+        reset_process_caches()
+        self.addCleanup(reset_process_caches)
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner using a local-memory cache, so tests never share the file-based cache, and its version stamps,
+    with a development server running on the same checkout.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_override = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'climavet-tests'},
+        })
+        self.cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_override.disable()
+        super().teardown_test_environment(**kwargs)
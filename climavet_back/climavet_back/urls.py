@@ -34,5 +34,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/clinics/', include('clinics.urls')),
     path('api/disaster-plans/', include('disasterplans.urls')),
+    path('api/resource-checklists/', include('resourcechecklists.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/search/', include('search.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
 ]
@@ -1,3 +1,26 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from jobs.services.job_queue import JobQueue
+from .models import ReassessmentRun
 
 # Register your models here.
+
+@admin.register(ReassessmentRun)
+class ReassessmentRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'province', 'status', 'clinics_processed', 'total_clinics', 'clinics_per_second', 'created_at', 'finished_at']
+    list_filter = ['status', 'province']
+    readonly_fields = ['status', 'total_clinics', 'clinics_processed', 'last_clinic_id', 'checkpointed_at', 'clinics_per_second', 'error', 'started_at', 'finished_at', 'created_by']
+    actions = ['start_runs']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description="Queue selected reassessment runs to start or resume")
+    def start_runs(self, request, queryset):
+        # Running runs are skipped unless their worker stopped checkpointing, so a live run is never started twice
+        runs = queryset & ReassessmentRun.resumable()
+        for run in runs:
+            # Queued for the run_jobs worker so the admin request returns immediately
+            JobQueue.enqueue('clinics.reassess', request.user, run_id=run.pk)
+        self.message_user(request, f"Queued {len(runs)} reassessment run(s).", messages.SUCCESS)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ClinicsConfig(AppConfig):
     name = 'clinics'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,74 @@
+RISK_RULES = [
+    # FLOOD
+    {'hazard': 'FLOOD', 'band': 'MODERATE',
+     'vulnerability': 'Ground-level storage and kennels may be exposed to water intrusion during heavy rain.',
+     'recommendation': 'Move records, medications and electrical equipment off the floor and check drainage around the building.'},
+    {'hazard': 'FLOOD', 'band': 'HIGH',
+     'vulnerability': 'The clinic is likely to be cut off or flooded during river or flash flooding.',
+     'recommendation': 'Create a flood plan with an evacuation route to higher ground and pre-arranged animal transport.'},
+    {'hazard': 'FLOOD', 'band': 'CRITICAL',
+     'vulnerability': 'Flooding is expected to force a full evacuation of animals and staff.',
+     'recommendation': 'Stage sandbags and water pumps on site and agree on a receiving facility outside the flood zone.'},
+    # WILDFIRE
+    {'hazard': 'WILDFIRE', 'band': 'MODERATE',
+     'vulnerability': 'Wildfire smoke may reach the clinic during the fire season.',
+     'recommendation': 'Stock HEPA filters and N95 masks and monitor air quality alerts during the fire season.'},
+    {'hazard': 'WILDFIRE', 'band': 'HIGH',
+     'vulnerability': 'The clinic is within reach of wildfires and may receive short-notice evacuation orders.',
+     'recommendation': 'Create a wildfire plan with defensible space around the building and a pre-loaded evacuation kit.'},
+    {'hazard': 'WILDFIRE', 'band': 'CRITICAL',
+     'vulnerability': 'Wildfire is likely to threaten the building directly.',
+     'recommendation': 'Keep carriers and trailers ready for every hospitalized animal and rehearse a full evacuation.'},
+    # HEATWAVE
+    {'hazard': 'HEATWAVE', 'band': 'HIGH',
+     'vulnerability': 'Animals in the clinic are at risk of heat stress during prolonged heat events.',
+     'recommendation': 'Provide cooling areas and backup fans, and plan extra hydration checks for hospitalized animals.'},
+    {'hazard': 'HEATWAVE', 'band': 'CRITICAL',
+     'vulnerability': 'Extreme heat may exceed the capacity of the clinic cooling systems.',
+     'recommendation': 'Arrange backup air conditioning and reschedule non-urgent procedures during heat warnings.'},
+    # POWER_OUTAGE
+    {'hazard': 'POWER_OUTAGE', 'band': 'MODERATE',
+     'vulnerability': 'Refrigerated vaccines and medications may spoil during a power outage.',
+     'recommendation': 'Keep a temperature log and coolers ready for refrigerated stock.'},
+    {'hazard': 'POWER_OUTAGE', 'band': 'HIGH',
+     'vulnerability': 'Extended outages would stop anesthesia, oxygen concentrators and climate control.',
+     'recommendation': 'Install a backup generator sized for critical equipment and test it monthly.'},
+    # AIR_POLLUTION
+    {'hazard': 'AIR_POLLUTION', 'band': 'HIGH',
+     'vulnerability': 'Poor air quality may worsen respiratory conditions in patients and staff.',
+     'recommendation': 'Seal the building during air quality alerts and run portable air purifiers in patient areas.'},
+    # EROSION
+    {'hazard': 'EROSION', 'band': 'HIGH',
+     'vulnerability': 'Erosion may undermine access roads, foundations or outdoor enclosures.',
+     'recommendation': 'Inspect foundations and drainage yearly and identify an alternate access route.'},
+    # HURRICANE
+    {'hazard': 'HURRICANE', 'band': 'HIGH',
+     'vulnerability': 'High winds and storm surge may damage the building and cut off access.',
+     'recommendation': 'Secure outdoor equipment, protect windows and plan evacuation ahead of forecast landfall.'},
+    {'hazard': 'HURRICANE', 'band': 'CRITICAL',
+     'vulnerability': 'The clinic is exposed to direct hurricane impact.',
+     'recommendation': 'Agree on a sheltering partner inland and move animals before the storm arrives.'},
+    # TORNADO
+    {'hazard': 'TORNADO', 'band': 'HIGH',
+     'vulnerability': 'Tornadoes may strike with very little warning.',
+     'recommendation': 'Designate an interior shelter room for staff and animals and practice tornado drills.'},
+    # COLD_WAVE
+    {'hazard': 'COLD_WAVE', 'band': 'HIGH',
+     'vulnerability': 'Extreme cold may freeze pipes and endanger animals during transport.',
+     'recommendation': 'Insulate plumbing, stock heated bedding and avoid transporting animals during cold warnings.'},
+    # BLIZZARD
+    {'hazard': 'BLIZZARD', 'band': 'HIGH',
+     'vulnerability': 'Staff may be unable to reach the clinic during blizzards.',
+     'recommendation': 'Set up an on-call rota for staff living nearby and keep several days of food and medication on site.'},
+    # EARTHQUAKE
+    {'hazard': 'EARTHQUAKE', 'band': 'HIGH',
+     'vulnerability': 'Unsecured shelving, cages and gas cylinders may fall during an earthquake.',
+     'recommendation': 'Anchor shelves, cages and oxygen cylinders and train staff to drop, cover and hold on.'},
+    {'hazard': 'EARTHQUAKE', 'band': 'CRITICAL',
+     'vulnerability': 'A major earthquake may leave the building unsafe to occupy.',
+     'recommendation': 'Prepare a structural safety checklist and an outdoor triage area for animals.'},
+    # AVALANCHE
+    {'hazard': 'AVALANCHE', 'band': 'HIGH',
+     'vulnerability': 'Avalanches may close mountain roads to and from the clinic.',
+     'recommendation': 'Follow avalanche bulletins and keep supplies for several days of isolation.'},
+]
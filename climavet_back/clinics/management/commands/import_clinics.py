@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from clinics.services.clinic_importer import ClinicImporter
+
+
+class Command(BaseCommand):
+    help = "Bulk import clinics from a CSV or NDJSON file, inserting valid rows in batched transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the CSV or NDJSON file to import.")
+        parser.add_argument('--format', choices=ClinicImporter.FORMATS, help="Input format. Detected from the file extension if omitted.")
+        parser.add_argument('--batch-size', type=int, default=ClinicImporter.DEFAULT_BATCH_SIZE, help="Number of clinics inserted per transaction.")
+        parser.add_argument('--created-by', help="Username recorded as the creator of the imported clinics.")
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or ClinicImporter.detect_format(options['path'])
+        if not file_format:
+            raise CommandError("Could not detect the file format, pass --format csv or --format ndjson.")
+
+        created_by = None
+        if options['created_by']:
+            try:
+                created_by = User.objects.get(username=options['created_by'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['created_by']} not found")
+
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size must be a positive integer")
+        importer = ClinicImporter(created_by=created_by, batch_size=options['batch_size'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+                summary = importer.import_stream(lines, file_format)
+        except OSError as e:
+            raise CommandError(str(e))
+        except UnicodeDecodeError:
+            raise CommandError(f"The file is not valid UTF-8 text; the import stopped after {importer.created} clinics were created.")
+
+        for error in summary['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if summary['error_count'] > len(summary['errors']):
+            self.stderr.write(f"... {summary['error_count'] - len(summary['errors'])} more errors not shown")
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {summary['processed']} rows: {summary['created']} clinics created, {summary['error_count']} rows rejected."
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from clinics.models import AssessmentPayload
+
+
+class Command(BaseCommand):
+    help = "Delete stored risk assessment payloads that no assessment references any more."
+
+    def handle(self, *args, **options):
+        deleted = AssessmentPayload.prune()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} unreferenced assessment payloads."))
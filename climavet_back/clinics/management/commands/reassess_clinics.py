@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from clinics.models import ReassessmentRun
+from clinics.services.fleet_reassessment import FleetReassessment
+
+
+class Command(BaseCommand):
+    help = "Re-score every clinic, or the clinics of one province, and write a new risk assessment for each."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--province', help="Only re-score clinics in this province.")
+        parser.add_argument('--workers', type=int, help="Number of scoring processes. Defaults to the number of CPUs.")
+        parser.add_argument('--chunk-size', type=int, default=FleetReassessment.DEFAULT_CHUNK_SIZE, help="Number of clinics scored and inserted per batch.")
+        parser.add_argument('--resume', action='store_true', help="Resume the most recent unfinished run for the same province instead of starting a new one.")
+        parser.add_argument('--run', type=int, help="Execute or resume the reassessment run with this id.")
+
+    def handle(self, *args, **options):
+        province = options['province'] or None
+        if options['run']:
+            try:
+                run = ReassessmentRun.objects.get(pk=options['run'])
+            except ReassessmentRun.DoesNotExist:
+                raise CommandError(f"Reassessment run {options['run']} not found")
+        else:
+            run = None
+            if options['resume']:
+                run = ReassessmentRun.objects.filter(province=province).exclude(status='COMPLETED').first()
+            if run is None:
+                run = ReassessmentRun.objects.create(province=province)
+
+        if run.status == 'COMPLETED':
+            raise CommandError(f"Reassessment run {run.pk} is already completed")
+        if run.clinics_processed:
+            self.stdout.write(f"Resuming run {run.pk} after clinic {run.last_clinic_id} ({run.clinics_processed} clinics already processed)")
+        else:
+            self.stdout.write(f"Starting run {run.pk}")
+
+        def progress(run):
+            self.stdout.write(f"  {run.clinics_processed}/{run.total_clinics} clinics re-scored")
+
+        reassessment = FleetReassessment(run, workers=options['workers'], chunk_size=options['chunk_size'])
+        run = reassessment.execute(progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Run {run.pk} completed: {run.clinics_processed} clinics re-scored at {run.clinics_per_second:.1f} clinics/s"
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from clinics.services.risk_heatmap import RiskHeatmap
+
+
+class Command(BaseCommand):
+    help = "Recompute the risk heatmap aggregate table from the latest assessment of every clinic."
+
+    def handle(self, *args, **options):
+        clinics = RiskHeatmap.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Risk heatmap rebuilt from {clinics} clinics."))
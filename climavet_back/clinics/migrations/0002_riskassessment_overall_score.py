@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:12
+
+from django.db import migrations, models
+from django.db.models.functions import Greatest
+
+
+RISK_FIELDS = [
+    'flood_risk', 'wildfire_risk', 'heatwave_risk', 'power_outage_risk',
+    'air_pollution_risk', 'erosion_risk', 'hurricane_risk', 'tornado_risk',
+    'cold_wave_risk', 'blizzard_risk', 'earthquake_risk', 'avalanche_risk',
+]
+
+
+def backfill_overall_score(apps, schema_editor):
+    RiskAssessment = apps.get_model('clinics', 'RiskAssessment')
+    RiskAssessment.objects.update(overall_score=Greatest(*RISK_FIELDS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='riskassessment',
+            name='overall_score',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AddIndex(
+            model_name='riskassessment',
+            index=models.Index(fields=['clinic', '-assessment_date'], name='riskassess_clinic_date_idx'),
+        ),
+        migrations.RunPython(backfill_overall_score, migrations.RunPython.noop),
+    ]
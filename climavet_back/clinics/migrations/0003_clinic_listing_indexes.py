@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0002_riskassessment_overall_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clinic',
+            index=models.Index(fields=['province', 'city', '-id'], name='clinic_province_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clinic',
+            index=models.Index(fields=['city', '-id'], name='clinic_city_idx'),
+        ),
+    ]
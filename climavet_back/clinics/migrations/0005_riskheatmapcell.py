@@ -0,0 +1,73 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:19
+
+from collections import Counter
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+RISK_FIELDS = [
+    'flood_risk', 'wildfire_risk', 'heatwave_risk', 'power_outage_risk',
+    'air_pollution_risk', 'erosion_risk', 'hurricane_risk', 'tornado_risk',
+    'cold_wave_risk', 'blizzard_risk', 'earthquake_risk', 'avalanche_risk',
+]
+
+
+def score_band(score):
+    if score >= 9:
+        return 'CRITICAL'
+    if score >= 7:
+        return 'HIGH'
+    if score >= 4:
+        return 'MODERATE'
+    return 'LOW'
+
+
+def build_heatmap(apps, schema_editor):
+    Clinic = apps.get_model('clinics', 'Clinic')
+    RiskAssessment = apps.get_model('clinics', 'RiskAssessment')
+    RiskHeatmapCell = apps.get_model('clinics', 'RiskHeatmapCell')
+
+    latest = RiskAssessment.objects.filter(clinic=OuterRef('pk')).order_by('-assessment_date', '-id')
+    Clinic.objects.update(heatmap_assessment_id=Subquery(latest.values('id')[:1]))
+
+    counts = Counter()
+    rows = RiskAssessment.objects.filter(
+        id__in=Clinic.objects.filter(heatmap_assessment_id__isnull=False).values('heatmap_assessment_id')
+    ).values('clinic__province', 'clinic__city', *RISK_FIELDS)
+    for row in rows.iterator(chunk_size=2000):
+        for field in RISK_FIELDS:
+            counts[(row['clinic__province'], row['clinic__city'], field[:-len('_risk')].upper(), score_band(row[field]))] += 1
+    RiskHeatmapCell.objects.bulk_create(
+        [RiskHeatmapCell(province=p, city=c, hazard=h, band=b, clinic_count=n) for (p, c, h, b), n in counts.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0004_reassessmentrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clinic',
+            name='heatmap_assessment_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='RiskHeatmapCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('province', models.CharField(max_length=100)),
+                ('city', models.CharField(max_length=100)),
+                ('hazard', models.CharField(max_length=20)),
+                ('band', models.CharField(max_length=20)),
+                ('clinic_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('province', 'city', 'hazard', 'band'), name='unique_heatmap_cell')],
+            },
+        ),
+        migrations.RunPython(build_heatmap, migrations.RunPython.noop),
+    ]
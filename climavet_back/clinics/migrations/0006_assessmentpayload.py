@@ -0,0 +1,77 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:20
+
+import hashlib
+import json
+import zlib
+import django.db.models.deletion
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+
+def encode(payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, cls=DjangoJSONEncoder).encode('utf-8')
+    return hashlib.sha256(canonical).hexdigest(), canonical
+
+
+def move_payloads_to_store(apps, schema_editor):
+    RiskAssessment = apps.get_model('clinics', 'RiskAssessment')
+    AssessmentPayload = apps.get_model('clinics', 'AssessmentPayload')
+
+    batch = []
+    payloads = {}
+    for assessment in RiskAssessment.objects.only('id', 'assessment_data').iterator(chunk_size=2000):
+        digest, canonical = encode(assessment.assessment_data)
+        if digest not in payloads:
+            payloads[digest] = AssessmentPayload(digest=digest, data=zlib.compress(canonical), size=len(canonical))
+        assessment.assessment_payload_id = digest
+        batch.append(assessment)
+        if len(batch) >= 2000:
+            AssessmentPayload.objects.bulk_create(payloads.values(), ignore_conflicts=True)
+            RiskAssessment.objects.bulk_update(batch, ['assessment_payload'])
+            batch = []
+            payloads = {}
+    AssessmentPayload.objects.bulk_create(payloads.values(), ignore_conflicts=True)
+    RiskAssessment.objects.bulk_update(batch, ['assessment_payload'])
+
+
+def restore_payloads(apps, schema_editor):
+    RiskAssessment = apps.get_model('clinics', 'RiskAssessment')
+
+    batch = []
+    for assessment in RiskAssessment.objects.select_related('assessment_payload').iterator(chunk_size=2000):
+        payload = assessment.assessment_payload
+        assessment.assessment_data = json.loads(zlib.decompress(bytes(payload.data))) if payload else {}
+        batch.append(assessment)
+        if len(batch) >= 2000:
+            RiskAssessment.objects.bulk_update(batch, ['assessment_data'])
+            batch = []
+    RiskAssessment.objects.bulk_update(batch, ['assessment_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0005_riskheatmapcell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssessmentPayload',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('size', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='riskassessment',
+            name='assessment_payload',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='risk_assessments', to='clinics.assessmentpayload'),
+        ),
+        migrations.RunPython(move_payloads_to_store, restore_payloads),
+        migrations.RemoveField(
+            model_name='riskassessment',
+            name='assessment_data',
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+RISK_FIELDS = [
+    'flood_risk', 'wildfire_risk', 'heatwave_risk', 'power_outage_risk',
+    'air_pollution_risk', 'erosion_risk', 'hurricane_risk', 'tornado_risk',
+    'cold_wave_risk', 'blizzard_risk', 'earthquake_risk', 'avalanche_risk',
+]
+
+
+def store_counted_scores(apps, schema_editor):
+    Clinic = apps.get_model('clinics', 'Clinic')
+    RiskAssessment = apps.get_model('clinics', 'RiskAssessment')
+    counted = Clinic.objects.filter(heatmap_assessment_id__isnull=False).values('heatmap_assessment_id')
+    clinics = [
+        Clinic(id=row['clinic_id'], heatmap_scores={field: row[field] for field in RISK_FIELDS})
+        for row in RiskAssessment.objects.filter(id__in=counted).values('clinic_id', *RISK_FIELDS).iterator(chunk_size=2000)
+    ]
+    Clinic.objects.bulk_update(clinics, ['heatmap_scores'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0006_assessmentpayload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clinic',
+            name='heatmap_scores',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(store_counted_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0007_clinic_heatmap_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reassessmentrun',
+            name='checkpointed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,9 +1,32 @@
+import hashlib
+import json
+import zlib
+from datetime import timedelta
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import OuterRef, ProtectedError, Subquery
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 # Create your models here.
 
+class ClinicQuerySet(models.QuerySet):
+    def with_latest_risk(self):
+        """
+        Annotate each clinic with its most recent risk assessment and that assessment's overall score.
+
+        Both values come from correlated subqueries, so listing clinics costs a single query
+        regardless of how many clinics or assessments there are.
+
+        :return: A queryset of Clinic instances with latest_risk_assessment_id and latest_overall_risk annotations.
+        """
+        latest = RiskAssessment.objects.filter(clinic=OuterRef('pk')).order_by('-assessment_date', '-id')
+        return self.annotate(
+            latest_risk_assessment_id=Subquery(latest.values('id')[:1]),
+            latest_overall_risk=Subquery(latest.values('overall_score')[:1]),
+        )
+
 class Clinic(models.Model):
     CLINIC_TYPES = [
         ("PRIVATE", "Private"),
@@ -43,11 +66,110 @@ class Clinic(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    heatmap_assessment_id = models.BigIntegerField(blank=True, null=True)  # Latest risk assessment currently counted in the risk heatmap
+    heatmap_scores = models.JSONField(blank=True, null=True)  # The *_risk scores the clinic is counted with in the risk heatmap
+
+    objects = ClinicQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['province', 'city', '-id'], name='clinic_province_city_idx'),
+            models.Index(fields=['city', '-id'], name='clinic_city_idx'),
+        ]
+
+    HEATMAP_FIELDS = {'heatmap_assessment_id', 'heatmap_scores'}
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Only RiskHeatmap writes the heatmap bookkeeping, under a row lock. A full save of an existing clinic
+        # would write back the values it was loaded with and undo any refresh made since, so leave them out.
+        if not self._state.adding and self.pk is not None and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.HEATMAP_FIELDS
+            ]
+        return super().save(*args, **kwargs)
+
+class AssessmentPayload(models.Model):
+    # Content-addressed, compressed storage for risk assessment wizard payloads.
+    # Identical payloads share one row, keyed by the SHA-256 digest of their canonical JSON.
+    digest = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()  # zlib-compressed canonical JSON
+    size = models.IntegerField(default=0)  # Uncompressed size in bytes
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def encode(payload):
+        # Canonical JSON so that equal payloads always produce the same digest
+        canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, cls=DjangoJSONEncoder).encode('utf-8')
+        return hashlib.sha256(canonical).hexdigest(), canonical
+
+    @classmethod
+    def store_many(cls, payloads):
+        """
+        Store payloads that are not stored yet, with a single insert.
+
+        :param payloads: An iterable of JSON-serializable payloads.
+        :return: The digests of the payloads, in the same order.
+        """
+        digests = []
+        new_rows = {}
+        for payload in payloads:
+            digest, canonical = cls.encode(payload)
+            digests.append(digest)
+            if digest not in new_rows:
+                new_rows[digest] = cls(digest=digest, data=zlib.compress(canonical), size=len(canonical))
+        cls.objects.bulk_create(new_rows.values(), ignore_conflicts=True)
+        return digests
+
+    @classmethod
+    def prune(cls, digests=None, batch_size=1000):
+        """
+        Delete payloads no risk assessment references any more.
+
+        :param digests: Only consider these payloads, all of them by default.
+        :param batch_size: Number of payloads deleted per query.
+        :return: The number of payloads deleted.
+        """
+        orphans = cls.objects.filter(risk_assessments__isnull=True)
+        if digests is not None:
+            orphans = orphans.filter(digest__in=list(digests))
+        orphans = list(orphans.order_by('digest').values_list('digest', flat=True))
+        deleted = 0
+        for start in range(0, len(orphans), batch_size):
+            try:
+                deleted += cls.objects.filter(digest__in=orphans[start:start + batch_size]).delete()[0]
+            except ProtectedError:
+                # A payload of the batch was referenced again meanwhile; the rest is left for the next prune
+                continue
+        return deleted
+
+    def load(self):
+        return json.loads(zlib.decompress(bytes(self.data)))
+
+    def __str__(self):
+        return self.digest
+
+class RiskAssessmentQuerySet(models.QuerySet):
+    def latest_per_clinic(self):
+        """
+        Restricts the queryset to the most recent assessment of each clinic.
+
+        :return: A queryset containing at most one RiskAssessment per clinic.
+        """
+        latest = RiskAssessment.objects.filter(clinic=OuterRef('clinic')).order_by('-assessment_date', '-id')
+        return self.filter(id=Subquery(latest.values('id')[:1]))
+
 class RiskAssessment(models.Model):
+    # Individual hazard risk fields, the highest of which is the overall score
+    RISK_FIELDS = [
+        'flood_risk', 'wildfire_risk', 'heatwave_risk', 'power_outage_risk',
+        'air_pollution_risk', 'erosion_risk', 'hurricane_risk', 'tornado_risk',
+        'cold_wave_risk', 'blizzard_risk', 'earthquake_risk', 'avalanche_risk',
+    ]
+
     clinic = models.ForeignKey(Clinic, on_delete=models.CASCADE, related_name='risk_assessments')
     assessment_date = models.DateField()
     flood_risk = models.IntegerField(default=0)
@@ -62,13 +184,118 @@ class RiskAssessment(models.Model):
     blizzard_risk = models.IntegerField(default=0)
     earthquake_risk = models.IntegerField(default=0)
     avalanche_risk = models.IntegerField(default=0)
-    assessment_data = models.JSONField(default=dict)  # Store detailed assessment data as JSON  
+    assessment_payload = models.ForeignKey(AssessmentPayload, on_delete=models.PROTECT, null=True, blank=True, related_name='risk_assessments')  # Detailed assessment data, read and written through assessment_data
     vulnerabilities = models.JSONField(default=list)  # Store vulnerabilities as JSON list
     recommendations = models.JSONField(default=list)  # Store recommendations as JSON list
+    overall_score = models.IntegerField(default=0, db_index=True)  # Highest individual risk, recomputed on every save
+
+    objects = RiskAssessmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['clinic', '-assessment_date'], name='riskassess_clinic_date_idx'),
+        ]
+
+    _assessment_data = None
+    _assessment_data_changed = False
 
     @property
-    def overall_score(self):
+    def assessment_data(self):
+        # Detailed assessment data, loaded from the shared payload store on first access
+        if self._assessment_data is None:
+            self._assessment_data = self.assessment_payload.load() if self.assessment_payload_id else {}
+        return self._assessment_data
+
+    @assessment_data.setter
+    def assessment_data(self, value):
+        self._assessment_data = value
+        self._assessment_data_changed = True
+
+    @classmethod
+    def store_payloads(cls, assessments):
+        """
+        Store the changed assessment_data of several assessments with a single insert. Needed before bulk_create, which skips save().
+
+        :param assessments: An iterable of RiskAssessment instances.
+        """
+        changed = [assessment for assessment in assessments if assessment._assessment_data_changed]
+        digests = AssessmentPayload.store_many(assessment._assessment_data for assessment in changed)
+        for assessment, digest in zip(changed, digests):
+            assessment.assessment_payload_id = digest
+            assessment._assessment_data_changed = False
+
+    def calculate_overall_score(self):
         # Calculate highest risk score based on individual risks
-        scores = [self.flood_risk, self.wildfire_risk, self.heatwave_risk, self.power_outage_risk, self.air_pollution_risk, self.erosion_risk]
-        return max(scores) if scores else 0
-        
\ No newline at end of file
+        return max(getattr(self, field) for field in self.RISK_FIELDS)
+
+    def save(self, *args, **kwargs):
+        self.overall_score = self.calculate_overall_score()
+        update_fields = kwargs.get('update_fields')
+        if self._assessment_data_changed:
+            self.store_payloads([self])
+            if update_fields is not None and 'assessment_payload' not in update_fields:
+                update_fields = [*update_fields, 'assessment_payload']
+        if update_fields is not None and 'overall_score' not in update_fields:
+            update_fields = [*update_fields, 'overall_score']
+        if update_fields is not None:
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+class ReassessmentRun(models.Model):
+    # A fleet-wide re-scoring job. Clinics are processed in id order and last_clinic_id is
+    # checkpointed with every batch, so an interrupted run can be resumed where it stopped.
+    # A RUNNING run whose last checkpoint is older than STALE_AFTER lost its worker and can be resumed too.
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    province = models.CharField(max_length=100, blank=True, null=True)  # Restrict the run to one province, or all clinics if empty
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    total_clinics = models.IntegerField(default=0)
+    clinics_processed = models.IntegerField(default=0)
+    last_clinic_id = models.BigIntegerField(default=0)  # Highest clinic id already re-scored
+    checkpointed_at = models.DateTimeField(blank=True, null=True)  # When last_clinic_id last advanced, or the run started
+    clinics_per_second = models.FloatField(default=0)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    STALE_AFTER = timedelta(minutes=10)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @classmethod
+    def resumable(cls):
+        """
+        Runs that can be started or resumed: pending and failed runs, and running runs whose worker stopped checkpointing.
+
+        :return: A queryset of ReassessmentRun instances.
+        """
+        stale = models.Q(status='RUNNING') & (
+            models.Q(checkpointed_at__lt=timezone.now() - cls.STALE_AFTER) | models.Q(checkpointed_at__isnull=True)
+        )
+        return cls.objects.filter(models.Q(status__in=['PENDING', 'FAILED']) | stale)
+
+    def __str__(self):
+        return f"Reassessment of {self.province or 'all provinces'} ({self.get_status_display()})"
+
+class RiskHeatmapCell(models.Model):
+    # Materialized count of clinics whose latest assessment puts a hazard in a given score band, per province and city
+    province = models.CharField(max_length=100)
+    city = models.CharField(max_length=100)
+    hazard = models.CharField(max_length=20)
+    band = models.CharField(max_length=20)
+    clinic_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['province', 'city', 'hazard', 'band'], name='unique_heatmap_cell'),
+        ]
+
+    def __str__(self):
+        return f"{self.province}/{self.city} {self.hazard} {self.band}: {self.clinic_count}"
@@ -4,17 +4,21 @@ from .models import Clinic, RiskAssessment
 class ClinicSerializer(serializers.ModelSerializer):
     overall_risk = serializers.SerializerMethodField()
     def get_overall_risk(self, obj):
+        # Use the value annotated by Clinic.objects.with_latest_risk() when available
+        if hasattr(obj, 'latest_overall_risk'):
+            return obj.latest_overall_risk
         risk_assessment = obj.risk_assessments.order_by('-assessment_date').first()
         if risk_assessment:
             return risk_assessment.overall_score
         return None
     class Meta:
         model = Clinic
-        fields = '__all__'
+        exclude = ['heatmap_assessment_id', 'heatmap_scores']
         read_only_fields = ['created_at', 'updated_at', 'created_by']
 
 class RiskAssessmentSerializer(serializers.ModelSerializer):
     overall_score = serializers.ReadOnlyField()
+    assessment_data = serializers.JSONField(required=False)  # Read and written through the shared payload store
     class Meta:
         model = RiskAssessment
-        fields = '__all__'
\ No newline at end of file
+        exclude = ['assessment_payload']
\ No newline at end of file
@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from clinics.models import Clinic
+
+
+class ClinicImporter:
+    """Service class responsible for bulk importing clinics from CSV or NDJSON streams."""
+
+    FORMATS = ['csv', 'ndjson']
+    IMPORT_FIELDS = [
+        'name', 'address', 'phone_number', 'email', 'city', 'province',
+        'postal_code', 'clinic_type', 'species_types', 'service_types',
+    ]
+    DEFAULT_BATCH_SIZE = 500
+    MAX_REPORTED_ERRORS = 1000
+
+    def __init__(self, created_by: Optional[User] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        if batch_size <= 0:
+            raise ValueError('batch_size must be a positive integer')
+        self.created_by = created_by
+        self.batch_size = batch_size
+        # Clinics committed by the current import, readable after it fails part way, e.g. on a decoding error
+        self.created = 0
+
+    @staticmethod
+    def detect_format(filename: str, content_type: str = '') -> Optional[str]:
+        """
+        Guess the import format from a file name or content type.
+
+        :param filename: The name of the uploaded file.
+        :param content_type: The content type of the uploaded file, if known.
+        :return: 'csv', 'ndjson' or None if the format cannot be determined.
+        """
+        filename = (filename or '').lower()
+        if filename.endswith('.csv') or 'csv' in content_type:
+            return 'csv'
+        if filename.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonlines' in content_type:
+            return 'ndjson'
+        return None
+
+    @staticmethod
+    def iter_rows(lines: Iterable[str], file_format: str) -> Iterator[Tuple[int, Any]]:
+        """
+        Lazily parse an iterable of text lines into (row number, row) pairs.
+
+        :param lines: An iterable of text lines, such as an open text file.
+        :param file_format: Either 'csv' or 'ndjson'.
+        :return: An iterator of row numbers and parsed rows. NDJSON lines that fail to parse yield the error instead of a dict.
+        """
+        if file_format == 'csv':
+            reader = csv.DictReader(lines)
+            for row in reader:
+                yield reader.line_num, row
+        elif file_format == 'ndjson':
+            for line_number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    yield line_number, ValidationError(f"Invalid JSON: {e}")
+        else:
+            raise ValueError(f"Unsupported import format: {file_format}")
+
+    def build_clinic(self, row: Any) -> Clinic:
+        """
+        Build and validate an unsaved Clinic from a parsed row.
+
+        :param row: A dictionary of clinic fields.
+        :return: A validated, unsaved Clinic instance.
+        :raises ValidationError: If the row is malformed or fails model validation, including choice validation.
+        """
+        if isinstance(row, ValidationError):
+            raise row
+        if not isinstance(row, dict):
+            raise ValidationError('Each row must be an object of clinic fields')
+        values = {}
+        for field in self.IMPORT_FIELDS:
+            value = row.get(field)
+            if isinstance(value, str):
+                value = value.strip()
+            if value not in (None, ''):
+                values[field] = value
+        clinic = Clinic(created_by=self.created_by, **values)
+        clinic.full_clean(exclude=['created_by'], validate_unique=False)
+        return clinic
+
+    def import_stream(self, lines: Iterable[str], file_format: str) -> Dict[str, Any]:
+        """
+        Import clinics from a stream of lines, inserting valid rows in batched transactions.
+
+        Rows are validated one at a time and only the current batch is held in memory,
+        so the input can be arbitrarily large.
+
+        :param lines: An iterable of text lines, such as an open text file.
+        :param file_format: Either 'csv' or 'ndjson'.
+        :return: A summary with the number of processed and created rows and the row-level errors.
+        :raises UnicodeDecodeError: If the stream is not valid text; batches inserted before it are kept and counted in self.created.
+        """
+        processed = 0
+        self.created = 0
+        error_count = 0
+        errors: List[Dict[str, Any]] = []
+        batch: List[Clinic] = []
+
+        for row_number, row in self.iter_rows(lines, file_format):
+            processed += 1
+            try:
+                batch.append(self.build_clinic(row))
+            except ValidationError as e:
+                error_count += 1
+                if len(errors) < self.MAX_REPORTED_ERRORS:
+                    errors.append({
+                        'row': row_number,
+                        'errors': e.message_dict if hasattr(e, 'error_dict') else e.messages,
+                    })
+                continue
+            if len(batch) >= self.batch_size:
+                self.created += self._insert_batch(batch)
+                batch = []
+
+        if batch:
+            self.created += self._insert_batch(batch)
+
+        return {
+            'processed': processed,
+            'created': self.created,
+            'error_count': error_count,
+            'errors': errors,
+        }
+
+    @staticmethod
+    def open_text(binary_file) -> io.TextIOWrapper:
+        """
+        Wrap a binary file object so it can be read line by line as text.
+
+        :param binary_file: A binary file object, such as an uploaded file.
+        :return: A text wrapper decoding UTF-8, with or without a byte order mark.
+        """
+        return io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+
+    def _insert_batch(self, batch: List[Clinic]) -> int:
+        with transaction.atomic():
+            Clinic.objects.bulk_create(batch)
+        return len(batch)
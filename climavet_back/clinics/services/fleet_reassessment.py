@@ -0,0 +1,170 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from django.db import connections, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+from clinics.models import AssessmentPayload, Clinic, RiskAssessment, ReassessmentRun
+from .risk_scoring import RiskScoringEngine
+from .risk_heatmap import RiskHeatmap
+
+
+def score_chunk(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Score a chunk of wizard payloads. Runs inside the worker processes, so it only touches the scoring engine and never the database.
+
+    :param payloads: A list of wizard payloads.
+    :return: A list with the hazard scores, vulnerabilities and recommendations of each payload.
+    """
+    return RiskScoringEngine().assess_batch(payloads)
+
+
+class FleetReassessment:
+    """Service class that re-scores every clinic, or every clinic in one province, across a process pool."""
+
+    DEFAULT_CHUNK_SIZE = 500
+
+    def __init__(self, run: ReassessmentRun, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.run = run
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_size = chunk_size
+
+    def get_queryset(self):
+        """
+        Clinics covered by the run, annotated with the payload digest of their latest assessment.
+
+        :return: A queryset of Clinic instances ordered by id.
+        """
+        queryset = Clinic.objects.order_by('id')
+        if self.run.province:
+            queryset = queryset.filter(province=self.run.province)
+        latest = RiskAssessment.objects.filter(clinic=OuterRef('pk')).order_by('-assessment_date', '-id')
+        return queryset.annotate(latest_payload_id=Subquery(latest.values('assessment_payload_id')[:1]))
+
+    def clinic_chunks(self) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield the remaining clinics in chunks, paging by id from the run's checkpoint.
+
+        :return: An iterator of lists of clinic rows.
+        """
+        queryset = self.get_queryset().values('id', 'province', 'species_types', 'latest_payload_id')
+        last_clinic_id = self.run.last_clinic_id
+        while True:
+            rows = list(queryset.filter(id__gt=last_clinic_id)[:self.chunk_size])
+            if not rows:
+                return
+            # Payloads are deduplicated, so each distinct payload in the chunk is loaded once
+            payloads = {
+                payload.digest: payload.load()
+                for payload in AssessmentPayload.objects.filter(digest__in={row['latest_payload_id'] for row in rows})
+            }
+            for row in rows:
+                row['latest_assessment_data'] = payloads.get(row['latest_payload_id'])
+            yield rows
+            last_clinic_id = rows[-1]['id']
+
+    @staticmethod
+    def build_payload(row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the wizard payload used to re-score a clinic from its latest assessment and its current details.
+
+        :param row: A clinic row from clinic_chunks.
+        :return: A wizard payload.
+        """
+        payload = dict(row['latest_assessment_data'] or {})
+        payload['clinic'] = row['id']
+        payload['province'] = row['province']
+        payload.setdefault('species_types', row['species_types'])
+        return payload
+
+    def execute(self, progress: Optional[Callable[[ReassessmentRun], None]] = None) -> ReassessmentRun:
+        """
+        Re-score the clinics of the run, resuming after its last checkpoint.
+
+        Chunks are scored in the process pool while earlier chunks are written back in order,
+        one transaction per chunk that also advances the checkpoint.
+
+        :param progress: An optional callback invoked with the run after every written chunk.
+        :return: The finished run.
+        """
+        run = self.run
+        run.status = 'RUNNING'
+        run.started_at = run.started_at or timezone.now()
+        run.checkpointed_at = timezone.now()
+        run.error = None
+        run.total_clinics = self.get_queryset().count()
+        run.save(update_fields=['status', 'started_at', 'checkpointed_at', 'error', 'total_clinics'])
+
+        processed_before = run.clinics_processed
+        started = time.monotonic()
+        try:
+            for rows, results in self._scored_chunks():
+                self._write_chunk(rows, results)
+                if progress:
+                    progress(run)
+        except BaseException as e:
+            run.status = 'FAILED'
+            run.error = str(e) or e.__class__.__name__
+            run.save(update_fields=['status', 'error'])
+            raise
+
+        elapsed = time.monotonic() - started
+        run.status = 'COMPLETED'
+        run.finished_at = timezone.now()
+        run.clinics_per_second = (run.clinics_processed - processed_before) / elapsed if elapsed else 0
+        run.save(update_fields=['status', 'finished_at', 'clinics_per_second'])
+        return run
+
+    def _scored_chunks(self):
+        if self.workers <= 1:
+            for rows in self.clinic_chunks():
+                yield rows, score_chunk([self.build_payload(row) for row in rows])
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            workers_started = False
+            for rows in self.clinic_chunks():
+                payloads = [self.build_payload(row) for row in rows]
+                if not workers_started:
+                    # Worker processes are forked on the first submit, not when the executor is created, so the
+                    # connection opened to read the first chunk is closed right before; the parent reconnects lazily
+                    connections.close_all()
+                    workers_started = True
+                pending.append((rows, executor.submit(score_chunk, payloads)))
+                # Keep a bounded window of chunks in flight and write them back in submission order
+                if len(pending) >= self.workers * 2:
+                    rows, future = pending.popleft()
+                    yield rows, future.result()
+            while pending:
+                rows, future = pending.popleft()
+                yield rows, future.result()
+
+    def _write_chunk(self, rows: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+        today = timezone.localdate()
+        assessments = []
+        for row, result in zip(rows, results):
+            assessment = RiskAssessment(
+                clinic_id=row['id'],
+                assessment_date=today,
+                assessment_data=self.build_payload(row),
+                vulnerabilities=result['vulnerabilities'],
+                recommendations=result['recommendations'],
+                **result['scores']
+            )
+            assessment.overall_score = assessment.calculate_overall_score()
+            assessments.append(assessment)
+
+        with transaction.atomic():
+            RiskAssessment.store_payloads(assessments)
+            RiskAssessment.objects.bulk_create(assessments)
+            RiskHeatmap.refresh_clinics(row['id'] for row in rows)
+            ReassessmentRun.objects.filter(pk=self.run.pk).update(
+                last_clinic_id=rows[-1]['id'],
+                clinics_processed=F('clinics_processed') + len(rows),
+                checkpointed_at=timezone.now(),
+            )
+        self.run.last_clinic_id = rows[-1]['id']
+        self.run.clinics_processed += len(rows)
@@ -0,0 +1,173 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from clinics.models import Clinic, RiskAssessment, RiskHeatmapCell
+from .risk_rules import RiskRulesEngine
+
+
+class RiskHeatmap:
+    """
+    Service class maintaining the RiskHeatmapCell aggregate table.
+
+    Each clinic is counted once, through its latest risk assessment, in one cell per hazard.
+    Clinic.heatmap_assessment_id and Clinic.heatmap_scores record which assessment and which scores are currently
+    counted, so creating, changing or deleting assessments only moves the affected clinics between cells instead of
+    recomputing the table. The counted scores are kept on the clinic, so removing a clinic's contribution never
+    depends on an assessment row that may already be deleted.
+    """
+
+    HAZARDS = [field[:-len('_risk')].upper() for field in RiskAssessment.RISK_FIELDS]
+    RULES = RiskRulesEngine(HAZARDS, rules=[])
+
+    @classmethod
+    def cell_keys(cls, province: str, city: str, assessment: Dict[str, Any]):
+        """
+        Heatmap cells an assessment contributes to.
+
+        :param province: The clinic province.
+        :param city: The clinic city.
+        :param assessment: A mapping with the *_risk fields of the assessment.
+        :return: A list of (province, city, hazard, band) keys, one per hazard.
+        """
+        return [
+            (province, city, hazard, cls.RULES.band(assessment[field]))
+            for hazard, field in zip(cls.HAZARDS, RiskAssessment.RISK_FIELDS)
+        ]
+
+    @staticmethod
+    def scores_of(assessment: Dict[str, Any]) -> Dict[str, int]:
+        return {field: assessment[field] for field in RiskAssessment.RISK_FIELDS}
+
+    @classmethod
+    def refresh_clinics(cls, clinic_ids: Iterable[int]):
+        """
+        Bring the heatmap up to date after assessments of the given clinics were created, changed or deleted.
+
+        :param clinic_ids: Ids of the clinics whose assessments changed.
+        """
+        clinic_ids = set(clinic_ids)
+        if not clinic_ids:
+            return
+        with transaction.atomic():
+            clinics = list(
+                Clinic.objects.select_for_update().filter(id__in=clinic_ids)
+                .only('id', 'province', 'city', 'heatmap_assessment_id', 'heatmap_scores')
+            )
+            latest = {
+                row['clinic_id']: row for row in
+                RiskAssessment.objects.filter(clinic_id__in=clinic_ids).latest_per_clinic()
+                .values('clinic_id', 'id', *RiskAssessment.RISK_FIELDS)
+            }
+
+            deltas = Counter()
+            changed = []
+            for clinic in clinics:
+                row = latest.get(clinic.id)
+                assessment_id, scores = (row['id'], cls.scores_of(row)) if row else (None, None)
+                if (assessment_id, scores) == (clinic.heatmap_assessment_id, clinic.heatmap_scores):
+                    continue
+                if clinic.heatmap_scores:
+                    deltas.subtract(cls.cell_keys(clinic.province, clinic.city, clinic.heatmap_scores))
+                if scores:
+                    deltas.update(cls.cell_keys(clinic.province, clinic.city, scores))
+                clinic.heatmap_assessment_id, clinic.heatmap_scores = assessment_id, scores
+                changed.append(clinic)
+
+            if changed:
+                Clinic.objects.bulk_update(changed, ['heatmap_assessment_id', 'heatmap_scores'])
+                cls.apply_deltas(deltas)
+
+    @classmethod
+    def move_clinic(cls, clinic: Clinic, old_province: str, old_city: str):
+        """
+        Move a clinic's contribution to a new province or city.
+
+        :param clinic: The clinic, already saved with its new location.
+        :param old_province: The province the clinic is currently counted under.
+        :param old_city: The city the clinic is currently counted under.
+        """
+        scores = Clinic.objects.filter(pk=clinic.pk).values_list('heatmap_scores', flat=True).first()
+        if not scores:
+            return
+        deltas = Counter()
+        deltas.subtract(cls.cell_keys(old_province, old_city, scores))
+        deltas.update(cls.cell_keys(clinic.province, clinic.city, scores))
+        with transaction.atomic():
+            cls.apply_deltas(deltas)
+
+    @staticmethod
+    def apply_deltas(deltas: Counter):
+        """
+        Apply clinic count changes to the heatmap cells with atomic increments.
+
+        :param deltas: A Counter mapping (province, city, hazard, band) keys to count changes.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        RiskHeatmapCell.objects.bulk_create(
+            [RiskHeatmapCell(province=p, city=c, hazard=h, band=b) for p, c, h, b in deltas],
+            ignore_conflicts=True,
+        )
+        for (province, city, hazard, band), delta in deltas.items():
+            RiskHeatmapCell.objects.filter(province=province, city=city, hazard=hazard, band=band).update(
+                clinic_count=F('clinic_count') + delta
+            )
+
+    @classmethod
+    def rebuild(cls, chunk_size: int = 2000) -> int:
+        """
+        Recompute the whole heatmap from the latest assessment of every clinic.
+
+        :param chunk_size: Number of rows fetched per database round trip.
+        :return: The number of clinics counted.
+        """
+        latest = RiskAssessment.objects.filter(clinic=OuterRef('pk')).order_by('-assessment_date', '-id')
+        with transaction.atomic():
+            Clinic.objects.update(heatmap_assessment_id=Subquery(latest.values('id')[:1]), heatmap_scores=None)
+            counts = Counter()
+            clinics = 0
+            counted = []
+            rows = (
+                RiskAssessment.objects.filter(id__in=Clinic.objects.filter(heatmap_assessment_id__isnull=False).values('heatmap_assessment_id'))
+                .values('clinic_id', 'clinic__province', 'clinic__city', *RiskAssessment.RISK_FIELDS)
+            )
+            for row in rows.iterator(chunk_size=chunk_size):
+                counts.update(cls.cell_keys(row['clinic__province'], row['clinic__city'], row))
+                counted.append(Clinic(id=row['clinic_id'], heatmap_scores=cls.scores_of(row)))
+                clinics += 1
+                if len(counted) >= chunk_size:
+                    Clinic.objects.bulk_update(counted, ['heatmap_scores'])
+                    counted = []
+            Clinic.objects.bulk_update(counted, ['heatmap_scores'])
+            RiskHeatmapCell.objects.all().delete()
+            RiskHeatmapCell.objects.bulk_create(
+                [RiskHeatmapCell(province=p, city=c, hazard=h, band=b, clinic_count=n) for (p, c, h, b), n in counts.items()],
+                batch_size=chunk_size,
+            )
+        return clinics
+
+    @staticmethod
+    def distribution(province: Optional[str] = None, hazard: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Read the per-province and per-city band distributions from the aggregate table.
+
+        :param province: Optionally restrict the result to one province.
+        :param hazard: Optionally restrict the result to one hazard.
+        :return: A dictionary with the distributions by province and by city.
+        """
+        cells = RiskHeatmapCell.objects.filter(clinic_count__gt=0)
+        if province:
+            cells = cells.filter(province=province)
+        if hazard:
+            cells = cells.filter(hazard=hazard.upper())
+
+        by_province: Dict[str, Dict[str, Dict[str, int]]] = {}
+        by_city: Dict[str, Dict[str, Dict[str, Dict[str, int]]]] = {}
+        for cell in cells.values_list('province', 'city', 'hazard', 'band', 'clinic_count'):
+            cell_province, city, cell_hazard, band, count = cell
+            bands = by_province.setdefault(cell_province, {}).setdefault(cell_hazard, {})
+            bands[band] = bands.get(band, 0) + count
+            by_city.setdefault(cell_province, {}).setdefault(city, {}).setdefault(cell_hazard, {})[band] = count
+        return {'bands': [name for name, _ in RiskRulesEngine.BANDS], 'by_province': by_province, 'by_city': by_city}
@@ -0,0 +1,71 @@
+from typing import Any, Dict, List, Sequence, Tuple
+from ..data.risk_rules import RISK_RULES
+
+
+class RiskRulesEngine:
+    """
+    Service class that turns hazard scores into vulnerabilities and recommendations.
+
+    Rules are compiled once into a table indexed by hazard and score band, so evaluating an
+    assessment is a single pass over its hazards with one lookup each.
+    """
+
+    # Score bands as (name, lowest score) in increasing order
+    BANDS = [('LOW', 0), ('MODERATE', 4), ('HIGH', 7), ('CRITICAL', 9)]
+    MAX_SCORE = 10
+
+    def __init__(self, hazards: Sequence[str], rules: Sequence[Dict[str, str]] = RISK_RULES):
+        self.hazards = [hazard.upper() for hazard in hazards]
+        self.risk_fields = [f"{hazard.lower()}_risk" for hazard in self.hazards]
+        band_names = [name for name, _ in self.BANDS]
+
+        # score -> band index, for every possible score
+        self.score_bands = []
+        for score in range(self.MAX_SCORE + 1):
+            self.score_bands.append(max(index for index, (_, lowest) in enumerate(self.BANDS) if score >= lowest))
+
+        # table[hazard index][band index] -> (vulnerabilities, recommendations). A rule applies to its band and every band above it.
+        hazard_index = {hazard: index for index, hazard in enumerate(self.hazards)}
+        table = [[([], []) for _ in self.BANDS] for _ in self.hazards]
+        for rule in rules:
+            if rule['hazard'] not in hazard_index:
+                raise ValueError(f"Unknown hazard in risk rules: {rule['hazard']}")
+            if rule['band'] not in band_names:
+                raise ValueError(f"Unknown band in risk rules: {rule['band']}")
+            for band in range(band_names.index(rule['band']), len(self.BANDS)):
+                vulnerabilities, recommendations = table[hazard_index[rule['hazard']]][band]
+                vulnerabilities.append(rule['vulnerability'])
+                recommendations.append(rule['recommendation'])
+        self.table = [[(tuple(v), tuple(r)) for v, r in bands] for bands in table]
+
+    def band(self, score: int) -> str:
+        """
+        Name of the band a score falls into.
+
+        :param score: A hazard score.
+        :return: The band name, such as 'HIGH'.
+        """
+        return self.BANDS[self.score_bands[min(max(score, 0), self.MAX_SCORE)]][0]
+
+    def evaluate(self, scores: Dict[str, int]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Compute the vulnerabilities and recommendations for one assessment.
+
+        :param scores: A dictionary mapping each *_risk field to its score.
+        :return: A tuple of (vulnerabilities, recommendations) ready to be stored on a RiskAssessment.
+        """
+        vulnerabilities = []
+        recommendations = []
+        for hazard, field, bands in zip(self.hazards, self.risk_fields, self.table):
+            score = min(max(scores.get(field, 0), 0), self.MAX_SCORE)
+            band = self.score_bands[score]
+            hazard_vulnerabilities, hazard_recommendations = bands[band]
+            for description in hazard_vulnerabilities:
+                vulnerabilities.append({
+                    'hazard': hazard,
+                    'score': score,
+                    'band': self.BANDS[band][0],
+                    'description': description,
+                })
+            recommendations.extend(hazard_recommendations)
+        return vulnerabilities, recommendations
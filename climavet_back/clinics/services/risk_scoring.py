@@ -0,0 +1,169 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .risk_rules import RiskRulesEngine
+
+
+class RiskScoringEngine:
+    """
+    Service class that scores clinics against all twelve hazards from risk assessment wizard payloads.
+
+    Payloads are turned into feature arrays and every hazard score for the whole batch is computed
+    with a handful of NumPy operations, so scoring one clinic and scoring the whole fleet share the same code path.
+    """
+
+    # Hazards in the same order as the RiskAssessment *_risk fields
+    HAZARDS = [
+        'flood', 'wildfire', 'heatwave', 'power_outage', 'air_pollution', 'erosion',
+        'hurricane', 'tornado', 'cold_wave', 'blizzard', 'earthquake', 'avalanche',
+    ]
+    RISK_FIELDS = [f"{hazard}_risk" for hazard in HAZARDS]
+    MIN_SCORE = 0
+    MAX_SCORE = 10
+
+    PROVINCES = ['AB', 'BC', 'MB', 'NB', 'NL', 'NS', 'NT', 'NU', 'ON', 'PE', 'QC', 'SK', 'YT']
+    PROVINCE_ALIASES = {
+        'ALBERTA': 'AB',
+        'BRITISH COLUMBIA': 'BC', 'B.C.': 'BC',
+        'MANITOBA': 'MB',
+        'NEW BRUNSWICK': 'NB',
+        'NEWFOUNDLAND AND LABRADOR': 'NL', 'NEWFOUNDLAND': 'NL',
+        'NOVA SCOTIA': 'NS',
+        'NORTHWEST TERRITORIES': 'NT', 'N.W.T.': 'NT',
+        'NUNAVUT': 'NU',
+        'ONTARIO': 'ON',
+        'PRINCE EDWARD ISLAND': 'PE', 'PEI': 'PE',
+        'QUEBEC': 'QC', 'QUÉBEC': 'QC',
+        'SASKATCHEWAN': 'SK',
+        'YUKON': 'YT',
+    }
+
+    # Baseline score of each hazard per province, one row per entry in PROVINCES plus a final row
+    # used when the province is unknown. Derived from the regions listed for each disaster type.
+    PROVINCE_BASELINE = np.array([
+        # flood, wildfire, heatwave, power, air, erosion, hurricane, tornado, cold, blizzard, quake, avalanche
+        [6, 7, 5, 3, 6, 1, 0, 5, 7, 6, 1, 6],  # AB
+        [7, 8, 6, 4, 6, 2, 0, 1, 3, 2, 7, 7],  # BC
+        [7, 6, 3, 3, 5, 1, 0, 5, 7, 6, 0, 0],  # MB
+        [6, 3, 2, 5, 2, 4, 5, 1, 5, 5, 1, 0],  # NB
+        [3, 2, 1, 5, 1, 6, 5, 0, 5, 6, 1, 1],  # NL
+        [4, 3, 2, 5, 2, 6, 6, 0, 4, 5, 0, 0],  # NS
+        [3, 7, 2, 4, 6, 4, 0, 0, 9, 7, 2, 3],  # NT
+        [1, 1, 1, 4, 1, 4, 0, 0, 10, 8, 1, 1],  # NU
+        [5, 5, 5, 6, 5, 1, 2, 5, 6, 6, 2, 0],  # ON
+        [2, 1, 1, 5, 1, 7, 5, 0, 4, 5, 0, 0],  # PE
+        [6, 5, 5, 6, 5, 2, 2, 4, 7, 7, 2, 0],  # QC
+        [4, 6, 5, 3, 5, 1, 0, 5, 7, 6, 0, 0],  # SK
+        [2, 6, 1, 4, 3, 1, 0, 0, 8, 5, 5, 5],  # YT
+        [3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3],  # Unknown
+    ], dtype=np.int16)
+
+    # Added to a hazard when the wizard reports the clinic is inside that hazard's zone (is_<hazard>_zone)
+    ZONE_WEIGHTS = np.full(len(HAZARDS), 3, dtype=np.int16)
+
+    # Added to hazards that require evacuation when the clinic treats large animals that are slow to move
+    LARGE_ANIMAL_SPECIES = {'EQUINE', 'MIXED'}
+    LARGE_ANIMAL_WEIGHTS = np.array([1, 1, 0, 0, 0, 0, 1, 0, 0, 0, 1, 0], dtype=np.int16)
+
+    # Rules table compiled once when the module is loaded and shared by every engine instance
+    RULES = RiskRulesEngine(HAZARDS)
+
+    def __init__(self, province_baseline: Optional[np.ndarray] = None, zone_weights: Optional[np.ndarray] = None,
+                 large_animal_weights: Optional[np.ndarray] = None, rules: Optional[RiskRulesEngine] = None):
+        self.province_baseline = self.PROVINCE_BASELINE if province_baseline is None else np.asarray(province_baseline, dtype=np.int16)
+        self.zone_weights = self.ZONE_WEIGHTS if zone_weights is None else np.asarray(zone_weights, dtype=np.int16)
+        self.large_animal_weights = self.LARGE_ANIMAL_WEIGHTS if large_animal_weights is None else np.asarray(large_animal_weights, dtype=np.int16)
+        self.rules = self.RULES if rules is None else rules
+        self._province_index = {code: index for index, code in enumerate(self.PROVINCES)}
+
+    def province_index(self, province: Optional[str]) -> int:
+        """
+        Map a province code or name to its row in the baseline table.
+
+        :param province: A province code such as 'BC' or a name such as 'British Columbia'.
+        :return: The row index, or the index of the unknown row if the province is not recognised.
+        """
+        key = (province or '').strip().upper()
+        key = self.PROVINCE_ALIASES.get(key, key)
+        return self._province_index.get(key, len(self.PROVINCES))
+
+    def extract_features(self, payloads: Sequence[Dict[str, Any]]):
+        """
+        Convert wizard payloads into the feature arrays used for scoring.
+
+        :param payloads: A sequence of wizard payloads.
+        :return: A tuple of (province indexes, hazard zone flags, large animal flags) arrays.
+        """
+        count = len(payloads)
+        provinces = np.empty(count, dtype=np.intp)
+        zones = np.zeros((count, len(self.HAZARDS)), dtype=bool)
+        large_animals = np.zeros(count, dtype=bool)
+        zone_keys = [f"is_{hazard}_zone" for hazard in self.HAZARDS]
+
+        for row, payload in enumerate(payloads):
+            provinces[row] = self.province_index(payload.get('province'))
+            zones[row] = [self._truthy(payload.get(key)) for key in zone_keys]
+            species = payload.get('species_treated') or payload.get('species_types') or []
+            if isinstance(species, str):
+                species = [species]
+            large_animals[row] = not self.LARGE_ANIMAL_SPECIES.isdisjoint(species)
+
+        return provinces, zones, large_animals
+
+    def score_batch(self, payloads: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Compute all twelve hazard scores for a batch of wizard payloads.
+
+        :param payloads: A sequence of wizard payloads.
+        :return: An integer array of shape (len(payloads), 12) with columns ordered as HAZARDS.
+        """
+        provinces, zones, large_animals = self.extract_features(payloads)
+        scores = self.province_baseline[provinces]
+        scores = scores + zones * self.zone_weights
+        scores = scores + np.outer(large_animals, self.large_animal_weights)
+        return np.clip(scores, self.MIN_SCORE, self.MAX_SCORE)
+
+    def score_dicts(self, payloads: Sequence[Dict[str, Any]]) -> List[Dict[str, int]]:
+        """
+        Compute hazard scores for a batch of wizard payloads as RiskAssessment field dictionaries.
+
+        :param payloads: A sequence of wizard payloads.
+        :return: A list of dictionaries mapping each *_risk field to its score.
+        """
+        return [dict(zip(self.RISK_FIELDS, row)) for row in self.score_batch(payloads).tolist()]
+
+    def calculate_risk_scores(self, payload: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Compute hazard scores for a single wizard payload.
+
+        :param payload: A wizard payload.
+        :return: A dictionary mapping each *_risk field to its score.
+        """
+        return self.score_dicts([payload])[0]
+
+    def evaluate(self, scores: Dict[str, int]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Compute the vulnerabilities and recommendations for a set of hazard scores using the compiled rules table.
+
+        :param scores: A dictionary mapping each *_risk field to its score.
+        :return: A tuple of (vulnerabilities, recommendations).
+        """
+        return self.rules.evaluate(scores)
+
+    def assess_batch(self, payloads: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Score a batch of wizard payloads and evaluate the rules for each of them.
+
+        :param payloads: A sequence of wizard payloads.
+        :return: A list with the hazard scores, vulnerabilities and recommendations of each payload.
+        """
+        results = []
+        for scores in self.score_dicts(payloads):
+            vulnerabilities, recommendations = self.rules.evaluate(scores)
+            results.append({'scores': scores, 'vulnerabilities': vulnerabilities, 'recommendations': recommendations})
+        return results
+
+    @staticmethod
+    def _truthy(value: Any) -> bool:
+        if isinstance(value, str):
+            return value.strip().lower() in ('true', '1', 'yes', 'on')
+        return bool(value)
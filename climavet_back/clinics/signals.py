@@ -0,0 +1,40 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import AssessmentPayload, Clinic, RiskAssessment
+from .services.risk_heatmap import RiskHeatmap
+
+
+@receiver(post_save, sender=RiskAssessment)
+def refresh_heatmap_on_save(sender, instance, raw=False, **kwargs):
+    # Changed scores or dates can change the counted bands or which assessment is the latest
+    if not raw:
+        RiskHeatmap.refresh_clinics([instance.clinic_id])
+
+
+@receiver(post_delete, sender=RiskAssessment)
+def refresh_heatmap_on_delete(sender, instance, **kwargs):
+    RiskHeatmap.refresh_clinics([instance.clinic_id])
+
+
+@receiver(post_delete, sender=RiskAssessment)
+def prune_payload_on_delete(sender, instance, **kwargs):
+    # Payloads are shared, so one is only deleted once the deletion has committed and no assessment uses it
+    if instance.assessment_payload_id:
+        transaction.on_commit(partial(AssessmentPayload.prune, [instance.assessment_payload_id]))
+
+
+@receiver(pre_save, sender=Clinic)
+def remember_clinic_location(sender, instance, raw=False, **kwargs):
+    # Keep the location the clinic is counted under in the heatmap, so a move can be detected after saving
+    if instance.pk and not raw:
+        instance._heatmap_location = Clinic.objects.filter(pk=instance.pk).values_list('province', 'city').first()
+
+
+@receiver(post_save, sender=Clinic)
+def move_clinic_in_heatmap(sender, instance, created, raw=False, **kwargs):
+    location = getattr(instance, '_heatmap_location', None)
+    if location and location != (instance.province, instance.city):
+        RiskHeatmap.move_clinic(instance, *location)
+    instance._heatmap_location = None
@@ -0,0 +1,9 @@
+from jobs.services.job_queue import task
+from .models import ReassessmentRun
+from .services.fleet_reassessment import FleetReassessment
+
+
+@task('clinics.reassess')
+def reassess(run_id, workers=None):
+    run = FleetReassessment(ReassessmentRun.objects.get(pk=run_id), workers=workers).execute()
+    return {'run': run.pk, 'clinics_processed': run.clinics_processed, 'clinics_per_second': run.clinics_per_second}
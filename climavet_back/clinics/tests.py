@@ -1,3 +1,249 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from jobs.models import Job
+from rest_framework.test import APIClient
+from climavet_back.testing import TestCase
+from .models import AssessmentPayload, Clinic, ReassessmentRun, RiskAssessment, RiskHeatmapCell
+from .services.risk_heatmap import RiskHeatmap
 
 # Create your tests here.
+
+
+class RiskHeatmapTests(TestCase):
+    """The incrementally maintained heatmap must always equal a full rebuild."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('staff'))
+        self.clinic = self.make_clinic('Vancouver')
+        self.other = self.make_clinic('Victoria')
+
+    @staticmethod
+    def make_clinic(city):
+        return Clinic.objects.create(
+            name=f"{city} Vet", address='1 Main St', city=city, province='BC', postal_code='V0V 0V0',
+            clinic_type='PRIVATE', species_types='MIXED', service_types='GENERAL_VETERINARY_CARE',
+        )
+
+    @staticmethod
+    def cells():
+        return {
+            (cell.province, cell.city, cell.hazard, cell.band): cell.clinic_count
+            for cell in RiskHeatmapCell.objects.filter(clinic_count__gt=0)
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.cells()
+        RiskHeatmap.rebuild()
+        self.assertEqual(incremental, self.cells())
+
+    def band(self, city, hazard='FLOOD'):
+        return {key[3] for key, count in self.cells().items() if key[1] == city and key[2] == hazard}
+
+    def test_updating_scores_moves_the_clinic_between_bands(self):
+        assessment = RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 1, 1), flood_risk=2)
+        self.assertEqual(self.band('Vancouver'), {'LOW'})
+
+        response = self.client.patch(f'/api/clinics/risk-assessments/{assessment.id}/', {'flood_risk': 9}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.band('Vancouver'), {'CRITICAL'})
+        self.assertMatchesRebuild()
+
+    def test_backdating_the_latest_assessment_counts_the_new_latest(self):
+        older = RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 1, 1), flood_risk=2)
+        latest = RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 2, 1), flood_risk=9)
+        self.assertEqual(Clinic.objects.get(id=self.clinic.id).heatmap_assessment_id, latest.id)
+
+        latest.assessment_date = date(2025, 1, 1)
+        latest.save()
+        self.assertEqual(Clinic.objects.get(id=self.clinic.id).heatmap_assessment_id, older.id)
+        self.assertEqual(self.band('Vancouver'), {'LOW'})
+        self.assertMatchesRebuild()
+
+    def test_deleting_a_clinic_with_several_assessments_removes_it(self):
+        RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 1, 1), flood_risk=2)
+        RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 2, 1), flood_risk=9)
+        RiskAssessment.objects.create(clinic=self.other, assessment_date=date(2026, 1, 1), flood_risk=5)
+
+        self.clinic.delete()
+        self.assertFalse(any(key[1] == 'Vancouver' for key in self.cells()))
+        self.assertEqual(self.band('Victoria'), {'MODERATE'})
+        self.assertMatchesRebuild()
+
+    def test_bulk_deleting_assessments_removes_their_clinics(self):
+        for month in (1, 2, 3):
+            RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, month, 1), flood_risk=3 * month)
+        RiskAssessment.objects.create(clinic=self.other, assessment_date=date(2026, 1, 1), flood_risk=5)
+
+        RiskAssessment.objects.filter(clinic=self.clinic).delete()
+        self.assertEqual(self.cells(), {key: 1 for key in RiskHeatmap.cell_keys('BC', 'Victoria', RiskAssessment.objects.values().get())})
+        self.assertMatchesRebuild()
+
+    def test_saving_a_stale_clinic_keeps_the_heatmap_bookkeeping(self):
+        stale = Clinic.objects.get(id=self.clinic.id)
+        RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 1, 1), flood_risk=2)
+
+        stale.name = 'Renamed Vet'
+        stale.save()
+        RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 2, 1), flood_risk=9)
+
+        self.assertEqual(Clinic.objects.get(id=self.clinic.id).name, 'Renamed Vet')
+        self.assertEqual(sum(self.cells().values()), len(RiskHeatmap.cell_keys('BC', 'Vancouver', RiskAssessment.objects.values().latest('assessment_date'))))
+        self.assertEqual(self.band('Vancouver'), {'CRITICAL'})
+        self.assertMatchesRebuild()
+
+    def test_deleting_the_latest_assessment_falls_back_to_the_previous_one(self):
+        RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 1, 1), flood_risk=5)
+        latest = RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 2, 1), flood_risk=9)
+
+        RiskAssessment.objects.filter(id=latest.id).delete()
+        self.assertEqual(self.band('Vancouver'), {'MODERATE'})
+        self.assertMatchesRebuild()
+
+
+class ClinicImportTests(TestCase):
+    HEADER = 'name,address,city,province,postal_code,clinic_type,species_types,service_types\n'
+
+    def row(self, name):
+        return f"{name},1 Main St,Montreal,QC,H0H 0H0,PRIVATE,MIXED,GENERAL_VETERINARY_CARE\n"
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('staff'))
+
+    def test_non_utf8_upload_reports_the_clinics_already_imported(self):
+        content = (self.HEADER + self.row('Clinique A') + self.row('Clinique B')).encode('utf-8')
+        content += self.row('Clinique Vétérinaire').encode('latin-1') * 20000  # Past the first decoded chunk
+        upload = SimpleUploadedFile('clinics.csv', content, content_type='text/csv')
+
+        response = self.client.post('/api/clinics/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], Clinic.objects.count())
+        self.assertIn(str(response.data['created']), response.data['error'])
+
+    def test_batch_size_must_be_positive(self):
+        with self.assertRaisesMessage(CommandError, '--batch-size'):
+            call_command('import_clinics', 'clinics.csv', '--format', 'csv', '--batch-size', '0')
+
+
+class RiskAssessmentDateTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('staff'))
+        self.clinic = RiskHeatmapTests.make_clinic('Vancouver')
+
+    def test_create_rejects_an_invalid_date(self):
+        response = self.client.post('/api/clinics/risk-assessments/', {'clinic': self.clinic.id, 'assessment_date': '2025-13-45'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(RiskAssessment.objects.exists())
+
+    def test_create_accepts_an_iso_date(self):
+        response = self.client.post('/api/clinics/risk-assessments/', {'clinic': self.clinic.id, 'assessment_date': '2025-03-01'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(RiskAssessment.objects.get().assessment_date, date(2025, 3, 1))
+
+    def test_batch_rejects_invalid_dates_before_writing(self):
+        response = self.client.post('/api/clinics/risk-assessments/batch/', {'assessments': [
+            {'clinic': self.clinic.id, 'assessment_date': '2025-03-01'},
+            {'clinic': self.clinic.id, 'assessment_date': 'yesterday'},
+            {'clinic': self.clinic.id, 'assessment_date': 20250301},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['assessments'], [1, 2])
+        self.assertFalse(RiskAssessment.objects.exists())
+
+
+class RiskAssessmentFieldTypeTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('staff'))
+        self.clinic = RiskHeatmapTests.make_clinic('Vancouver')
+
+    def test_create_rejects_a_non_string_province(self):
+        response = self.client.post('/api/clinics/risk-assessments/', {'clinic': self.clinic.id, 'province': 5}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(RiskAssessment.objects.exists())
+
+    def test_batch_reports_payloads_with_bad_species(self):
+        response = self.client.post('/api/clinics/risk-assessments/batch/', {'assessments': [
+            {'clinic': self.clinic.id, 'province': 'BC', 'species_treated': ['EQUINE']},
+            {'clinic': self.clinic.id, 'species_treated': 3},
+            {'clinic': self.clinic.id, 'species_treated': [['EQUINE']]},
+            {'clinic': self.clinic.id, 'province': ['BC']},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['assessments'], [1, 2, 3])
+        self.assertFalse(RiskAssessment.objects.exists())
+
+    def test_string_species_are_accepted(self):
+        response = self.client.post('/api/clinics/risk-assessments/batch/', {'assessments': [
+            {'clinic': self.clinic.id, 'province': 'BC', 'species_treated': 'EQUINE'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+
+class AssessmentPayloadTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.clinic = RiskHeatmapTests.make_clinic('Vancouver')
+
+    def assess(self, payload):
+        return RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 1, 1), assessment_data=payload)
+
+    def test_payload_is_deleted_with_its_last_assessment(self):
+        first, second = self.assess({'province': 'BC'}), self.assess({'province': 'BC'})
+        self.assertEqual(AssessmentPayload.objects.count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(AssessmentPayload.objects.count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RiskAssessment.objects.filter(id=second.id).delete()
+        self.assertFalse(AssessmentPayload.objects.exists())
+
+    def test_command_prunes_payloads_replaced_by_edits(self):
+        assessment = self.assess({'province': 'BC'})
+        assessment.assessment_data = {'province': 'AB'}
+        assessment.save()
+        self.assertEqual(AssessmentPayload.objects.count(), 2)
+
+        call_command('prune_assessment_payloads', stdout=StringIO())
+        self.assertEqual(list(AssessmentPayload.objects.values_list('digest', flat=True)), [assessment.assessment_payload_id])
+        self.assertEqual(RiskAssessment.objects.get(id=assessment.id).assessment_data, {'province': 'AB'})
+
+
+class TopRiskTests(TestCase):
+    def test_limit_is_clamped_to_at_least_one(self):
+        clinic = RiskHeatmapTests.make_clinic('Vancouver')
+        RiskAssessment.objects.create(clinic=clinic, assessment_date=date(2026, 1, 1), flood_risk=5)
+        for limit in ('0', '-5'):
+            response = self.client.get('/api/clinics/risk-assessments/top/', {'province': 'BC', 'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), 1)
+
+
+class ReassessmentRunAdminTests(TestCase):
+    def test_stale_running_runs_can_be_resumed(self):
+        now = timezone.now()
+        pending = ReassessmentRun.objects.create()
+        live = ReassessmentRun.objects.create(status='RUNNING', checkpointed_at=now)
+        stale = ReassessmentRun.objects.create(status='RUNNING', checkpointed_at=now - timedelta(hours=1))
+        ReassessmentRun.objects.create(status='COMPLETED')
+
+        self.client.force_login(User.objects.create_superuser('admin'))
+        response = self.client.post('/admin/clinics/reassessmentrun/', {
+            'action': 'start_runs', '_selected_action': list(ReassessmentRun.objects.values_list('id', flat=True)),
+        })
+        self.assertEqual(response.status_code, 302)
+        queued = sorted(job.kwargs['run_id'] for job in Job.objects.filter(task='clinics.reassess'))
+        self.assertEqual(queued, sorted([pending.id, stale.id]))
+        self.assertNotIn(live.id, queued)
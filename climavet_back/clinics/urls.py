@@ -3,8 +3,9 @@ from rest_framework.routers import DefaultRouter
 from .views import ClinicViewSet, RiskAssessmentViewSet
 
 router = DefaultRouter()
-router.register(r'', ClinicViewSet, basename='clinic')
+# risk-assessments must be registered first, otherwise the clinic detail route captures it as a pk
 router.register(r'risk-assessments', RiskAssessmentViewSet, basename='riskassessment')
+router.register(r'', ClinicViewSet, basename='clinic')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,8 +1,17 @@
+from datetime import date
 from django.shortcuts import render
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.response import Response
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from .models import Clinic, RiskAssessment
 from .serializers import ClinicSerializer, RiskAssessmentSerializer
+from climavet_back.pagination import IdCursorPagination
+from .services.clinic_importer import ClinicImporter
+from .services.risk_scoring import RiskScoringEngine
+from .services.risk_heatmap import RiskHeatmap
 
 # Create your views here.
 
@@ -10,24 +19,123 @@ class ClinicViewSet(viewsets.ModelViewSet):
     queryset = Clinic.objects.all()
     serializer_class = ClinicSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        """
+        Returns clinics annotated with their latest risk assessment so the overall risk
+        can be serialized without a query per clinic. Optionally restricts the clinics
+        to a given province and/or city, by filtering against query parameters in the URL.
+
+        :return: A queryset of Clinic instances annotated with their latest overall risk.
+        """
+        queryset = super().get_queryset()
+        province = self.request.query_params.get('province')
+        city = self.request.query_params.get('city')
+
+        if province:
+            queryset = queryset.filter(province=province)
+        if city:
+            queryset = queryset.filter(city=city)
+
+        return queryset.with_latest_risk()
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def bulk_import(self, request):
+        """
+        Bulk import clinics from an uploaded CSV or NDJSON file.
+
+        The file is parsed as a stream and valid rows are inserted in batched transactions,
+        so large files are never fully loaded into memory.
+
+        :param request: The HTTP request containing the file and an optional format ('csv' or 'ndjson').
+        :return: A response summarizing the number of created clinics and any row-level errors.
+        """
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('format') or ClinicImporter.detect_format(upload.name, upload.content_type or '')
+        if file_format not in ClinicImporter.FORMATS:
+            return Response({'error': f"format must be one of {ClinicImporter.FORMATS}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        importer = ClinicImporter(created_by=request.user)
+        try:
+            summary = importer.import_stream(ClinicImporter.open_text(upload.file), file_format)
+        except UnicodeDecodeError:
+            return Response(
+                {'error': f"The file is not valid UTF-8 text; the import stopped after {importer.created} clinics were created",
+                 'created': importer.created},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        response_status = status.HTTP_201_CREATED if summary['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(summary, status=response_status)
+
+    @action(detail=False, methods=['get'], url_path='risk-heatmap', permission_classes=[permissions.AllowAny])
+    def risk_heatmap(self, request):
+        """
+        Retrieve the distribution of clinics across risk bands for each hazard, per province and per city.
+
+        Served from the incrementally maintained RiskHeatmapCell table, so the cost does not grow with the number of assessments.
+
+        :param request: The HTTP request with optional province and hazard query parameters.
+        :return: A response containing the band distributions by province and by city.
+        """
+        province = request.query_params.get('province')
+        hazard = request.query_params.get('hazard')
+        return Response(RiskHeatmap.distribution(province=province, hazard=hazard), status=status.HTTP_200_OK)
+
 class RiskAssessmentViewSet(viewsets.ModelViewSet):
-    queryset = RiskAssessment.objects.all()
+    queryset = RiskAssessment.objects.select_related('assessment_payload')
     serializer_class = RiskAssessmentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    scoring_engine = RiskScoringEngine()
+
+    def calculate_risk_scores(self, data):
+        return self.scoring_engine.calculate_risk_scores(data)
+
+    @staticmethod
+    def parse_assessment_date(value, default: date) -> date:
+        """
+        Parse the optional assessment_date of a wizard payload.
+
+        :param value: An ISO 8601 date string such as '2025-03-01', or None.
+        :param default: The date used when no date is given.
+        :return: The assessment date.
+        :raises ValueError: If the value is not an ISO 8601 date string.
+        """
+        if value in (None, ''):
+            return default
+        if not isinstance(value, str):
+            raise ValueError('assessment_date must be a string')
+        return date.fromisoformat(value)
+
+    @staticmethod
+    def check_payload_fields(payload) -> None:
+        """
+        Check the types of the wizard answers the scoring engine reads as text.
+
+        :param payload: A wizard payload.
+        :raises ValueError: If province is not a string, or species_treated or species_types is neither a string nor a list of strings.
+        """
+        province = payload.get('province')
+        if province is not None and not isinstance(province, str):
+            raise ValueError('province must be a string')
+        for field in ('species_treated', 'species_types'):
+            species = payload.get(field)
+            if species is None or isinstance(species, str):
+                continue
+            if not isinstance(species, list) or not all(isinstance(value, str) for value in species):
+                raise ValueError(f"{field} must be a string or a list of strings")
 
     def create(self, request, *args, **kwargs):
         """
-        Docstring for create
-        
-        :param self: Description
-        :param request: Description
-        :param args: Description
-        :param kwargs: Description
-        Risk assessment creation logic goes here. You can add custom validation or processing before saving the instance.
+        Create a risk assessment for a clinic from the risk assessment wizard payload.
+
+        :param request: The HTTP request containing the clinic ID and the wizard answers.
+        :return: A response containing the created risk assessment or an error message if the clinic does not exist.
         """
         data = request.data
         clinic_id = data.get('clinic')
@@ -35,11 +143,21 @@ class RiskAssessmentViewSet(viewsets.ModelViewSet):
             clinic = Clinic.objects.get(id=clinic_id)
         except Clinic.DoesNotExist:
             return Response({'error': 'Clinic not found'}, status=status.HTTP_404_NOT_FOUND)
-        # calculate overall risk score based on wizard logic (this is just a placeholder, replace with actual logic)
+        try:
+            assessment_date = self.parse_assessment_date(data.get('assessment_date'), timezone.localdate())
+        except ValueError:
+            return Response({'error': 'Invalid assessment_date format, expected YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            self.check_payload_fields(data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # calculate the hazard scores from the wizard answers, then the vulnerabilities and recommendations they trigger
         scores = self.calculate_risk_scores(data)
-        
+        vulnerabilities, recommendations = self.scoring_engine.evaluate(scores)
+
         assessment = RiskAssessment.objects.create(
             clinic_id=clinic_id,
+            assessment_date=assessment_date,
             flood_risk=scores.get('flood_risk', 0),
             wildfire_risk=scores.get('wildfire_risk', 0),
             heatwave_risk=scores.get('heatwave_risk', 0),
@@ -52,18 +170,119 @@ class RiskAssessmentViewSet(viewsets.ModelViewSet):
             blizzard_risk=scores.get('blizzard_risk', 0),
             earthquake_risk=scores.get('earthquake_risk', 0),
             avalanche_risk=scores.get('avalanche_risk', 0),
-            assessment_data=data
+            assessment_data=data,
+            vulnerabilities=vulnerabilities,
+            recommendations=recommendations
         )
-        
-        # here you can also add logic to determine vulnerabilities and recommendations based on the scores
-        vulnerabilities = self.identify_vulnerabilities(scores)
-        assessment.vulnerabilities = vulnerabilities
-        recommendations = self.generate_recommendations(scores)
-        assessment.recommendations = recommendations
-        assessment.save()
 
         serializer = self.get_serializer(assessment)
         return Response(
             serializer.data,
             status=status.HTTP_201_CREATED
-        )
\ No newline at end of file
+        )
+
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """
+        Create risk assessments for many clinics at once.
+
+        All payloads are scored together by the risk scoring engine and the assessments
+        are written with a single bulk insert.
+
+        :param request: The HTTP request containing a list of wizard payloads, each with a clinic ID.
+        :return: A response containing the created risk assessments or an error message if any clinic does not exist.
+        """
+        payloads = request.data.get('assessments') if isinstance(request.data, dict) else request.data
+        if not isinstance(payloads, list) or not payloads:
+            return Response({'error': 'A non-empty list of assessments is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(payload, dict) for payload in payloads):
+            return Response({'error': 'Each assessment must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+
+        clinic_ids = {str(payload.get('clinic')) for payload in payloads}
+        existing_ids = {str(pk) for pk in Clinic.objects.filter(id__in=[pk for pk in clinic_ids if pk.isdigit()]).values_list('id', flat=True)}
+        missing_ids = sorted(clinic_ids - existing_ids)
+        if missing_ids:
+            return Response({'error': 'Clinic not found', 'clinics': missing_ids}, status=status.HTTP_404_NOT_FOUND)
+
+        today = timezone.localdate()
+        assessment_dates = []
+        invalid_dates = []
+        for index, payload in enumerate(payloads):
+            try:
+                assessment_dates.append(self.parse_assessment_date(payload.get('assessment_date'), today))
+            except ValueError:
+                invalid_dates.append(index)
+        if invalid_dates:
+            return Response(
+                {'error': 'Invalid assessment_date format, expected YYYY-MM-DD', 'assessments': invalid_dates},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        invalid_fields = {}
+        for index, payload in enumerate(payloads):
+            try:
+                self.check_payload_fields(payload)
+            except ValueError as e:
+                invalid_fields[index] = str(e)
+        if invalid_fields:
+            return Response(
+                {'error': 'Invalid field types', 'assessments': sorted(invalid_fields), 'errors': invalid_fields},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        assessments = []
+        for payload, assessment_date, result in zip(payloads, assessment_dates, self.scoring_engine.assess_batch(payloads)):
+            assessment = RiskAssessment(
+                clinic_id=int(payload['clinic']),
+                assessment_date=assessment_date,
+                assessment_data=payload,
+                vulnerabilities=result['vulnerabilities'],
+                recommendations=result['recommendations'],
+                **result['scores']
+            )
+            assessment.overall_score = assessment.calculate_overall_score()
+            assessments.append(assessment)
+
+        with transaction.atomic():
+            RiskAssessment.store_payloads(assessments)
+            RiskAssessment.objects.bulk_create(assessments)
+            # bulk_create does not send post_save, so refresh the heatmap explicitly
+            RiskHeatmap.refresh_clinics(assessment.clinic_id for assessment in assessments)
+
+        serializer = self.get_serializer(assessments, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='top')
+    def top(self, request):
+        """
+        Retrieve the highest-risk clinics in a province, ranked by the overall score of their latest assessment.
+
+        :param request: The HTTP request with a required province and an optional limit query parameter.
+        :return: A response containing up to limit clinics ordered from highest to lowest overall score.
+        """
+        province = request.query_params.get('province')
+        if not province:
+            return Response({'error': 'province is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+        except ValueError:
+            return Response({'error': 'Invalid limit format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        assessments = (
+            RiskAssessment.objects
+            .filter(clinic__province=province)
+            .latest_per_clinic()
+            .order_by('-overall_score', '-assessment_date')
+            .values('id', 'clinic_id', 'clinic__name', 'clinic__city', 'assessment_date', 'overall_score')[:limit]
+        )
+        results = [
+            {
+                'clinic': assessment['clinic_id'],
+                'clinic_name': assessment['clinic__name'],
+                'city': assessment['clinic__city'],
+                'risk_assessment': assessment['id'],
+                'assessment_date': assessment['assessment_date'],
+                'overall_score': assessment['overall_score'],
+            }
+            for assessment in assessments
+        ]
+        return Response({'province': province, 'results': results}, status=status.HTTP_200_OK)
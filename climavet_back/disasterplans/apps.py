@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class DisasterplansConfig(AppConfig):
     name = 'disasterplans'
+
+    def ready(self):
+        from . import signals  # noqa: F401
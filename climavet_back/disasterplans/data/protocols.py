@@ -0,0 +1,4 @@
+from climavet_back.compiled_data import CompiledData
+
+# Loaded lazily from the compiled form of disaster_protocols.py; import this instead of the source module.
+DISASTER_PROTOCOLS = CompiledData('disasterplans.data.disaster_protocols', 'DISASTER_PROTOCOLS')
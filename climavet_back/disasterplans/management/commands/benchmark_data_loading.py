@@ -0,0 +1,72 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from disasterplans.data.protocols import DISASTER_PROTOCOLS
+from resourcechecklists.data.resources import RESOURCE_DATABASE
+
+# Run in a fresh interpreter per sample, so nothing is already imported. Memory is measured with tracemalloc
+# (bytes allocated by the step) and from /proc (resident set growth), after Django has been set up.
+PROBE = """
+import json, os, sys, time, tracemalloc
+import django
+django.setup()
+
+def rss():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return 0
+
+mode = sys.argv[1]
+rss_before = rss()
+tracemalloc.start()
+start = time.perf_counter()
+if mode == 'source':
+    from disasterplans.data.disaster_protocols import DISASTER_PROTOCOLS
+    from resourcechecklists.data.resource_database import RESOURCE_DATABASE
+else:
+    from disasterplans.data.protocols import DISASTER_PROTOCOLS
+    from resourcechecklists.data.resources import RESOURCE_DATABASE
+    if mode == 'compiled-first-access':
+        DISASTER_PROTOCOLS['FLOOD']
+        RESOURCE_DATABASE['Flood']
+seconds = time.perf_counter() - start
+allocated = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+print(json.dumps({'ms': seconds * 1000, 'allocated': allocated, 'rss': rss() - rss_before}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Compare the startup cost of importing the static data modules with loading their compiled form."
+
+    MODES = ['source', 'compiled', 'compiled-first-access']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=10, help="Fresh interpreters started per mode.")
+
+    def handle(self, *args, **options):
+        # Measure warm starts, as a worker sees them after deployment compiled the data
+        for dataset in (DISASTER_PROTOCOLS, RESOURCE_DATABASE):
+            dataset.compile()
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+        # Byte-code caches of the source modules are warm too
+        subprocess.run([sys.executable, '-c', PROBE, 'source'], env=env, check=True, capture_output=True)
+
+        self.stdout.write(f"{'mode':<24}{'import ms':>12}{'allocated KiB':>16}{'RSS KiB':>10}")
+        for mode in self.MODES:
+            samples = []
+            for _ in range(max(options['runs'], 1)):
+                result = subprocess.run([sys.executable, '-c', PROBE, mode], env=env, check=True, capture_output=True, text=True)
+                samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+            self.stdout.write(
+                f"{mode:<24}"
+                f"{statistics.median(sample['ms'] for sample in samples):>12.2f}"
+                f"{statistics.median(sample['allocated'] for sample in samples) / 1024:>16.1f}"
+                f"{statistics.median(sample['rss'] for sample in samples) / 1024:>10.0f}"
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from disasterplans.data.protocols import DISASTER_PROTOCOLS
+from resourcechecklists.data.resources import RESOURCE_DATABASE
+
+
+class Command(BaseCommand):
+    help = "Compile DISASTER_PROTOCOLS and RESOURCE_DATABASE into the data files workers load lazily. Run at deploy time."
+
+    def handle(self, *args, **options):
+        for dataset in (DISASTER_PROTOCOLS, RESOURCE_DATABASE):
+            path = dataset.compile()
+            dataset.reload()
+            self.stdout.write(self.style.SUCCESS(f"{dataset.name}: {len(dataset)} entries written to {path}"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from disasterplans.services.protocol_sync import ProtocolSync
+
+
+class Command(BaseCommand):
+    help = "Move disaster plans built from outdated protocol versions to the current contents of DISASTER_PROTOCOLS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', action='append', dest='categories', help="Only check this category (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=ProtocolSync.BATCH_SIZE, help="Plans updated per statement.")
+        parser.add_argument('--dry-run', action='store_true', help="Report the affected plans without updating them or recording a new protocol version.")
+
+    def handle(self, *args, **options):
+        report = ProtocolSync.sync(options['categories'], batch_size=options['batch_size'], dry_run=options['dry_run'])
+        if not report:
+            self.stdout.write("All plans are built from the current protocols.")
+            return
+        verb = "would be updated" if options['dry_run'] else "updated"
+        for category, result in report.items():
+            for version, sections in result['changed_sections'].items():
+                self.stdout.write(f"{category} v{version} -> v{result['version']}: {', '.join(sections) or 'no section changes'}")
+            self.stdout.write(self.style.SUCCESS(f"{category}: {result['plans_updated']} plans {verb}."))
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0003_clinic_listing_indexes'),
+        ('disasterplans', '0003_disasterplan_common_regions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='disastertype',
+            name='category',
+            field=models.CharField(choices=[('FLOOD', 'Flood'), ('WILDFIRE', 'Wildfire'), ('HEATWAVE', 'Heatwave'), ('POWER_OUTAGE', 'Power Outage'), ('AIR_POLLUTION', 'Air Pollution'), ('EROSION', 'Erosion'), ('HURRICANE', 'Hurricane'), ('TORNADO', 'Tornado'), ('COLD_WAVE', 'Cold Wave'), ('BLIZZARD', 'Blizzard'), ('EARTHQUAKE', 'Earthquake'), ('AVALANCHE', 'Avalanche')], db_index=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='disasterplan',
+            index=models.Index(fields=['clinic', 'disaster_type', '-id'], name='plan_clinic_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disasterplan',
+            index=models.Index(fields=['disaster_type', '-id'], name='plan_type_idx'),
+        ),
+    ]
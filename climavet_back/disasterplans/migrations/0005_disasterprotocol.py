@@ -0,0 +1,128 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:25
+
+import hashlib
+import json
+from collections import Counter
+import django.db.models.deletion
+from django.db import migrations, models
+
+SECTIONS = [
+    'preparation_steps', 'response_steps', 'recovery_steps',
+    'emergency_contacts', 'supplies_needed', 'training_requirements',
+]
+
+
+def hash_sections(sections):
+    canonical = json.dumps(sections, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def move_sections_to_protocols(apps, schema_editor):
+    # The most common section contents of each category become version 1 of its protocol,
+    # and every plan keeps the sections that differ from it as overrides.
+    DisasterPlan = apps.get_model('disasterplans', 'DisasterPlan')
+    DisasterProtocol = apps.get_model('disasterplans', 'DisasterProtocol')
+
+    plans = DisasterPlan.objects.values_list('disaster_type__category', *SECTIONS)
+    counts = Counter()
+    contents = {}
+    for category, *values in plans.iterator(chunk_size=2000):
+        sections = dict(zip(SECTIONS, values))
+        content_hash = hash_sections(sections)
+        counts[(category, content_hash)] += 1
+        contents[content_hash] = sections
+
+    protocols = {}
+    for (category, content_hash), _ in counts.most_common():
+        if category not in protocols:
+            protocols[category] = DisasterProtocol.objects.create(
+                category=category, version=1, content_hash=content_hash, sections=contents[content_hash]
+            )
+
+    batch = []
+    for plan in DisasterPlan.objects.select_related('disaster_type').iterator(chunk_size=2000):
+        protocol = protocols[plan.disaster_type.category]
+        plan.protocol_id = protocol.id
+        plan.overrides = {
+            name: getattr(plan, name) for name in SECTIONS
+            if getattr(plan, name) != protocol.sections[name]
+        }
+        batch.append(plan)
+        if len(batch) >= 2000:
+            DisasterPlan.objects.bulk_update(batch, ['protocol', 'overrides'])
+            batch = []
+    DisasterPlan.objects.bulk_update(batch, ['protocol', 'overrides'])
+
+
+def restore_sections(apps, schema_editor):
+    DisasterPlan = apps.get_model('disasterplans', 'DisasterPlan')
+
+    batch = []
+    for plan in DisasterPlan.objects.select_related('protocol').iterator(chunk_size=2000):
+        base = plan.protocol.sections if plan.protocol else {}
+        for name in SECTIONS:
+            setattr(plan, name, plan.overrides.get(name, base.get(name, [])))
+        batch.append(plan)
+        if len(batch) >= 2000:
+            DisasterPlan.objects.bulk_update(batch, SECTIONS)
+            batch = []
+    DisasterPlan.objects.bulk_update(batch, SECTIONS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disasterplans', '0004_disasterplan_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='disasterplan',
+            name='overrides',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.CreateModel(
+            name='DisasterProtocol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100)),
+                ('version', models.PositiveIntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('sections', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category', 'version'), name='unique_protocol_version'), models.UniqueConstraint(fields=('category', 'content_hash'), name='unique_protocol_content')],
+            },
+        ),
+        migrations.AddField(
+            model_name='disasterplan',
+            name='protocol',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='plans', to='disasterplans.disasterprotocol'),
+        ),
+        migrations.RunPython(move_sections_to_protocols, restore_sections),
+        migrations.RemoveField(
+            model_name='disasterplan',
+            name='emergency_contacts',
+        ),
+        migrations.RemoveField(
+            model_name='disasterplan',
+            name='preparation_steps',
+        ),
+        migrations.RemoveField(
+            model_name='disasterplan',
+            name='recovery_steps',
+        ),
+        migrations.RemoveField(
+            model_name='disasterplan',
+            name='response_steps',
+        ),
+        migrations.RemoveField(
+            model_name='disasterplan',
+            name='supplies_needed',
+        ),
+        migrations.RemoveField(
+            model_name='disasterplan',
+            name='training_requirements',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disasterplans', '0005_disasterprotocol'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='disasterplan',
+            name='hazards',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
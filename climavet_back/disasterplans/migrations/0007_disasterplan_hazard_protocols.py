@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:14
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def link_hazard_protocols(apps, schema_editor):
+    # Combined plans used to store their merged sections as overrides. Link each hazard to a protocol version,
+    # the plan's own for its first hazard and the latest recorded one for the others, and drop the overrides
+    # that equal the merge of those versions, so later protocol edits reach the plan.
+    from disasterplans.services.plan_generator import DisasterPlanGenerator
+
+    DisasterPlan = apps.get_model('disasterplans', 'DisasterPlan')
+    DisasterProtocol = apps.get_model('disasterplans', 'DisasterProtocol')
+    latest = {
+        row['category']: row['version']
+        for row in DisasterProtocol.objects.values('category').annotate(version=Max('version'))
+    }
+    protocols = {}
+
+    def protocol_for(category, version):
+        if (category, version) not in protocols:
+            protocols[category, version] = DisasterProtocol.objects.filter(category=category, version=version).first()
+        return protocols[category, version]
+
+    changed = []
+    for plan in DisasterPlan.objects.exclude(hazards=[]).select_related('protocol').iterator(chunk_size=1000):
+        members = []
+        for category in plan.hazards:
+            if plan.protocol is not None and plan.protocol.category == category:
+                members.append(plan.protocol)
+            else:
+                members.append(protocol_for(category, latest.get(category)))
+        if None in members:
+            continue
+        merged = DisasterPlanGenerator.merge_sections([(protocol.category, protocol) for protocol in members])
+        plan.hazard_protocols = [protocol.id for protocol in members]
+        plan.overrides = {name: value for name, value in plan.overrides.items() if value != merged.get(name, [])}
+        changed.append(plan)
+    DisasterPlan.objects.bulk_update(changed, ['hazard_protocols', 'overrides'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disasterplans', '0006_disasterplan_hazards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='disasterplan',
+            name='hazard_protocols',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(link_hazard_protocols, migrations.RunPython.noop),
+    ]
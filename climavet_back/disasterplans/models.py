@@ -1,12 +1,18 @@
-from django.db import models
+import copy
+import hashlib
+import json
+import threading
+from functools import partial
+from django.db import IntegrityError, models, transaction
 from clinics.models import Clinic
 from django.contrib.auth.models import User
+from .data.protocols import DISASTER_PROTOCOLS
 
 # Create your models here.
 
 class DisasterType(models.Model):
     name = models.CharField(max_length=100)
-    category = models.CharField(max_length=100,
+    category = models.CharField(max_length=100, db_index=True,
                                 choices=[
                                     ("FLOOD", "Flood"),
                                     ("WILDFIRE", "Wildfire"),
@@ -27,6 +33,152 @@ class DisasterType(models.Model):
     def __str__(self):
         return self.name
 
+class DisasterProtocol(models.Model):
+    # Immutable, versioned snapshot of the sections of a protocol in DISASTER_PROTOCOLS.
+    # Plans reference a version and only store the sections a clinic has changed.
+    SECTIONS = [
+        'preparation_steps', 'response_steps', 'recovery_steps',
+        'emergency_contacts', 'supplies_needed', 'training_requirements',
+    ]
+
+    category = models.CharField(max_length=100)
+    version = models.PositiveIntegerField()
+    content_hash = models.CharField(max_length=64)
+    sections = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Versions never change once written, so they are cached in-process by id and by category.
+    # Rows are only cached once the transaction that read or created them commits, so a rolled-back
+    # version can never be handed out.
+    _lock = threading.Lock()
+    _by_id = {}
+    _current = {}
+    _merged = {}  # Merged sections of combined plans, by the categories and contents of their versions
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'version'], name='unique_protocol_version'),
+            models.UniqueConstraint(fields=['category', 'content_hash'], name='unique_protocol_content'),
+        ]
+
+    @staticmethod
+    def hash_value(value):
+        canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def hash_sections(cls, sections):
+        return cls.hash_value({name: sections.get(name, []) for name in cls.SECTIONS})
+
+    def section_hashes(self):
+        return {name: self.hash_value(self.sections.get(name, [])) for name in self.SECTIONS}
+
+    @classmethod
+    def cached(cls, protocol_id):
+        """
+        Fetch a protocol version by id, from memory after the first lookup.
+
+        :param protocol_id: The primary key of the protocol version.
+        :return: The DisasterProtocol, or None if it does not exist.
+        """
+        protocol = cls._by_id.get(protocol_id)
+        if protocol is None:
+            protocol = cls.objects.filter(id=protocol_id).first()
+            if protocol is not None:
+                transaction.on_commit(partial(cls.remember, protocol))
+        return protocol
+
+    @classmethod
+    def remember(cls, protocol, current=False):
+        # Called from transaction.on_commit, once the protocol row is known to be committed
+        with cls._lock:
+            cls._by_id[protocol.id] = protocol
+            if current:
+                cls._current[protocol.category] = protocol
+
+    @classmethod
+    def peek_current(cls, category):
+        """
+        The protocol version matching the current contents of DISASTER_PROTOCOLS for a category, without writing anything.
+
+        :param category: A disaster category such as 'FLOOD'.
+        :return: The recorded DisasterProtocol, an unsaved one numbered as the next version if these contents were never
+            recorded, or None if there is no protocol for the category.
+        """
+        source = DISASTER_PROTOCOLS.get(category)
+        if not source:
+            return None
+        sections = {name: source.get(name, []) for name in cls.SECTIONS}
+        content_hash = cls.hash_sections(sections)
+        protocol = cls.objects.filter(category=category, content_hash=content_hash).first()
+        if protocol is None:
+            latest = cls.objects.filter(category=category).aggregate(models.Max('version'))['version__max'] or 0
+            protocol = cls(category=category, version=latest + 1, content_hash=content_hash, sections=sections)
+        return protocol
+
+    @classmethod
+    def current(cls, category):
+        """
+        The protocol version matching the current contents of DISASTER_PROTOCOLS for a category,
+        recording a new version the first time those contents are seen.
+
+        :param category: A disaster category such as 'FLOOD'.
+        :return: The DisasterProtocol, or None if there is no protocol for the category.
+        """
+        protocol = cls._current.get(category)
+        if protocol is not None:
+            return protocol
+        protocol = cls.peek_current(category)
+        if protocol is None:
+            return None
+        if protocol.pk is None:
+            try:
+                with transaction.atomic():
+                    protocol.save(force_insert=True)
+            except IntegrityError:
+                # Another process recorded the same version concurrently
+                protocol = cls.objects.get(category=category, content_hash=protocol.content_hash)
+        transaction.on_commit(partial(cls.remember, protocol, current=True))
+        return protocol
+
+    @classmethod
+    def merged_sections(cls, protocols):
+        """
+        The sections of several protocol versions merged into one, as a combined plan presents them.
+
+        Versions never change, so each combination is merged once per process.
+
+        :param protocols: The protocol versions, highest priority first.
+        :return: A dictionary mapping each section name to its merged entries.
+        """
+        # Imported here, as the plan generator imports this module
+        from .services.plan_generator import DisasterPlanGenerator
+
+        key = tuple((protocol.category, protocol.content_hash) for protocol in protocols)
+        sections = cls._merged.get(key)
+        if sections is None:
+            sections = DisasterPlanGenerator.merge_sections([(protocol.category, protocol) for protocol in protocols])
+            with cls._lock:
+                cls._merged[key] = sections
+        return sections
+
+    def __str__(self):
+        return f"{self.category} v{self.version}"
+
+def _section_property(name):
+    # Plan sections read the clinic's override when there is one, and the referenced protocol versions otherwise.
+    # The protocol section is copied into the overrides on first read, so changes made to the returned list in
+    # place are saved; copies left unchanged are dropped again by normalize_overrides.
+    def getter(self):
+        if name not in self.overrides:
+            self.overrides[name] = copy.deepcopy(self.protocol_sections().get(name, []))
+        return self.overrides[name]
+
+    def setter(self, value):
+        self.overrides[name] = value
+
+    return property(getter, setter)
+
 class DisasterPlan(models.Model):
     clinic = models.ForeignKey(Clinic, on_delete=models.CASCADE, related_name='disaster_plans')
     name = models.CharField(max_length=255)
@@ -34,13 +186,54 @@ class DisasterPlan(models.Model):
     disaster_type = models.ForeignKey(DisasterType, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     common_regions = models.JSONField(default=list)  # List of regions commonly affected by this disaster type
-    preparation_steps = models.JSONField(default=list)  # List of preparation steps
-    response_steps = models.JSONField(default=list)     # List of response steps
-    recovery_steps = models.JSONField(default=list)     # List of recovery steps
-    emergency_contacts = models.JSONField(default=list) # List of emergency contacts
-    supplies_needed = models.JSONField(default=list)    # List of supplies needed
-    training_requirements = models.JSONField(default=list) # List of training requirements
-
-    
-    
-    
\ No newline at end of file
+    protocol = models.ForeignKey(DisasterProtocol, on_delete=models.PROTECT, null=True, blank=True, related_name='plans')
+    overrides = models.JSONField(default=dict, blank=True)  # Clinic-specific sections that differ from the protocol
+    hazards = models.JSONField(default=list, blank=True)  # Categories merged into a combined multi-hazard plan, empty otherwise
+    hazard_protocols = models.JSONField(default=list, blank=True)  # Ids of the protocol versions merged for each of the hazards, in the same order
+
+    preparation_steps = _section_property('preparation_steps')  # List of preparation steps
+    response_steps = _section_property('response_steps')  # List of response steps
+    recovery_steps = _section_property('recovery_steps')  # List of recovery steps
+    emergency_contacts = _section_property('emergency_contacts')  # List of emergency contacts
+    supplies_needed = _section_property('supplies_needed')  # List of supplies needed
+    training_requirements = _section_property('training_requirements')  # List of training requirements
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['clinic', 'disaster_type', '-id'], name='plan_clinic_type_idx'),
+            models.Index(fields=['disaster_type', '-id'], name='plan_type_idx'),
+        ]
+
+    def protocol_sections(self):
+        """
+        The sections the plan is built from: those of its protocol version or, for a combined plan,
+        the merge of the versions of each of its hazards. Overrides are applied on top of these.
+
+        :return: A dictionary mapping section names to their entries, empty without a protocol.
+        """
+        if self.hazard_protocols:
+            protocols = [DisasterProtocol.cached(protocol_id) for protocol_id in self.hazard_protocols]
+            if None not in protocols:
+                return DisasterProtocol.merged_sections(protocols)
+        protocol = DisasterProtocol.cached(self.protocol_id) if self.protocol_id else None
+        return protocol.sections if protocol else {}
+
+    def normalize_overrides(self):
+        """
+        Attach the current protocol version when the plan has none, and drop overrides equal to the protocol sections.
+        """
+        if self.protocol_id is None and self.disaster_type_id:
+            self.protocol = DisasterProtocol.current(self.disaster_type.category)
+        if self.protocol_id is not None:
+            sections = self.protocol_sections()
+            self.overrides = {
+                name: value for name, value in self.overrides.items()
+                if value != sections.get(name, [])
+            }
+
+    def save(self, *args, **kwargs):
+        self.normalize_overrides()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'protocol', 'overrides'}
+        super().save(*args, **kwargs)
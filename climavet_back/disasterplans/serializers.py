@@ -2,9 +2,18 @@ from .models import DisasterPlan, DisasterType
 from rest_framework import serializers
 
 class DisasterPlanSerializer(serializers.ModelSerializer):
+    # Sections are assembled from the referenced protocol versions and the plan's own overrides
+    preparation_steps = serializers.JSONField(required=False)
+    response_steps = serializers.JSONField(required=False)
+    recovery_steps = serializers.JSONField(required=False)
+    emergency_contacts = serializers.JSONField(required=False)
+    supplies_needed = serializers.JSONField(required=False)
+    training_requirements = serializers.JSONField(required=False)
+
     class Meta:
         model = DisasterPlan
-        fields = '__all__'
+        exclude = ['overrides']
+        read_only_fields = ['protocol', 'hazards', 'hazard_protocols']
 
 class DisasterTypeSerializer(serializers.ModelSerializer):
     class Meta:
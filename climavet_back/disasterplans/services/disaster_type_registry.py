@@ -0,0 +1,140 @@
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from django.core.cache import cache
+from disasterplans.models import DisasterType
+
+
+class DisasterTypeRegistry:
+    """
+    Process-local registry of every DisasterType, indexed by id and by category.
+
+    The table only changes through migrations and the admin, so it is loaded once per process.
+    Saving or deleting a DisasterType bumps a version stamp in the shared cache; each process
+    compares it with the version it loaded at most every VERSION_CHECK_INTERVAL seconds and reloads when it differs.
+    Returned instances are shared between requests and must be treated as read-only.
+    """
+
+    VERSION_KEY = 'disasterplans:disaster_type_registry:version'
+    VERSION_CHECK_INTERVAL = 2.0
+
+    _lock = threading.Lock()
+    _version: Optional[str] = None
+    _checked_at = 0.0
+    _by_id: Optional[Dict[int, DisasterType]] = None
+    _by_category: Dict[str, List[DisasterType]] = {}
+
+    @classmethod
+    def _ensure_loaded(cls):
+        now = time.monotonic()
+        if cls._by_id is not None and now - cls._checked_at < cls.VERSION_CHECK_INTERVAL:
+            return
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(cls.VERSION_KEY, version, timeout=None):
+                version = cache.get(cls.VERSION_KEY, version)
+        if cls._by_id is None or version != cls._version:
+            cls._load(version)
+        cls._checked_at = now
+
+    @classmethod
+    def _load(cls, version: str):
+        by_id = {}
+        by_category: Dict[str, List[DisasterType]] = {}
+        for disaster_type in DisasterType.objects.order_by('id'):
+            by_id[disaster_type.id] = disaster_type
+            by_category.setdefault(disaster_type.category, []).append(disaster_type)
+        with cls._lock:
+            cls._by_id = by_id
+            cls._by_category = by_category
+            cls._version = version
+
+    @classmethod
+    def version(cls) -> str:
+        """
+        Version stamp of the loaded registry, which changes whenever any DisasterType changes.
+
+        :return: The version stamp.
+        """
+        cls._ensure_loaded()
+        return cls._version
+
+    @classmethod
+    def get(cls, disaster_type_id: Any) -> Optional[DisasterType]:
+        """
+        Look up a disaster type by primary key.
+
+        :param disaster_type_id: The primary key, as an int or a numeric string.
+        :return: The DisasterType, or None if it does not exist or the id is malformed.
+        """
+        try:
+            disaster_type_id = int(disaster_type_id)
+        except (TypeError, ValueError):
+            return None
+        cls._ensure_loaded()
+        return cls._by_id.get(disaster_type_id)
+
+    @classmethod
+    def for_category(cls, category: str) -> List[DisasterType]:
+        """
+        Disaster types belonging to a category.
+
+        :param category: A category such as 'FLOOD'.
+        :return: A list of DisasterType instances, empty if none exist.
+        """
+        cls._ensure_loaded()
+        return list(cls._by_category.get(category, []))
+
+    @classmethod
+    def all(cls) -> List[DisasterType]:
+        cls._ensure_loaded()
+        return list(cls._by_id.values())
+
+    @classmethod
+    def categories(cls) -> List[str]:
+        """
+        Categories that have at least one disaster type.
+
+        :return: A list of unique categories.
+        """
+        cls._ensure_loaded()
+        return list(cls._by_category.keys())
+
+    @classmethod
+    def info(cls, disaster_type_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Metadata of a disaster type, as embedded in API responses.
+
+        :param disaster_type_id: The primary key of the disaster type.
+        :return: A dictionary with the id, name, category and description, or None if the type does not exist.
+        """
+        disaster_type = cls.get(disaster_type_id)
+        if disaster_type is None:
+            return None
+        return {
+            'id': disaster_type.id,
+            'name': disaster_type.name,
+            'category': disaster_type.category,
+            'description': disaster_type.description,
+        }
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Drop the local registry and publish a new version stamp so every other process reloads too.
+        """
+        cache.set(cls.VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        cls.reset()
+
+    @classmethod
+    def reset(cls):
+        """
+        Drop the local registry only, so it is reloaded on next use.
+        """
+        with cls._lock:
+            cls._by_id = None
+            cls._by_category = {}
+            cls._version = None
+            cls._checked_at = 0.0
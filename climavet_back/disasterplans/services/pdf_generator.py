@@ -0,0 +1,320 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from disasterplans.models import DisasterPlan, DisasterProtocol
+
+# Glyph widths of the standard Helvetica font for ASCII 32-126, in 1/1000 em
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+
+class PdfWriter:
+    """
+    Minimal streaming PDF writer using the standard Helvetica fonts.
+
+    Each page is written to the output as soon as it is finished, so memory use does not grow with the document.
+    Only the byte offsets of the objects are kept until the cross-reference table is written at the end.
+    """
+
+    PAGE_WIDTH = 612  # US Letter, in points
+    PAGE_HEIGHT = 792
+    MARGIN = 54
+    FONTS = {'regular': 'F1', 'bold': 'F2'}
+
+    def __init__(self, output: BinaryIO):
+        self.output = output
+        self.offsets: Dict[int, int] = {}
+        self.position = 0
+        self.page_ids: List[int] = []
+        self.next_id = 5  # 1: catalog, 2: page tree, 3-4: fonts
+        self.commands: List[str] = []
+        self.y = 0.0
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+        self._object(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+        self.new_page()
+
+    def _write(self, data: bytes):
+        self.output.write(data)
+        self.position += len(data)
+
+    def _object(self, object_id: int, body: bytes):
+        self.offsets[object_id] = self.position
+        self._write(b'%d 0 obj\n' % object_id + body + b'\nendobj\n')
+
+    @staticmethod
+    def text_width(text: str, size: float, bold: bool = False) -> float:
+        width = sum(HELVETICA_WIDTHS[ord(char) - 32] if 32 <= ord(char) <= 126 else 556 for char in text)
+        return width * size / 1000 * (1.05 if bold else 1.0)
+
+    @staticmethod
+    def _escape(text: str) -> str:
+        encoded = text.encode('cp1252', 'replace').decode('latin-1')
+        return encoded.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    def wrap(self, text: str, size: float, width: float, bold: bool = False) -> List[str]:
+        """
+        Split text into lines that fit the given width.
+
+        :param text: The text to wrap.
+        :param size: The font size in points.
+        :param width: The available width in points.
+        :param bold: Whether the text is set in bold.
+        :return: The wrapped lines.
+        """
+        lines = []
+        for paragraph in str(text).splitlines() or ['']:
+            line = ''
+            for word in paragraph.split():
+                candidate = f"{line} {word}" if line else word
+                if line and self.text_width(candidate, size, bold) > width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return lines
+
+    def new_page(self):
+        if self.commands:
+            self._flush_page()
+        self.commands = []
+        self.y = self.PAGE_HEIGHT - self.MARGIN
+
+    def _flush_page(self):
+        page_number = len(self.page_ids) + 1
+        self.commands.append(f"BT /F1 8 Tf {self.MARGIN} {self.MARGIN / 2:.1f} Td (Page {page_number}) Tj ET")
+        content = '\n'.join(self.commands).encode('latin-1')
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+        self._object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.PAGE_WIDTH} {self.PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode('latin-1'))
+        self.page_ids.append(page_id)
+
+    def text(self, text: str, size: float = 10.5, bold: bool = False, indent: float = 0, leading: Optional[float] = None,
+             space_before: float = 0):
+        """
+        Write wrapped text at the current position, starting new pages as needed.
+
+        :param text: The text to write.
+        :param size: The font size in points.
+        :param bold: Whether to use the bold font.
+        :param indent: Left indent in points.
+        :param leading: Line height in points, 1.35 times the font size by default.
+        :param space_before: Vertical space added before the text.
+        """
+        leading = leading or size * 1.35
+        self.y -= space_before
+        width = self.PAGE_WIDTH - 2 * self.MARGIN - indent
+        font = self.FONTS['bold' if bold else 'regular']
+        for line in self.wrap(text, size, width, bold):
+            if self.y - leading < self.MARGIN:
+                self.new_page()
+            self.y -= leading
+            self.commands.append(f"BT /{font} {size} Tf {self.MARGIN + indent:.1f} {self.y:.1f} Td ({self._escape(line)}) Tj ET")
+
+    def rule(self, space: float = 6):
+        self.y -= space
+        self.commands.append(f"0.6 G 0.5 w {self.MARGIN} {self.y:.1f} m {self.PAGE_WIDTH - self.MARGIN} {self.y:.1f} l S 0 G")
+        self.y -= space
+
+    def close(self, title: str = ''):
+        """
+        Finish the last page and write the page tree, catalog and cross-reference table.
+
+        :param title: Document title stored in the PDF metadata.
+        """
+        self._flush_page()
+        kids = ' '.join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode('latin-1'))
+        self._object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        info_id = self.next_id
+        self._object(info_id, f"<< /Title ({self._escape(title)}) /Producer (ClimaVet) >>".encode('latin-1'))
+
+        xref_position = self.position
+        lines = [f"xref\n0 {info_id + 1}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{self.offsets[object_id]:010d} 00000 n \n" for object_id in range(1, info_id + 1))
+        self._write(''.join(lines).encode('latin-1'))
+        self._write(f"trailer\n<< /Size {info_id + 1} /Root 1 0 R /Info {info_id} 0 R >>\nstartxref\n{xref_position}\n%%EOF\n".encode('latin-1'))
+
+
+class PlanPdfRenderer:
+    """Service class responsible for rendering disaster plans as PDF documents, cached on disk by content hash."""
+
+    # Bump when the layout changes so cached documents are re-rendered
+    RENDERER_VERSION = 1
+    SECTION_TITLES = {
+        'preparation_steps': 'Preparation Steps',
+        'response_steps': 'Response Steps',
+        'recovery_steps': 'Recovery Steps',
+        'emergency_contacts': 'Emergency Contacts',
+        'supplies_needed': 'Supplies Needed',
+        'training_requirements': 'Training Requirements',
+    }
+
+    @staticmethod
+    def cache_dir() -> Path:
+        return Path(settings.PLAN_PDF_CACHE_DIR)
+
+    @classmethod
+    def plan_content(cls, plan: DisasterPlan) -> Dict[str, Any]:
+        """
+        Everything that appears in the rendered document of a plan.
+
+        :param plan: The disaster plan, ideally with its clinic and disaster type selected.
+        :return: A JSON-serializable dictionary.
+        """
+        return {
+            'name': plan.name,
+            'description': plan.description or '',
+            'clinic': plan.clinic.name,
+            'address': ', '.join(part for part in [plan.clinic.address, plan.clinic.city, plan.clinic.province] if part),
+            'disaster_type': plan.disaster_type.name,
+            'common_regions': plan.common_regions,
+            'sections': {name: getattr(plan, name) for name in DisasterProtocol.SECTIONS},
+        }
+
+    @classmethod
+    def content_hash(cls, content: Dict[str, Any]) -> str:
+        canonical = json.dumps([cls.RENDERER_VERSION, content], sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def format_item(item: Any) -> str:
+        if isinstance(item, dict):
+            return '; '.join(f"{key.replace('_', ' ').capitalize()}: {PlanPdfRenderer.format_item(value)}" for key, value in item.items())
+        if isinstance(item, (list, tuple)):
+            return ', '.join(PlanPdfRenderer.format_item(value) for value in item)
+        return str(item)
+
+    @classmethod
+    def render(cls, content: Dict[str, Any], output: BinaryIO):
+        """
+        Write the PDF document of a plan to a binary stream.
+
+        :param content: The plan content, as returned by plan_content.
+        :param output: A writable binary stream.
+        """
+        pdf = PdfWriter(output)
+        pdf.text(content['name'], size=18, bold=True)
+        pdf.text(content['clinic'], size=12, space_before=4)
+        if content['address']:
+            pdf.text(content['address'], size=10)
+        pdf.text(f"Disaster type: {content['disaster_type']}", size=10)
+        pdf.rule()
+        if content['description']:
+            pdf.text(content['description'])
+
+        for name, title in cls.SECTION_TITLES.items():
+            items = content['sections'].get(name) or []
+            pdf.text(title, size=13, bold=True, space_before=12)
+            if not items:
+                pdf.text('None specified.', indent=12)
+            for number, item in enumerate(items, start=1):
+                pdf.text(f"{number}. {cls.format_item(item)}", indent=12, space_before=2)
+
+        if content['common_regions']:
+            pdf.text('Commonly Affected Regions', size=13, bold=True, space_before=12)
+            for region in content['common_regions']:
+                pdf.text(f"- {cls.format_item(region)}", indent=12, space_before=2)
+        pdf.close(title=content['name'])
+
+    @classmethod
+    def get_pdf(cls, plan: DisasterPlan) -> Tuple[Path, str]:
+        """
+        Path of the rendered document of a plan, rendering it first if this content has not been rendered yet.
+
+        The document is streamed to a temporary file and moved into place, so concurrent requests never see a partial file.
+
+        :param plan: The disaster plan.
+        :return: A tuple of (path, content hash).
+        """
+        content = cls.plan_content(plan)
+        digest = cls.content_hash(content)
+        path = cls.cache_dir() / digest[:2] / f"{digest}.pdf"
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as output:
+                    cls.render(content, output)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        return path, digest
+
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def ranged_file_response(request, path: Path, etag: str, filename: str, content_type: str = 'application/pdf',
+                         chunk_size: int = 64 * 1024) -> HttpResponse:
+    """
+    Serve a file with support for conditional requests and single byte-range requests.
+
+    :param request: The HTTP request, possibly carrying Range, If-Range and If-None-Match headers.
+    :param path: Path of the file to serve.
+    :param etag: Strong ETag of the file, without quotes.
+    :param filename: File name offered to the client.
+    :param content_type: MIME type of the file.
+    :param chunk_size: Size of the blocks the file is streamed in.
+    :return: A 200, 206, 304 or 416 response.
+    """
+    etag = f'"{etag}"'
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    size = path.stat().st_size
+    match = RANGE_PATTERN.match(request.headers.get('Range', '').replace(' ', ''))
+    if_range = request.headers.get('If-Range')
+    if match and (not if_range or if_range == etag):
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        elif last:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start, end = 0, -1
+        if start > end or start >= size:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        def read_range() -> Iterator[bytes]:
+            with open(path, 'rb') as file:
+                file.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    block = file.read(min(chunk_size, remaining))
+                    if not block:
+                        break
+                    remaining -= len(block)
+                    yield block
+
+        response = StreamingHttpResponse(read_range(), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
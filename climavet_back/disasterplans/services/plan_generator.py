@@ -1,11 +1,77 @@
-from typing import Dict, Any, List
-from disasterplans.models import DisasterPlan, DisasterType
-from ..data.disaster_protocols import DISASTER_PROTOCOLS
-from clinics.models import Clinic
+import json
+import re
+import unicodedata
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from django.db import transaction
+from disasterplans.models import DisasterPlan, DisasterProtocol, DisasterType
+from ..data.protocols import DISASTER_PROTOCOLS
+from .disaster_type_registry import DisasterTypeRegistry
+from ..signals import plans_bulk_changed
+from clinics.models import Clinic, RiskAssessment
+
+# Fields identifying a section entry given as a dictionary, in order of preference
+ENTRY_KEY_FIELDS = ['phone', 'name', 'item', 'task', 'step', 'title', 'text', 'description']
+
+
+def normalize_text(text: str) -> str:
+    """Case, accents, punctuation and repeated spaces removed, so trivially different wordings compare equal."""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^\w]+', ' ', text.casefold()).split())
+
+
+def entry_key(entry: Any) -> str:
+    """
+    Normalized identity of a plan section entry, used to spot the same step, contact or supply in several protocols.
+
+    :param entry: A section entry, either a string or a dictionary such as {'name': ..., 'phone': ...}.
+    :return: A key equal for entries that describe the same thing.
+    """
+    if isinstance(entry, dict):
+        for field in ENTRY_KEY_FIELDS:
+            value = entry.get(field)
+            if field == 'phone' and value not in (None, ''):
+                # The last ten digits, so "1-800-555-0100" and "(800) 555-0100" match;
+                # a phone without digits, such as "TBD", identifies nothing and the next field is used
+                digits = re.sub(r'\D', '', str(value))[-10:]
+                if digits:
+                    return 'phone:' + digits
+            elif value not in (None, ''):
+                return normalize_text(value)
+        return json.dumps(entry, sort_keys=True, default=str)
+    return normalize_text(entry)
+
 
 class DisasterPlanGenerator:
     """Service class responsible for generating disaster plans based on risk assessments and predefined protocols."""
 
+    # Hazard scores at or above this value get a plan when generating in batch (the HIGH risk band)
+    DEFAULT_THRESHOLD = 7
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def build_plan(clinic_id: int, disaster_type: DisasterType) -> DisasterPlan:
+        """
+        Build an unsaved disaster plan for a clinic that references the current protocol version of the disaster type's category.
+
+        :param clinic_id: The primary key of the clinic the plan is for.
+        :param disaster_type: The type of disaster the plan covers.
+        :return: An unsaved DisasterPlan instance.
+        :raises ValueError: If there is no protocol for the category of the disaster type.
+        """
+        protocol = DisasterProtocol.current(disaster_type.category)
+        if protocol is None:
+            raise ValueError(f"No protocol found for disaster type: {disaster_type.category}")
+
+        return DisasterPlan(
+            clinic_id=clinic_id,
+            name=f"{disaster_type.category} Preparedness Plan",
+            description=f"A comprehensive preparedness plan for {disaster_type.name.lower()}s.",
+            disaster_type=disaster_type,
+            common_regions=disaster_type.common_regions,
+            protocol=protocol,
+        )
+
     @staticmethod
     def generate_plan(clinic: Clinic, disaster_type: DisasterType, risk_assessment_data: Dict[str, Any]) -> DisasterPlan:
         """
@@ -16,27 +82,162 @@ class DisasterPlanGenerator:
         :param risk_assessment_data: The data from the risk assessment that will inform the plan generation.
         :return: A DisasterPlan instance with the generated plan details.
         """
-        # Fetch the protocol for the specified disaster type
-        protocol = DISASTER_PROTOCOLS.get(disaster_type.category)
-        
-        if not protocol:
-            raise ValueError(f"No protocol found for disaster type: {disaster_type.category}")
-        
         # Here you can add logic to customize the protocol based on the risk assessment data
         # For example, you might want to adjust preparation steps based on specific vulnerabilities identified in the assessment
-        
-        # Create and return the DisasterPlan instance
-        disaster_plan = DisasterPlan.objects.create(
-            clinic=clinic,
-            name=f"{disaster_type.category} Preparedness Plan",
-            description=f"A comprehensive preparedness plan for {disaster_type.name.lower()}s.",
-            disaster_type=disaster_type.category,
-            preparation_steps=protocol['preparation_steps'],
-            response_steps=protocol['response_steps'],
-            recovery_steps=protocol['recovery_steps'],
-            emergency_contacts=protocol['emergency_contacts'],
-            supplies_needed=protocol['supplies_needed'],
-            training_requirements=protocol['training_requirements']
+        disaster_plan = DisasterPlanGenerator.build_plan(clinic.id, disaster_type)
+        disaster_plan.save()
+        return disaster_plan
+
+    @staticmethod
+    def merge_sections(protocols: List[Tuple[str, DisasterProtocol]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Merge the sections of several protocols in a single pass, keeping one entry per normalized key.
+
+        Entries are returned as dictionaries with a 'hazards' list naming every category they came from; string
+        entries become {'text': ..., 'hazards': [...]}. When duplicates are dictionaries, missing fields are filled in
+        from later entries and the largest of two numeric values, such as a quantity, is kept.
+
+        :param protocols: (category, protocol version) tuples, highest priority first; earlier entries come first.
+        :return: A dictionary mapping each section name to its merged entries.
+        """
+        merged: Dict[str, Dict[str, Dict[str, Any]]] = {name: {} for name in DisasterProtocol.SECTIONS}
+        for category, protocol in protocols:
+            for name in DisasterProtocol.SECTIONS:
+                section = merged[name]
+                for entry in protocol.sections.get(name, []):
+                    key = entry_key(entry)
+                    current = section.get(key)
+                    if current is None:
+                        current = section[key] = dict(entry) if isinstance(entry, dict) else {'text': entry}
+                        current['hazards'] = []
+                    elif isinstance(entry, dict):
+                        for field, value in entry.items():
+                            if field not in current:
+                                current[field] = value
+                            elif (isinstance(value, (int, float)) and isinstance(current[field], (int, float))
+                                  and not isinstance(value, bool)):
+                                current[field] = max(current[field], value)
+                    if category not in current['hazards']:
+                        current['hazards'].append(category)
+        return {name: list(entries.values()) for name, entries in merged.items()}
+
+    @classmethod
+    def build_combined_plan(cls, clinic_id: int, disaster_types: List[DisasterType]) -> DisasterPlan:
+        """
+        Build one unsaved plan covering several hazards, with duplicate steps, contacts and supplies merged.
+
+        The plan references the protocol of the first disaster type, lists every category it covers in its hazards
+        field and the protocol version of each in hazard_protocols. Its sections are merged from those versions when
+        read, so ProtocolSync moves it to new versions like any other plan.
+
+        :param clinic_id: The primary key of the clinic the plan is for.
+        :param disaster_types: The disaster types to cover, highest priority first.
+        :return: An unsaved DisasterPlan instance.
+        :raises ValueError: If no disaster type is given or one of them has no protocol.
+        """
+        if not disaster_types:
+            raise ValueError("At least one disaster type is required")
+        protocols = []
+        for disaster_type in disaster_types:
+            protocol = DisasterProtocol.current(disaster_type.category)
+            if protocol is None:
+                raise ValueError(f"No protocol found for disaster type: {disaster_type.category}")
+            protocols.append((disaster_type.category, protocol))
+
+        categories = [category for category, _ in protocols]
+        common_regions = list(dict.fromkeys(
+            region for disaster_type in disaster_types for region in disaster_type.common_regions or []
+        ))
+        return DisasterPlan(
+            clinic_id=clinic_id,
+            name=f"Multi-Hazard Preparedness Plan ({', '.join(categories)})",
+            description=f"A combined preparedness plan for {', '.join(disaster_type.name.lower() for disaster_type in disaster_types)}.",
+            disaster_type=disaster_types[0],
+            common_regions=common_regions,
+            protocol=protocols[0][1],
+            hazards=categories,
+            hazard_protocols=[protocol.id for _, protocol in protocols],
         )
-        
-        return disaster_plan
\ No newline at end of file
+
+    @staticmethod
+    def hazard_disaster_types() -> List[Tuple[str, DisasterType]]:
+        """
+        Pair each RiskAssessment hazard field with the disaster type used to plan for it.
+
+        Hazards without a disaster type or without a protocol are left out.
+
+        :return: A list of (risk field, disaster type) tuples.
+        """
+        pairs = []
+        for field in RiskAssessment.RISK_FIELDS:
+            category = field[:-len('_risk')].upper()
+            disaster_types = DisasterTypeRegistry.for_category(category)
+            if disaster_types and category in DISASTER_PROTOCOLS:
+                pairs.append((field, disaster_types[0]))
+        return pairs
+
+    @classmethod
+    def generate_plans(cls, clinic_ids: Iterable[int], threshold: int = DEFAULT_THRESHOLD,
+                       skip_existing: bool = True, batch_size: Optional[int] = None,
+                       combined: bool = False) -> Dict[str, int]:
+        """
+        Generate plans for many clinics, one per hazard scored at or above the threshold in each clinic's latest risk assessment.
+
+        Clinics are processed in batches. Each batch reads its latest assessments and existing plans in one query each,
+        builds the plans in memory and writes them with a single bulk_create inside a transaction.
+
+        When skip_existing is set, a hazard already covered by any plan of the clinic, per-hazard or combined, gets no
+        new plan, and existing plans are never replaced. In combined mode only the uncovered hazards are merged, so
+        rerunning with a lower threshold adds a plan for the newly matched hazards alongside the existing combined plan.
+
+        :param clinic_ids: Ids of the clinics to generate plans for.
+        :param threshold: The lowest hazard score that gets a plan.
+        :param skip_existing: Whether to skip hazards a clinic already has a plan for, on its own or in a combined plan.
+        :param batch_size: Number of clinics processed per transaction.
+        :param combined: Give each clinic with several hazards above the threshold one combined plan, ordered by score, instead of one plan per hazard.
+        :return: A dictionary with the number of clinics processed, clinics without an assessment, plans created and combined plans among them.
+        """
+        batch_size = batch_size or cls.BATCH_SIZE
+        hazards = cls.hazard_disaster_types()
+        clinic_ids = sorted(set(clinic_ids))
+        summary = {'clinics': len(clinic_ids), 'clinics_without_assessment': 0, 'plans_created': 0, 'combined_plans': 0}
+
+        for start in range(0, len(clinic_ids), batch_size):
+            batch = clinic_ids[start:start + batch_size]
+            assessments = (
+                RiskAssessment.objects.filter(clinic_id__in=batch)
+                .latest_per_clinic()
+                .values('clinic_id', *RiskAssessment.RISK_FIELDS)
+            )
+            # Categories each clinic already has a plan for, whether a per-hazard plan or part of a combined one
+            covered: Dict[int, Set[str]] = {}
+            if skip_existing:
+                rows = DisasterPlan.objects.filter(clinic_id__in=batch).values_list('clinic_id', 'disaster_type__category', 'hazards')
+                for clinic_id, category, plan_hazards in rows:
+                    covered.setdefault(clinic_id, set()).update(plan_hazards or [category])
+
+            plans = []
+            assessed = 0
+            for assessment in assessments:
+                assessed += 1
+                clinic_id = assessment['clinic_id']
+                clinic_covered = covered.get(clinic_id, set())
+                matched = [
+                    (field, disaster_type) for field, disaster_type in hazards
+                    if assessment[field] >= threshold and disaster_type.category not in clinic_covered
+                ]
+                if combined and len(matched) > 1:
+                    matched.sort(key=lambda pair: -assessment[pair[0]])
+                    plans.append(cls.build_combined_plan(clinic_id, [disaster_type for _, disaster_type in matched]))
+                    summary['combined_plans'] += 1
+                    continue
+                for _, disaster_type in matched:
+                    plans.append(cls.build_plan(clinic_id, disaster_type))
+
+            with transaction.atomic():
+                DisasterPlan.objects.bulk_create(plans)
+            plans_bulk_changed.send(sender=DisasterPlan, plan_ids=[plan.pk for plan in plans])
+            summary['clinics_without_assessment'] += len(batch) - assessed
+            summary['plans_created'] += len(plans)
+
+        return summary
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from ..data.protocols import DISASTER_PROTOCOLS
+from .disaster_type_registry import DisasterTypeRegistry
+
+
+def render_json(data: Any) -> Tuple[bytes, str]:
+    """
+    Render data to compact JSON bytes together with a strong ETag derived from them.
+
+    :param data: JSON-serializable data.
+    :return: A tuple of (body, etag).
+    """
+    body = json.dumps(data, separators=(',', ':'), ensure_ascii=False, cls=DjangoJSONEncoder).encode('utf-8')
+    return body, '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def etag_response(request, body: bytes, etag: str) -> HttpResponse:
+    """
+    Serve pre-rendered JSON, answering 304 Not Modified when the client already has this version.
+
+    :param request: The HTTP request, possibly carrying an If-None-Match header.
+    :param body: The pre-rendered JSON body.
+    :param etag: The strong ETag of the body.
+    :return: A 200 response with the body, or an empty 304 response.
+    """
+    if_none_match = request.headers.get('If-None-Match', '')
+    client_etags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    if etag in client_etags or '*' in client_etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    return response
+
+
+class ProtocolResponseCache:
+    """
+    In-process cache of the rendered disaster protocol responses.
+
+    DISASTER_PROTOCOLS is static, so each template payload is rendered once, on its first request.
+    Responses that embed DisasterType metadata are rendered on first use and kept while the DisasterTypeRegistry version is unchanged.
+    """
+
+    _lock = threading.Lock()
+    _generated_version: Optional[str] = None
+    _generated: Dict[int, Tuple[bytes, str]] = {}
+    _template_list: Optional[Tuple[bytes, str]] = None
+    _templates: Dict[str, Tuple[bytes, str]] = {}
+
+    @classmethod
+    def template_list(cls) -> Tuple[bytes, str]:
+        """Rendered list of the protocol categories, as a tuple of (body, etag)."""
+        if cls._template_list is None:
+            cls._template_list = render_json({'templates': list(DISASTER_PROTOCOLS.keys())})
+        return cls._template_list
+
+    @classmethod
+    def template(cls, category: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Rendered protocol of a category, as returned by the disaster type templates endpoint.
+
+        :param category: A disaster category such as 'FLOOD'.
+        :return: A tuple of (body, etag), or None if there is no protocol for the category.
+        """
+        rendered = cls._templates.get(category)
+        if rendered is None:
+            protocol = DISASTER_PROTOCOLS.get(category)
+            if protocol is None:
+                return None
+            rendered = cls._templates[category] = render_json({'template': protocol})
+        return rendered
+
+    @classmethod
+    def generated_plan(cls, disaster_type_id: int) -> Optional[Tuple[bytes, str]]:
+        """
+        Rendered protocol of a disaster type with its metadata attached, as returned by the generate endpoint.
+
+        :param disaster_type_id: The primary key of the disaster type.
+        :return: A tuple of (body, etag), or None if the disaster type does not exist.
+        :raises KeyError: If there is no protocol for the category of the disaster type.
+        """
+        version = DisasterTypeRegistry.version()
+        if version != cls._generated_version:
+            with cls._lock:
+                cls._generated_version = version
+                cls._generated = {}
+        rendered = cls._generated.get(disaster_type_id)
+        if rendered is not None:
+            return rendered
+        info = DisasterTypeRegistry.info(disaster_type_id)
+        if info is None:
+            return None
+        protocol = DISASTER_PROTOCOLS[info['category']]
+        rendered = render_json({**protocol, 'disaster_type_info': info})
+        with cls._lock:
+            if cls._generated_version == version:
+                cls._generated[disaster_type_id] = rendered
+        return rendered
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._generated_version = None
+            cls._generated = {}
@@ -0,0 +1,116 @@
+from typing import Any, Dict, Iterable, List, Optional
+from django.db import transaction
+from disasterplans.models import DisasterPlan, DisasterProtocol
+from ..data.protocols import DISASTER_PROTOCOLS
+from ..signals import plans_bulk_changed
+
+
+class ProtocolSync:
+    """
+    Service class that brings plans up to date after an entry in DISASTER_PROTOCOLS is edited.
+
+    Each section of a protocol is hashed and compared with the versions plans were built from.
+    Plans referencing an outdated version, directly or among the versions merged into a combined plan, are moved to
+    the current one in batched UPDATEs; their overrides are left untouched,
+    so clinic edits survive and only the sections that changed in the protocol change for them.
+    """
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def changed_sections(old: DisasterProtocol, new: DisasterProtocol) -> List[str]:
+        """
+        Sections whose content differs between two protocol versions.
+
+        :param old: The version plans were built from.
+        :param new: The current version.
+        :return: The names of the changed sections.
+        """
+        old_hashes = old.section_hashes()
+        new_hashes = new.section_hashes()
+        return [name for name in DisasterProtocol.SECTIONS if old_hashes[name] != new_hashes[name]]
+
+    @staticmethod
+    def combined_members() -> Dict[int, List[int]]:
+        """
+        The protocol versions merged into each combined plan.
+
+        :return: A dictionary mapping combined plan ids to their hazard_protocols.
+        """
+        return dict(DisasterPlan.objects.exclude(hazard_protocols=[]).values_list('id', 'hazard_protocols').iterator())
+
+    @classmethod
+    def sync(cls, categories: Optional[Iterable[str]] = None, batch_size: Optional[int] = None,
+             dry_run: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Move plans built from outdated protocol versions to the current version of their category.
+
+        Combined plans are moved too: each outdated version among their hazard_protocols is replaced,
+        so their merged sections follow the protocol like those of a single-hazard plan.
+
+        :param categories: Categories to check, all protocols in DISASTER_PROTOCOLS by default.
+        :param batch_size: Number of plans updated per statement.
+        :param dry_run: Report the affected plans without updating them or recording a new protocol version.
+        :return: A dictionary mapping each category with stale plans to the current version, the changed sections per old version and the number of plans affected.
+        """
+        batch_size = batch_size or cls.BATCH_SIZE
+        report = {}
+        combined = None
+        for category in categories or DISASTER_PROTOCOLS.keys():
+            # A dry run only compares hashes, so contents never seen before are not recorded as a version
+            current = DisasterProtocol.peek_current(category) if dry_run else DisasterProtocol.current(category)
+            if current is None:
+                continue
+            outdated = {
+                protocol.id: protocol
+                for protocol in DisasterProtocol.objects.filter(category=category).exclude(content_hash=current.content_hash)
+            }
+            if not outdated:
+                continue
+
+            plans = DisasterPlan.objects.filter(protocol_id__in=outdated.keys(), hazard_protocols=[])
+            used = set(plans.values_list('protocol_id', flat=True).distinct())
+            if combined is None:
+                combined = cls.combined_members()
+            combined_ids = []
+            for plan_id, members in combined.items():
+                stale_members = outdated.keys() & set(members)
+                if stale_members:
+                    combined_ids.append(plan_id)
+                    used |= stale_members
+            if not used:
+                continue
+
+            affected = plans.count() + len(combined_ids)
+            if not dry_run:
+                affected = 0
+                while True:
+                    # Each round picks up plans still on an old version, so the loop ends when none are left
+                    ids = list(plans.order_by('id').values_list('id', flat=True)[:batch_size])
+                    if not ids:
+                        break
+                    with transaction.atomic():
+                        affected += DisasterPlan.objects.filter(id__in=ids).update(protocol=current)
+                    plans_bulk_changed.send(sender=DisasterPlan, plan_ids=ids)
+                for start in range(0, len(combined_ids), batch_size):
+                    ids = combined_ids[start:start + batch_size]
+                    with transaction.atomic():
+                        changed = list(DisasterPlan.objects.select_for_update().filter(id__in=ids).only('id', 'protocol', 'hazard_protocols'))
+                        for plan in changed:
+                            plan.hazard_protocols = [
+                                current.id if protocol_id in outdated else protocol_id for protocol_id in plan.hazard_protocols
+                            ]
+                            plan.protocol_id = plan.hazard_protocols[0]
+                            combined[plan.id] = plan.hazard_protocols
+                        DisasterPlan.objects.bulk_update(changed, ['protocol', 'hazard_protocols'])
+                    affected += len(changed)
+                    plans_bulk_changed.send(sender=DisasterPlan, plan_ids=ids)
+
+            report[category] = {
+                'version': current.version,
+                'changed_sections': {
+                    outdated[protocol_id].version: cls.changed_sections(outdated[protocol_id], current) for protocol_id in used
+                },
+                'plans_updated': affected,
+            }
+        return report
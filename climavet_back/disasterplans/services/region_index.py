@@ -0,0 +1,224 @@
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+from clinics.services.risk_scoring import RiskScoringEngine
+from ..data.protocols import DISASTER_PROTOCOLS
+from .disaster_type_registry import DisasterTypeRegistry
+
+
+def normalize(text: str) -> str:
+    """
+    Normalize a place name for matching: accents, dots and apostrophes removed, upper case, single spaces.
+
+    :param text: A place name such as "Québec" or "N.W.T.".
+    :return: The normalized name, such as "QUEBEC" or "NWT".
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r"[.'’]", '', text.upper())
+    return ' '.join(text.split())
+
+
+@dataclass
+class ParsedRegions:
+    provinces: Set[str] = field(default_factory=set)  # Province codes, such as 'QC'
+    regions: Set[str] = field(default_factory=set)  # Normalized sub-regions and cities, such as 'FRASER VALLEY'
+    terrain: Set[str] = field(default_factory=set)  # Normalized general terrain, such as 'COASTAL AREAS'
+
+
+class RegionParser:
+    """
+    Parses the free-text common_regions entries of disaster types into province codes, region tokens and terrain tokens.
+
+    Entries look like "Canada: Quebec (St. Lawrence River valley), Atlantic Canada (New Brunswick's Saint John River)"
+    or "General: River valleys, Coastal areas". Groups such as the Prairies expand to their provinces unless the
+    parenthesis names the provinces explicitly.
+    """
+
+    PROVINCE_NAMES = {
+        **{normalize(name): code for name, code in RiskScoringEngine.PROVINCE_ALIASES.items()},
+        **{code: code for code in RiskScoringEngine.PROVINCES},
+        'NORTHWEST TERRITORY': 'NT', 'NWT': 'NT', 'PRINCE EDWARD': 'PE', 'PEI': 'PE',
+    }
+    GROUPS = {
+        'ATLANTIC CANADA': {'NB', 'NS', 'PE', 'NL'},
+        'MARITIMES': {'NB', 'NS', 'PE'},
+        'PRAIRIES': {'AB', 'SK', 'MB'},
+        'ARCTIC': {'NT', 'NU', 'YT'},
+        'ARCTIC COAST': {'NT', 'NU', 'YT'},
+        'TERRITORIES': {'NT', 'NU', 'YT'},
+    }
+    QUALIFIERS = {'NORTHERN', 'SOUTHERN', 'EASTERN', 'WESTERN', 'CENTRAL', 'COASTAL', 'INTERIOR'}
+    FILLER = re.compile(r'^(?:(?:AND|OR|THE|OCCASIONALLY|INCREASINGLY|EG|INCLUDING)(?: |$))+')
+
+    @staticmethod
+    def split_top_level(text: str) -> List[str]:
+        """Split on commas that are not inside parentheses."""
+        parts, depth, current = [], 0, ''
+        for char in text:
+            depth += char == '('
+            depth -= char == ')'
+            if char == ',' and depth == 0:
+                parts.append(current)
+                current = ''
+            else:
+                current += char
+        parts.append(current)
+        return parts
+
+    @classmethod
+    def resolve(cls, name: str) -> Optional[FrozenSet[str]]:
+        """
+        Province codes a normalized name refers to, with qualifiers such as "Southern" ignored.
+
+        :param name: A normalized name.
+        :return: A set of province codes, or None if the name is not a province or group.
+        """
+        name = cls.FILLER.sub('', name).strip()
+        words = name.split()
+        if words and words[0] in cls.QUALIFIERS and len(words) > 1:
+            name = ' '.join(words[1:])
+        if name in cls.PROVINCE_NAMES:
+            return frozenset([cls.PROVINCE_NAMES[name]])
+        if name in cls.GROUPS:
+            return frozenset(cls.GROUPS[name])
+        return None
+
+    @classmethod
+    def parse(cls, entries: Iterable[str]) -> ParsedRegions:
+        """
+        Parse a common_regions list.
+
+        :param entries: The region strings of a disaster type or protocol.
+        :return: The provinces, regions and terrain the entries mention.
+        """
+        parsed = ParsedRegions()
+        for entry in entries:
+            label, _, body = entry.rpartition(':')
+            if 'GENERAL' in normalize(label) or not label and not cls.mentions_province(body):
+                parsed.terrain.update(normalize(part) for part in body.split(',') if part.strip())
+                continue
+            for segment in cls.split_top_level(body):
+                cls.parse_segment(segment, parsed)
+        return parsed
+
+    @classmethod
+    def mentions_province(cls, text: str) -> bool:
+        return any(cls.resolve(normalize(part)) for part in re.split(r'[,/()]| and ', text))
+
+    @classmethod
+    def parse_segment(cls, segment: str, parsed: ParsedRegions):
+        main, _, inner = segment.partition('(')
+        inner = inner.rsplit(')', 1)[0]
+
+        provinces: Set[str] = set()
+        regions: Set[str] = set()
+        for piece in re.split(r'/| and ', main):
+            name = cls.FILLER.sub('', normalize(piece)).strip()
+            if not name:
+                continue
+            codes = cls.resolve(name)
+            if codes:
+                provinces |= codes
+                if name.split()[0] in cls.QUALIFIERS:
+                    regions.add(name)
+            else:
+                regions.add(name)
+
+        # A parenthesis either names the provinces of a group more precisely, or lists places within the provinces
+        inner_provinces: Set[str] = set()
+        for piece in re.split(r'[,/]', inner):
+            name = cls.FILLER.sub('', normalize(piece)).strip()
+            if not name:
+                continue
+            codes = cls.resolve(name)
+            if codes:
+                inner_provinces |= codes
+            else:
+                regions.add(name)
+        if inner_provinces:
+            provinces = provinces | inner_provinces if len(provinces) == 1 else inner_provinces
+
+        if provinces:
+            parsed.provinces |= provinces
+            parsed.regions |= regions
+
+
+class RegionHazardIndex:
+    """
+    In-memory inverted index from provinces, regions and cities to the disaster types that commonly affect them.
+
+    Built from the common_regions of every disaster type and of its category's protocol; plans copy their
+    common_regions from their disaster type, so they are covered too. The index is rebuilt when the
+    DisasterTypeRegistry version changes, and lookups are dictionary reads.
+    """
+
+    _lock = threading.Lock()
+    _version: Optional[str] = None
+    _by_province: Dict[str, FrozenSet[int]] = {}
+    _by_region: Dict[str, FrozenSet[int]] = {}
+
+    @classmethod
+    def _ensure_built(cls):
+        version = DisasterTypeRegistry.version()
+        if version == cls._version:
+            return
+        by_province: Dict[str, Set[int]] = {}
+        by_region: Dict[str, Set[int]] = {}
+        for disaster_type in DisasterTypeRegistry.all():
+            protocol = DISASTER_PROTOCOLS.get(disaster_type.category, {})
+            parsed = RegionParser.parse(list(disaster_type.common_regions or []) + list(protocol.get('common_regions', [])))
+            for province in parsed.provinces:
+                by_province.setdefault(province, set()).add(disaster_type.id)
+            for region in parsed.regions:
+                by_region.setdefault(region, set()).add(disaster_type.id)
+        with cls._lock:
+            cls._by_province = {key: frozenset(ids) for key, ids in by_province.items()}
+            cls._by_region = {key: frozenset(ids) for key, ids in by_region.items()}
+            cls._version = version
+
+    @classmethod
+    def province_code(cls, province: str) -> Optional[str]:
+        codes = RegionParser.resolve(normalize(province or ''))
+        return next(iter(codes)) if codes and len(codes) == 1 else None
+
+    @classmethod
+    def for_province(cls, province: str) -> FrozenSet[int]:
+        """
+        Disaster types commonly affecting a province.
+
+        :param province: A province name or code, such as "Manitoba" or "MB".
+        :return: A set of DisasterType ids.
+        """
+        cls._ensure_built()
+        return cls._by_province.get(cls.province_code(province), frozenset())
+
+    @classmethod
+    def for_region(cls, region: str) -> FrozenSet[int]:
+        """
+        Disaster types whose regions mention a place, such as a city or valley.
+
+        :param region: A place name, such as "Calgary" or "Fraser Valley".
+        :return: A set of DisasterType ids.
+        """
+        cls._ensure_built()
+        return cls._by_region.get(normalize(region or ''), frozenset())
+
+    @classmethod
+    def suggest(cls, province: str, city: Optional[str] = None) -> Dict[int, List[str]]:
+        """
+        Disaster types relevant to a location, with the reasons each one matched.
+
+        :param province: The province of the location.
+        :param city: Optionally the city of the location.
+        :return: A dictionary mapping DisasterType ids to the list of matched keys, such as ['province', 'city'].
+        """
+        suggestions: Dict[int, List[str]] = {}
+        for disaster_type_id in cls.for_province(province):
+            suggestions.setdefault(disaster_type_id, []).append('province')
+        if city:
+            for disaster_type_id in cls.for_region(city):
+                suggestions.setdefault(disaster_type_id, []).append('city')
+        return suggestions
@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from .models import DisasterType
+from .services.disaster_type_registry import DisasterTypeRegistry
+from .services.protocol_cache import ProtocolResponseCache
+
+# Sent with plan_ids after plans are created or changed in bulk, which bypasses post_save
+plans_bulk_changed = Signal()
+
+
+@receiver(post_save, sender=DisasterType)
+@receiver(post_delete, sender=DisasterType)
+def invalidate_disaster_types(sender, **kwargs):
+    # Published after commit, so no process reloads the registry before the change is visible to it
+    transaction.on_commit(DisasterTypeRegistry.invalidate)
+    transaction.on_commit(ProtocolResponseCache.clear)
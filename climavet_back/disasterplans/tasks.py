@@ -0,0 +1,18 @@
+from django.urls import reverse
+from jobs.services.job_queue import task
+from .models import DisasterPlan
+from .services.pdf_generator import PlanPdfRenderer
+from .services.plan_generator import DisasterPlanGenerator
+
+
+@task('disasterplans.generate_plans')
+def generate_plans(clinic_ids, threshold=DisasterPlanGenerator.DEFAULT_THRESHOLD, combined=False):
+    return DisasterPlanGenerator.generate_plans(clinic_ids, threshold=threshold, combined=combined)
+
+
+@task('disasterplans.render_plan_pdf')
+def render_plan_pdf(plan_id):
+    # Renders into the PDF cache, so the download endpoint serves the file without rendering
+    plan = DisasterPlan.objects.select_related('clinic', 'disaster_type').get(id=plan_id)
+    _, digest = PlanPdfRenderer.get_pdf(plan)
+    return {'plan': plan_id, 'digest': digest, 'download_url': reverse('disasterplan-download-plan', args=[plan_id])}
@@ -1,3 +1,210 @@
-from django.test import TestCase
+from climavet_back.testing import TestCase
+import tempfile
+from datetime import date
+from unittest import mock
+from django.test import override_settings
+from clinics.models import Clinic, RiskAssessment
+from .data.protocols import DISASTER_PROTOCOLS
+from .models import DisasterPlan, DisasterProtocol, DisasterType
+from .services.pdf_generator import PlanPdfRenderer
+from .services.plan_generator import DisasterPlanGenerator, entry_key
+from .services.protocol_sync import ProtocolSync
+from .services.disaster_type_registry import DisasterTypeRegistry
 
 # Create your tests here.
+
+
+class DisasterProtocolCacheTests(TestCase):
+    def test_versions_are_cached_only_after_commit(self):
+        protocol = DisasterProtocol.current('FLOOD')
+        self.assertIsNotNone(protocol)
+        self.assertEqual(DisasterProtocol._current, {})
+        self.assertEqual(DisasterProtocol._by_id, {})
+
+    def test_committed_versions_are_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            protocol = DisasterProtocol.current('FLOOD')
+        self.assertIs(DisasterProtocol._current['FLOOD'], protocol)
+        self.assertIs(DisasterProtocol.cached(protocol.id), protocol)
+
+
+class DisasterTypeRegistryTests(TestCase):
+    def test_changes_are_published_after_commit(self):
+        DisasterTypeRegistry.all()
+        version = DisasterTypeRegistry.version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            created = DisasterType.objects.create(name='Coastal Flood', category='FLOOD')
+        self.assertEqual(DisasterTypeRegistry.version(), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(DisasterTypeRegistry.version(), version)
+        self.assertEqual(DisasterTypeRegistry.get(created.id), created)
+
+
+class SuggestTests(TestCase):
+    def test_non_numeric_clinic_is_rejected(self):
+        response = self.client.get('/api/disaster-plans/types/suggest/', {'clinic': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProtocolSyncTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        clinic = Clinic.objects.create(
+            name='Vancouver Vet', address='1 Main St', city='Vancouver', province='BC', postal_code='V0V 0V0',
+            clinic_type='PRIVATE', species_types='MIXED', service_types='GENERAL_VETERINARY_CARE',
+        )
+        old = DisasterProtocol.objects.create(category='FLOOD', version=1, content_hash='old', sections={'preparation_steps': ['Old step']})
+        disaster_type = DisasterType.objects.create(name='Coastal Flood', category='FLOOD')
+        self.plan = DisasterPlan.objects.create(clinic=clinic, name='Flood Plan', disaster_type=disaster_type, protocol=old)
+
+    def test_dry_run_records_no_protocol_version(self):
+        report = ProtocolSync.sync(['FLOOD'], dry_run=True)
+        self.assertEqual(report['FLOOD']['plans_updated'], 1)
+        self.assertEqual(report['FLOOD']['version'], 2)
+        self.assertEqual(DisasterProtocol.objects.count(), 1)
+        self.assertEqual(DisasterPlan.objects.get(id=self.plan.id).protocol.version, 1)
+
+    def test_sync_moves_plans_to_the_current_version(self):
+        report = ProtocolSync.sync(['FLOOD'])
+        self.assertEqual(report['FLOOD']['plans_updated'], 1)
+        self.assertEqual(DisasterPlan.objects.get(id=self.plan.id).protocol.version, 2)
+
+    def test_appending_to_a_protocol_section_is_saved(self):
+        self.plan.preparation_steps.append('Fill sandbags')
+        self.plan.response_steps  # Read but left unchanged, so not stored
+        self.plan.save()
+
+        plan = DisasterPlan.objects.get(id=self.plan.id)
+        self.assertEqual(plan.overrides, {'preparation_steps': ['Old step', 'Fill sandbags']})
+        self.assertEqual(plan.preparation_steps, ['Old step', 'Fill sandbags'])
+
+    def test_protocol_edits_reach_combined_plans(self):
+        wildfire = DisasterProtocol.current('WILDFIRE')
+        flood = self.plan.protocol
+        combined = DisasterPlanGenerator.build_combined_plan(self.plan.clinic_id, [
+            DisasterType.objects.create(name='Forest Fire', category='WILDFIRE'), self.plan.disaster_type,
+        ])
+        combined.hazard_protocols = [wildfire.id, flood.id]
+        combined.response_steps = ['Call the clinic owner']
+        combined.save()
+        self.assertEqual(combined.preparation_steps, [{'text': 'Old step', 'hazards': ['FLOOD']}])
+
+        with mock.patch.dict(DISASTER_PROTOCOLS['FLOOD'], {'preparation_steps': ['Move animals to higher ground']}):
+            report = ProtocolSync.sync(['FLOOD'])
+            current = DisasterProtocol.current('FLOOD')
+        self.assertEqual(report['FLOOD']['plans_updated'], 2)
+
+        combined = DisasterPlan.objects.get(id=combined.id)
+        self.assertEqual(combined.hazard_protocols, [wildfire.id, current.id])
+        self.assertEqual(combined.preparation_steps, [{'text': 'Move animals to higher ground', 'hazards': ['FLOOD']}])
+        self.assertEqual(combined.response_steps, ['Call the clinic owner'])
+
+
+class PlanGenerationTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.clinic = Clinic.objects.create(
+            name='Vancouver Vet', address='1 Main St', city='Vancouver', province='BC', postal_code='V0V 0V0',
+            clinic_type='PRIVATE', species_types='MIXED', service_types='GENERAL_VETERINARY_CARE',
+        )
+        RiskAssessment.objects.create(clinic=self.clinic, assessment_date=date(2026, 1, 1), flood_risk=9, wildfire_risk=8, heatwave_risk=5)
+
+    def categories(self):
+        return sorted(
+            '+'.join(sorted(plan.hazards)) if plan.hazards else plan.disaster_type.category
+            for plan in DisasterPlan.objects.filter(clinic=self.clinic).select_related('disaster_type')
+        )
+
+    def test_combined_run_skips_hazards_with_per_hazard_plans(self):
+        DisasterPlanGenerator.generate_plans([self.clinic.id], threshold=7)
+        summary = DisasterPlanGenerator.generate_plans([self.clinic.id], threshold=7, combined=True)
+        self.assertEqual(summary['plans_created'], 0)
+        self.assertEqual(self.categories(), ['FLOOD', 'WILDFIRE'])
+
+    def test_rerun_with_a_lower_threshold_only_adds_the_new_hazards(self):
+        DisasterPlanGenerator.generate_plans([self.clinic.id], threshold=7, combined=True)
+        self.assertEqual(DisasterPlanGenerator.generate_plans([self.clinic.id], threshold=7, combined=True)['plans_created'], 0)
+
+        summary = DisasterPlanGenerator.generate_plans([self.clinic.id], threshold=4, combined=True)
+        self.assertEqual((summary['plans_created'], summary['combined_plans']), (1, 0))
+        self.assertEqual(self.categories(), ['FLOOD+WILDFIRE', 'HEATWAVE'])
+
+
+class EntryKeyTests(TestCase):
+    def test_phones_match_on_their_last_ten_digits(self):
+        self.assertEqual(entry_key({'name': 'Vet', 'phone': '1-800-555-0100'}), entry_key({'phone': '(800) 555-0100'}))
+
+    def test_phone_without_digits_falls_back_to_the_next_field(self):
+        self.assertEqual(entry_key({'name': 'Poison Control', 'phone': 'TBD'}), 'poison control')
+        self.assertNotEqual(entry_key({'name': 'Poison Control', 'phone': 'TBD'}), entry_key({'name': 'Fire Department', 'phone': 'N/A'}))
+
+
+class PlanDownloadTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        clinic = Clinic.objects.create(
+            name='Vancouver Vet', address='1 Main St', city='Vancouver', province='BC', postal_code='V0V 0V0',
+            clinic_type='PRIVATE', species_types='MIXED', service_types='GENERAL_VETERINARY_CARE',
+        )
+        disaster_type = DisasterType.objects.create(name='Coastal Flood', category='FLOOD')
+        self.plan = DisasterPlan.objects.create(clinic=clinic, name='Flood Plan', disaster_type=disaster_type)
+        self.url = f'/api/disaster-plans/plans/{self.plan.id}/download/'
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache_override = override_settings(PLAN_PDF_CACHE_DIR=cache_dir.name)
+        cache_override.enable()
+        self.addCleanup(cache_override.disable)
+
+    def download(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_full_download(self):
+        response, body = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(body.startswith(b'%PDF'))
+        self.assertEqual(int(response['Content-Length']), len(body))
+
+    def test_byte_ranges(self):
+        _, document = self.download()
+        size = len(document)
+
+        response, body = self.download(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{size}')
+        self.assertEqual(body, document[10:20])
+
+        response, body = self.download(Range='bytes=-16')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes {size - 16}-{size - 1}/{size}')
+        self.assertEqual(body, document[-16:])
+
+        response, _ = self.download(Range=f'bytes={size}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{size}')
+
+    def test_conditional_requests(self):
+        response, document = self.download()
+        etag = response['ETag']
+
+        self.assertEqual(self.download(**{'If-None-Match': etag})[0].status_code, 304)
+        response, body = self.download(Range='bytes=0-9', **{'If-Range': etag})
+        self.assertEqual((response.status_code, body), (206, document[:10]))
+        response, body = self.download(Range='bytes=0-9', **{'If-Range': '"outdated"'})
+        self.assertEqual((response.status_code, body), (200, document))
+
+    def test_unchanged_plans_are_not_rendered_again(self):
+        with mock.patch.object(PlanPdfRenderer, 'render', wraps=PlanPdfRenderer.render) as render:
+            first, _ = self.download()
+            second, _ = self.download()
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+        self.plan.description = 'Updated'
+        self.plan.save()
+        self.assertNotEqual(self.download()[0]['ETag'], first['ETag'])
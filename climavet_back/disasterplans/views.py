@@ -1,19 +1,26 @@
 from django.shortcuts import render
+from django.utils.text import slugify
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import DisasterPlan, DisasterType
 from .services.plan_generator import DisasterPlanGenerator
-from datetime import datetime
 from .serializers import DisasterPlanSerializer, DisasterTypeSerializer
 from clinics.models import Clinic
-from .data.disaster_protocols import DISASTER_PROTOCOLS
+from .data.protocols import DISASTER_PROTOCOLS
+from climavet_back.pagination import IdCursorPagination
+from .services.protocol_cache import ProtocolResponseCache, etag_response
+from .services.disaster_type_registry import DisasterTypeRegistry
+from .services.pdf_generator import PlanPdfRenderer, ranged_file_response
+from .services.region_index import RegionHazardIndex
+from jobs.services.job_queue import JobQueue, accepted_response, queue_refusal, wants_async
 
 # Create your views here.
 class DisasterPlanViewSet(viewsets.ModelViewSet):
     queryset = DisasterPlan.objects.all()
     serializer_class = DisasterPlanSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]  # Adjust permissions as needed
+    pagination_class = IdCursorPagination
 
     def get_queryset(self):
         """
@@ -42,9 +49,8 @@ class DisasterPlanViewSet(viewsets.ModelViewSet):
         """
         data = request.data
         disaster_type_id = data.get('disaster_type')
-        try:
-            disaster_type = DisasterType.objects.get(id=disaster_type_id)
-        except DisasterType.DoesNotExist:
+        disaster_type = DisasterTypeRegistry.get(disaster_type_id)
+        if disaster_type is None:
             return Response({'error': 'Disaster Type not found'}, status=status.HTTP_404_NOT_FOUND)
         try:
             protocol = DISASTER_PROTOCOLS.get(disaster_type.category)
@@ -75,36 +81,22 @@ class DisasterPlanViewSet(viewsets.ModelViewSet):
             # Convert to integer if it's a string
             if isinstance(disaster_type_id, str):
                 disaster_type_id = int(disaster_type_id)
-                
-            disaster_type_obj = DisasterType.objects.get(id=disaster_type_id)
-            
-            # Get protocol using the category
-            protocol = DISASTER_PROTOCOLS.get(disaster_type_obj.category)
-            
-            if not protocol:
+
+            # Protocol and disaster type metadata are served pre-rendered, keyed on the DisasterTypeRegistry version
+            rendered = ProtocolResponseCache.generated_plan(disaster_type_id)
+            if rendered is None:
                 return Response(
-                    {'error': f'No protocol found for disaster category: {disaster_type_obj.category}'}, 
+                    {'error': f'Disaster Type with id {disaster_type_id} not found'}, 
                     status=status.HTTP_404_NOT_FOUND
                 )
-            
-            # Add metadata to the response
-            response_data = protocol.copy()
-            response_data['created_at'] = datetime.now().isoformat()
-            response_data['disaster_type_info'] = {
-                'id': disaster_type_obj.id,
-                'name': disaster_type_obj.name,
-                'category': disaster_type_obj.category,
-                'description': disaster_type_obj.description
-            }
-            
-            return Response(response_data, status=status.HTTP_200_OK)
-            
-        except DisasterType.DoesNotExist:
+            return etag_response(request, *rendered)
+
+        except KeyError as e:
             return Response(
-                {'error': f'Disaster Type with id {disaster_type_id} not found'}, 
+                {'error': f'No protocol found for disaster category: {e.args[0]}'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
-        except ValueError:
+        except (TypeError, ValueError):
             return Response(
                 {'error': 'Invalid disaster_type ID format'}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -116,6 +108,41 @@ class DisasterPlanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+    @action(detail=False, methods=['post'], url_path='generate-batch')
+    def generate_batch(self, request):
+        """
+        Generate plans for many clinics at once, one per hazard scored at or above a threshold in each clinic's latest risk assessment.
+
+        :param request: The HTTP request containing either a list of clinic IDs or a province, and optionally a threshold, a combined flag for one multi-hazard plan per clinic, and an async flag.
+        :return: A response summarizing the number of clinics processed and plans created, or 202 with a job id when queued.
+        """
+        clinic_ids = request.data.get('clinic_ids')
+        province = request.data.get('province')
+        if not clinic_ids and not province:
+            return Response({'error': 'clinic_ids or province is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            threshold = int(request.data.get('threshold', DisasterPlanGenerator.DEFAULT_THRESHOLD))
+            if clinic_ids:
+                clinic_ids = [int(clinic_id) for clinic_id in clinic_ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'clinic_ids and threshold must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        clinics = Clinic.objects.all()
+        if clinic_ids:
+            clinics = clinics.filter(id__in=clinic_ids)
+        if province:
+            clinics = clinics.filter(province=province)
+        clinic_ids = list(clinics.values_list('id', flat=True))
+        combined = str(request.data.get('combined', '')).lower() in ('1', 'true', 'yes')
+        if wants_async(request):
+            refused = queue_refusal(request)
+            if refused is not None:
+                return refused
+            job = JobQueue.enqueue('disasterplans.generate_plans', request.user, clinic_ids=clinic_ids, threshold=threshold, combined=combined)
+            return accepted_response(request, job)
+        summary = DisasterPlanGenerator.generate_plans(clinic_ids, threshold=threshold, combined=combined)
+        return Response(summary, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['get'], url_path='templates')
     def templates(self, request):
         """
@@ -124,20 +151,27 @@ class DisasterPlanViewSet(viewsets.ModelViewSet):
         :param request: The HTTP request.
         :return: A response containing a list of disaster plan templates.
         """
-        # Logic to retrieve and return disaster plan templates goes here
-        return Response({'templates': list(DISASTER_PROTOCOLS.keys())})
+        return etag_response(request, *ProtocolResponseCache.template_list())
     
-    @action(detail=True, methods=['get'], url_path='download')
+    @action(detail=True, methods=['get', 'post'], url_path='download')
     def download_plan(self, request, pk=None):
         """
         Download the disaster plan as a PDF.
 
-        :param request: The HTTP request.
+        :param request: The HTTP request; rendering can only be queued with an authenticated POST.
         :param pk: The primary key of the disaster plan to download.
-        :return: A response containing the PDF file.
+        :return: A response containing the PDF file, or the requested byte range of it, or 202 with a job id when rendering is queued.
         """
-        # PDF generation logic goes here
-        pass
+        plan = self.get_object()
+        if wants_async(request):
+            refused = queue_refusal(request)
+            if refused is not None:
+                return refused
+            job = JobQueue.enqueue('disasterplans.render_plan_pdf', request.user, plan_id=plan.id)
+            return accepted_response(request, job)
+        path, digest = PlanPdfRenderer.get_pdf(plan)
+        filename = f"{slugify(plan.name) or 'disaster-plan'}-{plan.id}.pdf"
+        return ranged_file_response(request, path, digest, filename)
         
 class DisasterTypeViewSet(viewsets.ModelViewSet):
     queryset = DisasterType.objects.all()
@@ -152,8 +186,39 @@ class DisasterTypeViewSet(viewsets.ModelViewSet):
         :param request: The HTTP request.
         :return: A response containing a list of unique disaster categories.
         """
-        categories = DisasterType.objects.values_list('category', flat=True).distinct()
+        categories = DisasterTypeRegistry.categories()
         return Response({'categories': categories})
+
+    @action(detail=False, methods=['get'], url_path='suggest')
+    def suggest(self, request):
+        """
+        Suggest the disaster types relevant to a clinic, or to a province and city, from their common regions.
+
+        :param request: The HTTP request with either a clinic ID or a province and optional city.
+        :return: A response containing the suggested disaster types and what each one matched on.
+        """
+        clinic_id = request.query_params.get('clinic')
+        province = request.query_params.get('province')
+        city = request.query_params.get('city')
+        if clinic_id:
+            try:
+                clinic_id = int(clinic_id)
+            except ValueError:
+                return Response({'error': 'Invalid clinic ID format'}, status=status.HTTP_400_BAD_REQUEST)
+            clinic = Clinic.objects.filter(id=clinic_id).values('province', 'city').first()
+            if clinic is None:
+                return Response({'error': 'Clinic not found'}, status=status.HTTP_404_NOT_FOUND)
+            province, city = clinic['province'], clinic['city']
+        if not province:
+            return Response({'error': 'clinic or province is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        suggestions = RegionHazardIndex.suggest(province, city)
+        results = []
+        for disaster_type_id, matched_on in sorted(suggestions.items()):
+            data = DisasterTypeSerializer(DisasterTypeRegistry.get(disaster_type_id)).data
+            data['matched_on'] = matched_on
+            results.append(data)
+        return Response({'province': province, 'city': city, 'disaster_types': results})
     
     @action(detail=True, methods=['get'], url_path='templates')
     def templates(self, request, pk=None):
@@ -164,11 +229,10 @@ class DisasterTypeViewSet(viewsets.ModelViewSet):
         :param pk: The primary key of the disaster type.
         :return: A response containing templates for the specified disaster type.
         """
-        try:
-            disaster_type = self.get_object()
-            template = DISASTER_PROTOCOLS.get(disaster_type.category)
-            if not template:
-                return Response({'error': 'No template available for this disaster type'}, status=status.HTTP_404_NOT_FOUND)
-            return Response({'template': template})
-        except DisasterType.DoesNotExist:
-            return Response({'error': 'Disaster type not found'}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        info = DisasterTypeRegistry.info(pk)
+        if info is None:
+            return Response({'error': 'Disaster type not found'}, status=status.HTTP_404_NOT_FOUND)
+        rendered = ProtocolResponseCache.template(info['category'])
+        if not rendered:
+            return Response({'error': 'No template available for this disaster type'}, status=status.HTTP_404_NOT_FOUND)
+        return etag_response(request, *rendered)
\ No newline at end of file
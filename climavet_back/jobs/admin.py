@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Job
+
+# Register your models here.
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'worker', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    readonly_fields = ['status', 'result', 'error', 'attempts', 'worker', 'created_at', 'started_at', 'heartbeat_at', 'finished_at']
@@ -0,0 +1,96 @@
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from jobs.services.job_queue import JobQueue, execute_job
+
+
+def _init_process():
+    # Worker processes started with the spawn method need their own app registry
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs with a pool of worker threads or processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Number of jobs run concurrently.")
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread', help="Run jobs in threads or in separate processes.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to wait before checking an empty queue again.")
+        parser.add_argument('--lease', type=int, default=60, help="Seconds a running job stays claimed without a heartbeat before any worker requeues it.")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty instead of waiting for new jobs.")
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        if options['lease'] <= 0:
+            raise CommandError("--lease must be a positive number of seconds")
+        lease = timedelta(seconds=options['lease'])
+        # Leases are renewed several times per lease, so one slow poll does not lose a job
+        heartbeat_interval = options['lease'] / 3
+
+        if options['pool'] == 'process':
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self.stdout.write(f"Worker {worker_id} running up to {workers} job(s) in a {options['pool']} pool")
+
+        running = {}  # future -> job id
+        last_heartbeat = 0.0
+        workers_started = False
+        try:
+            while True:
+                finished = {future for future in running if future.done()}
+                for future in finished:
+                    del running[future]
+                    self.report(future)
+
+                if time.monotonic() - last_heartbeat >= heartbeat_interval:
+                    last_heartbeat = time.monotonic()
+                    JobQueue.heartbeat(worker_id, running.values())
+                    requeued, failed = JobQueue.requeue_stale(lease)
+                    if requeued:
+                        self.stdout.write(f"Requeued {requeued} abandoned job(s)")
+                    if failed:
+                        self.stdout.write(self.style.ERROR(f"Failed {failed} job(s) abandoned {JobQueue.MAX_ATTEMPTS} times"))
+
+                claimed = False
+                while len(running) < workers:
+                    job = JobQueue.claim(worker_id)
+                    if job is None:
+                        break
+                    claimed = True
+                    if options['pool'] == 'process' and not workers_started:
+                        # Worker processes are forked on the first submit, and must not share the connection
+                        # used to claim the job; the parent reconnects on its next query
+                        connections.close_all()
+                        workers_started = True
+                    running[executor.submit(execute_job, job.pk, worker_id)] = job.pk
+
+                if claimed:
+                    continue
+                if running:
+                    wait(running, timeout=min(options['poll_interval'], heartbeat_interval), return_when=FIRST_COMPLETED)
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(f"Stopping, waiting for {len(running)} running job(s)")
+        finally:
+            executor.shutdown(wait=True)
+            for future in running:
+                self.report(future)
+
+    def report(self, future):
+        try:
+            job_id, job_status = future.result()
+        except Exception as e:
+            self.stderr.write(f"Worker failed: {e}")
+            return
+        style = self.style.SUCCESS if job_status == 'COMPLETED' else self.style.ERROR
+        self.stdout.write(style(f"Job {job_id} {job_status.lower()}"))
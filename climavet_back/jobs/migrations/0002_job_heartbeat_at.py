@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:53
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_leases(apps, schema_editor):
+    # Jobs already running count as alive since they were started
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.filter(status='RUNNING').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_leases, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+# Create your models here.
+
+class Job(models.Model):
+    # A unit of background work, executed by the run_jobs management command.
+    # Workers claim pending jobs with a conditional UPDATE, so several workers can share the table.
+    # A worker renews heartbeat_at of its running jobs; a job whose heartbeat is older than the lease is requeued.
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    task = models.CharField(max_length=100)  # Name of a task registered with jobs.services.job_queue.task
+    kwargs = models.JSONField(default=dict, blank=True)  # Keyword arguments passed to the task
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    result = models.JSONField(blank=True, null=True)  # Return value of the task
+    error = models.TextField(blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=255, blank=True, null=True)  # Worker that claimed the job
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)  # Last time the claiming worker reported the job alive
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
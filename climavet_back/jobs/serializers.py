@@ -0,0 +1,7 @@
+from .models import Job
+from rest_framework import serializers
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'task', 'status', 'result', 'error', 'attempts', 'created_at', 'started_at', 'finished_at']
@@ -0,0 +1,175 @@
+import traceback
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from django.db import connection
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from jobs.models import Job
+
+# Task name -> callable, filled by the @task decorator in each app's tasks module
+TASKS: Dict[str, Callable[..., Any]] = {}
+
+
+def task(name: str):
+    """
+    Register a function as a background task.
+
+    The function receives the job's kwargs and must return a JSON-serializable result.
+
+    :param name: Unique task name, conventionally '<app>.<action>'.
+    :return: A decorator that registers the function and returns it unchanged.
+    """
+    def register(function):
+        TASKS[name] = function
+        return function
+    return register
+
+
+def wants_async(request) -> bool:
+    """
+    Whether a client asked for a generation request to be queued, with ?async=1 or "async": true in the body.
+
+    :param request: The DRF request.
+    :return: True if the work should be queued.
+    """
+    value = request.query_params.get('async')
+    if value is None and hasattr(request.data, 'get'):
+        value = request.data.get('async')
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def queue_refusal(request) -> Optional[Response]:
+    """
+    Error response for a request that may not queue a job, or None if it may.
+
+    Only authenticated users can read a job's status, and reads must not create work, so queuing requires
+    an authenticated POST.
+
+    :param request: The DRF request that asked for the work to be queued.
+    :return: A 400 or 403 response, or None.
+    """
+    if request.method in SAFE_METHODS:
+        return Response({'error': 'Jobs can only be queued with a POST request'}, status=status.HTTP_400_BAD_REQUEST)
+    if not request.user or not request.user.is_authenticated:
+        return Response({'error': 'Authentication is required to queue a job'}, status=status.HTTP_403_FORBIDDEN)
+    return None
+
+
+def accepted_response(request, job: Job) -> Response:
+    """
+    202 Accepted response pointing the client at the status endpoint of a queued job.
+
+    :param request: The DRF request.
+    :param job: The queued job.
+    :return: A response with the job id, its status and the URL to poll.
+    """
+    status_url = request.build_absolute_uri(reverse('job-detail', args=[job.pk]))
+    response = Response({'job_id': job.pk, 'status': job.status, 'status_url': status_url}, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = status_url
+    return response
+
+
+class JobQueue:
+    """Service class for queueing background jobs and claiming them from workers."""
+
+    MAX_ATTEMPTS = 3  # Claims of a job before one more abandoned run fails it instead of requeueing it
+
+    @staticmethod
+    def enqueue(name: str, created_by=None, **kwargs) -> Job:
+        """
+        Queue a registered task.
+
+        :param name: The task name.
+        :param created_by: The user who requested the work, if authenticated.
+        :param kwargs: JSON-serializable keyword arguments for the task.
+        :return: The pending Job.
+        :raises ValueError: If no task is registered under the name.
+        """
+        if name not in TASKS:
+            raise ValueError(f"Unknown task: {name}")
+        if created_by is not None and not created_by.is_authenticated:
+            created_by = None
+        return Job.objects.create(task=name, kwargs=kwargs, created_by=created_by)
+
+    @staticmethod
+    def claim(worker: str) -> Optional[Job]:
+        """
+        Claim the oldest pending job for a worker.
+
+        The claim is a conditional UPDATE on the job's status, so when several workers race for the
+        same job exactly one of them wins and the others move on to the next one.
+
+        :param worker: Identifier of the claiming worker.
+        :return: The claimed job, now RUNNING, or None if the queue is empty.
+        """
+        while True:
+            job_id = Job.objects.filter(status='PENDING').order_by('id').values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            now = timezone.now()
+            claimed = Job.objects.filter(id=job_id, status='PENDING').update(
+                status='RUNNING', worker=worker, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1
+            )
+            if claimed:
+                return Job.objects.get(id=job_id)
+
+    @staticmethod
+    def heartbeat(worker: str, job_ids: Iterable[int]) -> int:
+        """
+        Renew the lease of the jobs a worker is still running.
+
+        :param worker: Identifier of the worker.
+        :param job_ids: The primary keys of its running jobs.
+        :return: The number of jobs renewed.
+        """
+        return Job.objects.filter(id__in=list(job_ids), status='RUNNING', worker=worker).update(heartbeat_at=timezone.now())
+
+    @staticmethod
+    def requeue_stale(lease: timedelta) -> Tuple[int, int]:
+        """
+        Return jobs whose worker stopped sending heartbeats to the queue.
+
+        A job is considered abandoned once its last heartbeat is older than the lease, however long it has been
+        running, so long jobs of a live worker are never requeued. A job abandoned MAX_ATTEMPTS times, which
+        usually means it takes its worker down with it, is failed instead of being claimed again.
+
+        :param lease: How long a job stays claimed without a heartbeat.
+        :return: A tuple of (jobs requeued, jobs failed).
+        """
+        now = timezone.now()
+        stale = Job.objects.filter(status='RUNNING', heartbeat_at__lt=now - lease)
+        failed = stale.filter(attempts__gte=JobQueue.MAX_ATTEMPTS).update(
+            status='FAILED', heartbeat_at=None, finished_at=now,
+            error=f"Abandoned by its worker {JobQueue.MAX_ATTEMPTS} times",
+        )
+        requeued = stale.update(status='PENDING', worker=None, heartbeat_at=None)
+        return requeued, failed
+
+
+def execute_job(job_id: int, worker: str) -> Tuple[int, str]:
+    """
+    Run a claimed job and record its result. Runs inside worker threads or processes.
+
+    The result is only recorded while the job is still claimed by the worker; a job requeued because its
+    heartbeat lapsed belongs to whichever worker claimed it next.
+
+    :param job_id: The primary key of the job.
+    :param worker: Identifier of the worker that claimed the job.
+    :return: A tuple of (job id, final status), with the status 'LOST' if the job was no longer the worker's.
+    """
+    try:
+        job = Job.objects.get(id=job_id)
+        try:
+            result, job_status, error = TASKS[job.task](**job.kwargs), 'COMPLETED', None
+        except Exception:
+            result, job_status, error = None, 'FAILED', traceback.format_exc()
+        finished = Job.objects.filter(id=job_id, status='RUNNING', worker=worker).update(
+            status=job_status, result=result, error=error, finished_at=timezone.now()
+        )
+        return job_id, job_status if finished else 'LOST'
+    finally:
+        connection.close()
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from climavet_back.testing import TestCase
+from .models import Job
+from clinics.models import Clinic
+from disasterplans.models import DisasterPlan, DisasterType
+from .services.job_queue import JobQueue, execute_job, task
+
+# Create your tests here.
+
+
+@task('jobs.tests.echo')
+def echo(**kwargs):
+    return kwargs
+
+
+class JobStatusTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user('owner')
+        self.job = Job.objects.create(task='disasterplans.generate_plans', created_by=self.owner, result={'plans': [1]})
+        self.client = APIClient()
+
+    def test_anonymous_users_cannot_read_jobs(self):
+        self.assertIn(self.client.get(f'/api/jobs/{self.job.id}/').status_code, (401, 403))
+
+    def test_users_only_see_their_own_jobs(self):
+        self.client.force_authenticate(User.objects.create_user('other'))
+        self.assertEqual(self.client.get(f'/api/jobs/{self.job.id}/').status_code, 404)
+
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(f'/api/jobs/{self.job.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['result'], {'plans': [1]})
+
+    def test_staff_see_every_job(self):
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        self.assertEqual(self.client.get(f'/api/jobs/{self.job.id}/').status_code, 200)
+
+
+class JobLeaseTests(TestCase):
+    def test_only_jobs_without_a_recent_heartbeat_are_requeued(self):
+        long_ago = timezone.now() - timedelta(hours=5)
+        alive = Job.objects.create(task='a', status='RUNNING', worker='w1', started_at=long_ago, heartbeat_at=timezone.now())
+        dead = Job.objects.create(task='b', status='RUNNING', worker='w2', started_at=long_ago, heartbeat_at=long_ago)
+
+        self.assertEqual(JobQueue.requeue_stale(timedelta(minutes=1)), (1, 0))
+        self.assertEqual(Job.objects.get(id=alive.id).status, 'RUNNING')
+        self.assertEqual(Job.objects.get(id=dead.id).status, 'PENDING')
+
+    def test_heartbeat_renews_only_the_workers_own_jobs(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        mine = Job.objects.create(task='a', status='RUNNING', worker='w1', heartbeat_at=long_ago)
+        theirs = Job.objects.create(task='b', status='RUNNING', worker='w2', heartbeat_at=long_ago)
+
+        self.assertEqual(JobQueue.heartbeat('w1', [mine.id, theirs.id]), 1)
+        self.assertEqual(JobQueue.requeue_stale(timedelta(minutes=1)), (1, 0))
+        self.assertEqual(Job.objects.get(id=mine.id).status, 'RUNNING')
+
+    def test_jobs_abandoned_too_often_fail(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        retried = Job.objects.create(task='a', status='RUNNING', worker='w1', heartbeat_at=long_ago, attempts=1)
+        crashing = Job.objects.create(task='b', status='RUNNING', worker='w1', heartbeat_at=long_ago, attempts=JobQueue.MAX_ATTEMPTS)
+
+        self.assertEqual(JobQueue.requeue_stale(timedelta(minutes=1)), (1, 1))
+        self.assertEqual(Job.objects.get(id=retried.id).status, 'PENDING')
+        self.assertEqual(Job.objects.get(id=crashing.id).status, 'FAILED')
+
+
+class ExecuteJobTests(TestCase):
+    def test_the_claiming_worker_records_the_result(self):
+        Job.objects.create(task='jobs.tests.echo', kwargs={'value': 1})
+        job = JobQueue.claim('w1')
+
+        self.assertEqual(execute_job(job.id, 'w1'), (job.id, 'COMPLETED'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), ('COMPLETED', {'value': 1}))
+
+    def test_a_requeued_job_is_left_to_its_new_worker(self):
+        Job.objects.create(task='jobs.tests.echo', kwargs={'value': 1})
+        job = JobQueue.claim('w1')
+        Job.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        JobQueue.requeue_stale(timedelta(minutes=1))
+        JobQueue.claim('w2')
+
+        self.assertEqual(execute_job(job.id, 'w1'), (job.id, 'LOST'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.result), ('RUNNING', 'w2', None))
+
+
+class QueueRequestTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        clinic = Clinic.objects.create(
+            name='Vancouver Vet', address='1 Main St', city='Vancouver', province='BC', postal_code='V0V 0V0',
+            clinic_type='PRIVATE', species_types='MIXED', service_types='GENERAL_VETERINARY_CARE',
+        )
+        disaster_type = DisasterType.objects.create(name='Flood', category='FLOOD')
+        self.plan = DisasterPlan.objects.create(clinic=clinic, name='Flood Plan', disaster_type=disaster_type)
+        self.client = APIClient()
+
+    def test_anonymous_users_cannot_queue_jobs(self):
+        response = self.client.post('/api/resource-checklists/checklists/generate/', {
+            'clinic': self.plan.clinic_id, 'disaster_plan': self.plan.id, 'async': True,
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Job.objects.exists())
+
+    def test_jobs_are_never_queued_from_get(self):
+        self.client.force_authenticate(User.objects.create_user('owner'))
+        response = self.client.get(f'/api/disaster-plans/plans/{self.plan.id}/download/', {'async': '1'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+        response = self.client.post(f'/api/disaster-plans/plans/{self.plan.id}/download/?async=1')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get().task, 'disasterplans.render_plan_pdf')
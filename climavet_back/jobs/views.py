@@ -0,0 +1,18 @@
+from rest_framework import mixins, permissions, viewsets
+from .models import Job
+from .serializers import JobSerializer
+
+# Create your views here.
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Status of background jobs, polled by clients after a generation endpoint answered 202 Accepted.
+
+    Users only see the jobs they queued; staff see every job, including those queued anonymously.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Job.objects.all()
+        return Job.objects.filter(created_by=self.request.user)
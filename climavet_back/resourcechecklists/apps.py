@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ResourcechecklistsConfig(AppConfig):
     name = 'resourcechecklists'
+
+    def ready(self):
+        from . import signals  # noqa: F401
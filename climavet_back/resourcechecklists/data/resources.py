@@ -0,0 +1,4 @@
+from climavet_back.compiled_data import CompiledData
+
+# Loaded lazily from the compiled form of resource_database.py; import this instead of the source module.
+RESOURCE_DATABASE = CompiledData('resourcechecklists.data.resource_database', 'RESOURCE_DATABASE')
@@ -0,0 +1,44 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from disasterplans.models import DisasterPlan
+from resourcechecklists.models import ClinicResourceChecklist, ResourceChecklistItem
+from resourcechecklists.services.checklist_generator import ChecklistGenerator
+
+
+class Command(BaseCommand):
+    help = "Time checklist generation for existing plans and count its queries, against creating items one by one. The checklists created are deleted afterwards."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', type=int, default=100, help="Number of plans to generate a checklist for in each mode.")
+
+    def handle(self, *args, **options):
+        plans = list(DisasterPlan.objects.select_related('clinic').order_by('id')[:options['plans']])
+        if not plans:
+            raise CommandError("No disaster plans to generate checklists for.")
+        self.stdout.write(f"{'mode':<12}{'ms/checklist':>14}{'queries/checklist':>20}{'items':>8}")
+        for mode, generate in (('per-item', self.generate_per_item), ('bulk', ChecklistGenerator.generate_checklist)):
+            timings, queries, created = [], [], []
+            for plan in plans:
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    created.append(generate(plan.clinic, plan))
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries.append(len(captured))
+            items = ResourceChecklistItem.objects.filter(checklist__in=created).count()
+            self.stdout.write(
+                f"{mode:<12}{statistics.median(timings):>14.2f}{statistics.median(queries):>20.0f}{items // len(created):>8}"
+            )
+            ClinicResourceChecklist.objects.filter(id__in=[checklist.id for checklist in created]).delete()
+
+    @staticmethod
+    def generate_per_item(clinic, disaster_plan):
+        # The previous implementation: one autocommitted INSERT per item
+        checklist = ClinicResourceChecklist.objects.create(
+            clinic=clinic, disaster_plan=disaster_plan, name=f"{disaster_plan.name} Resource Checklist",
+        )
+        for item in ChecklistGenerator.items_for(ChecklistGenerator.plan_categories(disaster_plan)):
+            ResourceChecklistItem.objects.create(checklist=checklist, **item)
+        return checklist
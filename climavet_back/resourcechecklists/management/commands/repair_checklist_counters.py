@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from resourcechecklists.models import ClinicResourceChecklist
+
+
+class Command(BaseCommand):
+    help = "Recompute the item counters and completion percentage of every clinic checklist from its items."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Checklists recounted per query.")
+
+    def handle(self, *args, **options):
+        repaired = ClinicResourceChecklist.recount(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Repaired the counters of {repaired} checklist(s)."))
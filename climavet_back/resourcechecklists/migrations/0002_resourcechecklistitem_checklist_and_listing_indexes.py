@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0003_clinic_listing_indexes'),
+        ('disasterplans', '0004_disasterplan_listing_indexes'),
+        ('resourcechecklists', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resourcechecklistitem',
+            name='checklist',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='resourcechecklists.clinicresourcechecklist'),
+        ),
+        migrations.AddIndex(
+            model_name='clinicresourcechecklist',
+            index=models.Index(fields=['clinic', '-id'], name='checklist_clinic_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clinicresourcechecklist',
+            index=models.Index(fields=['disaster_plan', '-id'], name='checklist_plan_idx'),
+        ),
+    ]
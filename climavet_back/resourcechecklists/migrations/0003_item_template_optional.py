@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resourcechecklists', '0002_resourcechecklistitem_checklist_and_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resourcechecklistitem',
+            name='checklist_template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='resourcechecklists.checklisttemplate'),
+        ),
+    ]
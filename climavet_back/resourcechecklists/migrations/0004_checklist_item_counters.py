@@ -0,0 +1,77 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:41
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count
+
+STATUS_COUNTERS = {
+    'IN_STOCK': 'in_stock_count',
+    'LOW_STOCK': 'low_stock_count',
+    'OUT_OF_STOCK': 'out_of_stock_count',
+    'ORDERED': 'ordered_count',
+}
+
+
+def count_items(apps, schema_editor):
+    ClinicResourceChecklist = apps.get_model('resourcechecklists', 'ClinicResourceChecklist')
+    ResourceChecklistItem = apps.get_model('resourcechecklists', 'ResourceChecklistItem')
+    counts = {}
+    rows = (
+        ResourceChecklistItem.objects.filter(checklist__isnull=False)
+        .order_by().values('checklist_id', 'status').annotate(total=Count('id'))
+    )
+    for row in rows:
+        counters = counts.setdefault(row['checklist_id'], {})
+        counters['item_count'] = counters.get('item_count', 0) + row['total']
+        if row['status'] in STATUS_COUNTERS:
+            counters[STATUS_COUNTERS[row['status']]] = row['total']
+    # Every checklist is written, so those without items get 100.00 like ClinicResourceChecklist.percentage()
+    checklists = list(ClinicResourceChecklist.objects.all())
+    for checklist in checklists:
+        for field, value in counts.get(checklist.id, {}).items():
+            setattr(checklist, field, value)
+        total = checklist.item_count
+        checklist.completion_percentage = (
+            (Decimal(checklist.in_stock_count * 100) / total).quantize(Decimal('0.01')) if total else Decimal('100.00')
+        )
+    ClinicResourceChecklist.objects.bulk_update(
+        checklists,
+        ['item_count', 'completion_percentage', *STATUS_COUNTERS.values()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resourcechecklists', '0003_item_template_optional'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clinicresourcechecklist',
+            name='in_stock_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='clinicresourcechecklist',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='clinicresourcechecklist',
+            name='low_stock_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='clinicresourcechecklist',
+            name='ordered_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='clinicresourcechecklist',
+            name='out_of_stock_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_items, migrations.RunPython.noop),
+    ]
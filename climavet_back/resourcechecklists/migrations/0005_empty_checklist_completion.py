@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resourcechecklists', '0004_checklist_item_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='clinicresourcechecklist',
+            name='completion_percentage',
+            field=models.DecimalField(decimal_places=2, default=100.0, max_digits=5),
+        ),
+    ]
@@ -1,9 +1,13 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, FloatField, Value, When
+from django.db.models.functions import Cast, Round
+from django.db.models.lookups import GreaterThan
 from disasterplans.models import DisasterType, DisasterPlan
 from clinics.models import Clinic
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal
 
 # Create your models here.
 class ChecklistTemplate(models.Model):
@@ -43,7 +47,8 @@ class ResourceChecklistItem(models.Model):
         ('TUBE', 'Tube'),
         ('UNIT', 'Unit'),
     ]
-    checklist_template = models.ForeignKey(ChecklistTemplate, on_delete=models.CASCADE, related_name='items')
+    checklist_template = models.ForeignKey(ChecklistTemplate, on_delete=models.CASCADE, related_name='items', null=True, blank=True)  # Empty for items generated from the resource data
+    checklist = models.ForeignKey('ClinicResourceChecklist', on_delete=models.CASCADE, related_name='items', null=True, blank=True)  # The clinic checklist this item belongs to, if any
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     category = models.CharField(max_length=100, 
@@ -86,6 +91,50 @@ class ResourceChecklistItem(models.Model):
     class Meta:
         ordering = ['priority', 'name']  # Order items by priority and then by name
 
+    # Fields whose stored values decide which checklist counters include the item
+    COUNTED_FIELDS = {'checklist', 'checklist_id', 'status'}
+
+    def stored_counted(self):
+        """
+        Lock the item's row and read the (checklist_id, status) the checklist counters include it with.
+
+        Must be called inside a transaction; the lock keeps concurrent saves and deletes of the item
+        from applying their counter changes against the same stored status.
+
+        :return: The stored (checklist_id, status) pair, or None if the item is not in the database.
+        """
+        if self.pk is None:
+            return None
+        return (
+            ResourceChecklistItem.objects.select_for_update()
+            .filter(pk=self.pk).values_list('checklist_id', 'status').first()
+        )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not self.COUNTED_FIELDS & set(update_fields):
+            # Neither the checklist nor the status is written, so the counters cannot change
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            stored = self.stored_counted()
+            super().save(*args, **kwargs)
+            if stored is None:
+                saved = (self.checklist_id, self.status)
+            else:
+                # Fields left out of update_fields keep their stored values
+                written = set(update_fields) if update_fields is not None else self.COUNTED_FIELDS
+                saved = (
+                    self.checklist_id if written & {'checklist', 'checklist_id'} else stored[0],
+                    self.status if 'status' in written else stored[1],
+                )
+            if saved != stored:
+                old_checklist_id, old_status = stored or (None, None)
+                if old_checklist_id == saved[0]:
+                    ClinicResourceChecklist.adjust_counters(saved[0], added=saved[1], removed=old_status)
+                else:
+                    ClinicResourceChecklist.adjust_counters(old_checklist_id, removed=old_status)
+                    ClinicResourceChecklist.adjust_counters(saved[0], added=saved[1])
+
     def update_status(self):
         # Method to update the status of the item based on current inventory and needs
         if self.current_units >= self.units_needed:
@@ -94,7 +143,7 @@ class ResourceChecklistItem(models.Model):
             self.status = 'LOW_STOCK'
         else:
             self.status = 'OUT_OF_STOCK'
-        self.save()
+        self.save(update_fields=['status', 'last_updated'])
 
 class ClinicResourceChecklist(models.Model):
     # A custom checklist for a specific clinic and disaster plan, based on a template
@@ -117,20 +166,146 @@ class ClinicResourceChecklist(models.Model):
     review_notes = models.TextField(blank=True, null=True)  # Notes from the last review
     is_active = models.BooleanField(default=True)  # Indicates if this checklist is currently active
     is_completed = models.BooleanField(default=False)  # Indicates if the checklist has been completed for the current disaster plan
-    completion_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)  # Percentage of checklist items that have been completed
+    completion_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=100.00)  # Percentage of checklist items in stock, 100 while the checklist has no items
+    # Item counters, kept current with F() updates whenever an item is added, removed or changes status
+    item_count = models.PositiveIntegerField(default=0)
+    in_stock_count = models.PositiveIntegerField(default=0)
+    low_stock_count = models.PositiveIntegerField(default=0)
+    out_of_stock_count = models.PositiveIntegerField(default=0)
+    ordered_count = models.PositiveIntegerField(default=0)
+
+    STATUS_COUNTERS = {
+        'IN_STOCK': 'in_stock_count',
+        'LOW_STOCK': 'low_stock_count',
+        'OUT_OF_STOCK': 'out_of_stock_count',
+        'ORDERED': 'ordered_count',
+    }
+    COUNTERS = ['item_count', *STATUS_COUNTERS.values()]
 
     class Meta:
         ordering = ['-created_at']  # Order by most recently created
+        indexes = [
+            models.Index(fields=['clinic', '-id'], name='checklist_clinic_idx'),
+            models.Index(fields=['disaster_plan', '-id'], name='checklist_plan_idx'),
+        ]
+
+    @staticmethod
+    def percentage(in_stock, total):
+        # Share of items in stock, or 100 for a checklist without items
+        return (Decimal(in_stock * 100) / total).quantize(Decimal('0.01')) if total else Decimal('100.00')
+
+    @staticmethod
+    def percentage_expression(in_stock, total):
+        # The same as percentage(), computed by the database from counter expressions
+        return Case(
+            When(GreaterThan(total, 0), then=Round(Cast(in_stock * 100, FloatField()) / total, 2)),
+            default=Value(100.0),
+            output_field=FloatField(),
+        )
+
+    @classmethod
+    def status_deltas(cls, changes):
+        """
+        Counter deltas of a set of item changes.
+
+        :param changes: An iterable of (removed, added) status pairs, with None for an item that was not, or is no longer, in the checklist.
+        :return: A dictionary mapping each counter field to its change.
+        """
+        deltas = dict.fromkeys(cls.COUNTERS, 0)
+        for removed, added in changes:
+            if added is not None:
+                deltas['item_count'] += 1
+                if added in cls.STATUS_COUNTERS:
+                    deltas[cls.STATUS_COUNTERS[added]] += 1
+            if removed is not None:
+                deltas['item_count'] -= 1
+                if removed in cls.STATUS_COUNTERS:
+                    deltas[cls.STATUS_COUNTERS[removed]] -= 1
+        return deltas
+
+    @classmethod
+    def apply_deltas(cls, checklist_id, deltas):
+        """
+        Add deltas to a checklist's counters and recompute its completion percentage,
+        in one UPDATE computed by the database, so concurrent changes are not lost.
+
+        :param checklist_id: The checklist to update; nothing is done if None.
+        :param deltas: A dictionary mapping counter fields to their change, as returned by status_deltas.
+        """
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if checklist_id is None or not updates:
+            return
+        # SET expressions read the row's values from before the UPDATE, so the deltas are applied again here
+        updates['completion_percentage'] = cls.percentage_expression(
+            F('in_stock_count') + deltas.get('in_stock_count', 0), F('item_count') + deltas.get('item_count', 0),
+        )
+        cls.objects.filter(pk=checklist_id).update(**updates)
+
+    @classmethod
+    def adjust_counters(cls, checklist_id, added=None, removed=None):
+        """
+        Apply an item being added, removed or changing status to a checklist's counters and completion percentage.
+
+        :param checklist_id: The checklist the item belongs to; nothing is done if None.
+        :param added: The status the item is now counted with, if it is now in the checklist.
+        :param removed: The status the item was counted with, if it was in the checklist.
+        """
+        if added is None and removed is None:
+            return
+        cls.apply_deltas(checklist_id, cls.status_deltas([(removed, added)]))
+
+    @classmethod
+    def recount(cls, checklist_ids=None, batch_size=1000):
+        """
+        Recompute the counters and completion percentage of checklists from their items.
+
+        :param checklist_ids: Ids of the checklists to repair, all checklists by default.
+        :param batch_size: Number of checklists recounted per query.
+        :return: The number of checklists whose counters were wrong.
+        """
+        ids = list(checklist_ids) if checklist_ids is not None else list(cls.objects.order_by('id').values_list('id', flat=True))
+        repaired = 0
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            counts = {checklist_id: dict.fromkeys(cls.COUNTERS, 0) for checklist_id in batch}
+            rows = (
+                ResourceChecklistItem.objects.filter(checklist_id__in=batch)
+                .order_by().values('checklist_id', 'status').annotate(total=Count('id'))
+            )
+            for row in rows:
+                counters = counts[row['checklist_id']]
+                counters['item_count'] += row['total']
+                if row['status'] in cls.STATUS_COUNTERS:
+                    counters[cls.STATUS_COUNTERS[row['status']]] += row['total']
+
+            changed = []
+            for checklist in cls.objects.filter(id__in=batch).only('id', 'completion_percentage', *cls.COUNTERS):
+                counters = counts[checklist.id]
+                counters['completion_percentage'] = cls.percentage(counters['in_stock_count'], counters['item_count'])
+                if any(getattr(checklist, field) != value for field, value in counters.items()):
+                    for field, value in counters.items():
+                        setattr(checklist, field, value)
+                    changed.append(checklist)
+            with transaction.atomic():
+                cls.objects.bulk_update(changed, ['completion_percentage', *cls.COUNTERS])
+            repaired += len(changed)
+        return repaired
+
+    def save(self, *args, **kwargs):
+        # The counters and completion percentage are only changed by F() updates and recount(). A full save of
+        # an existing checklist would write back the values it was loaded with and undo those, so leave them out.
+        if not self._state.adding and self.pk is not None and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            derived = {'completion_percentage', *self.COUNTERS}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in derived
+            ]
+        return super().save(*args, **kwargs)
 
     def calculate_completion_percentage(self):
-        # Method to calculate the completion percentage based on the status of the checklist items
-        total_items = self.items.count()
-        if total_items == 0:
-            self.completion_percentage = 100.00
-        else:
-            completed_items = self.items.filter(status='IN_STOCK').count()
-            self.completion_percentage = (completed_items / total_items) * 100
-        self.save()
+        # Completion is kept up to date with the item counters, so reading it needs no query
+        self.completion_percentage = self.percentage(self.in_stock_count, self.item_count)
+        return self.completion_percentage
     
     def review_alarm(self):
         # Method to check if the checklist is due for review based on the review frequency and last reviewed date
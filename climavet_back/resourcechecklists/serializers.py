@@ -1,46 +1,54 @@
-from .models import ResourceChecklist, ResourceChecklistItem, ChecklistTemplate, ClinicResourceChecklist
+from .models import ResourceChecklistItem, ChecklistTemplate, ClinicResourceChecklist
 from rest_framework import serializers
+from .services.checklist_summary import ChecklistSummary
 
 class ResourceChecklistItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = ResourceChecklistItem
         fields = '__all__'
 
+class ResourceChecklistListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Summarize the whole page in one query before the checklists are serialized one by one
+        checklists = list(data.all() if hasattr(data, 'all') else data)
+        ChecklistSummary.attach(checklists)
+        return super().to_representation(checklists)
+
 class ResourceChecklistSerializer(serializers.ModelSerializer):
+    # Summary fields are read from item_summary, attached by ChecklistSummary for a page of checklists at a time
     items = ResourceChecklistItemSerializer(many=True, read_only=True)
     disaster_plan_name = serializers.CharField(source='disaster_plan.name', read_only=True)
     clinic_name = serializers.CharField(source='clinic.name', read_only=True)
-    total_items = serializers.IntegerField(source='items.count', read_only=True)
-    items_in_stock = serializers.IntegerField(source='items.filter(status="IN_STOCK").count', read_only=True)
+    total_items = serializers.SerializerMethodField()
+    items_in_stock = serializers.SerializerMethodField()
     completion_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
     items_by_category = serializers.SerializerMethodField()
     items_by_priority = serializers.SerializerMethodField()
     items_out_of_stock = serializers.SerializerMethodField()
     class Meta:
-        model = ResourceChecklist
+        model = ClinicResourceChecklist
         fields = '__all__'
-    
+        read_only_fields = ['completion_percentage', *ClinicResourceChecklist.COUNTERS]
+        list_serializer_class = ResourceChecklistListSerializer
+
+    def to_representation(self, instance):
+        ChecklistSummary.attach([instance])
+        return super().to_representation(instance)
+
+    def get_total_items(self, obj):
+        return obj.item_summary['total_items']
+
     def get_items_by_category(self, obj):
-        items = obj.items.all()
-        categories = {}
-        for item in items:
-            category = item.category
-            categories[category] = categories.get(category, 0) + 1
-        return categories
-    
+        return obj.item_summary['items_by_category']
+
     def get_items_by_priority(self, obj):
-        items = obj.items.all()
-        priorities = {}
-        for item in items:
-            priority = item.priority
-            priorities[priority] = priorities.get(priority, 0) + 1
-        return priorities
-    
+        return obj.item_summary['items_by_priority']
+
     def get_items_in_stock(self, obj):
-        return obj.items.filter(status="IN_STOCK").count()
+        return obj.item_summary['items_in_stock']
 
     def get_items_out_of_stock(self, obj):
-        return obj.items.filter(status="OUT_OF_STOCK").count()
+        return obj.item_summary['items_out_of_stock']
 
 class ChecklistTemplateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -50,4 +58,5 @@ class ChecklistTemplateSerializer(serializers.ModelSerializer):
 class ClinicResourceChecklistSerializer(serializers.ModelSerializer):
     class Meta:
         model = ClinicResourceChecklist
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        read_only_fields = ['completion_percentage', *ClinicResourceChecklist.COUNTERS]
\ No newline at end of file
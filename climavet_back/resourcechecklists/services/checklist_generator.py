@@ -1,135 +1,233 @@
-from typing import List, Dict
-from disasterplans.models import DisasterType, DisasterPlan
+import threading
+from typing import Any, Dict, List, Optional
+from django.db import transaction
+from disasterplans.models import DisasterPlan
+from disasterplans.services.disaster_type_registry import DisasterTypeRegistry
 from clinics.models import Clinic
-from ..models import ResourceChecklist, ResourceChecklistItem, ChecklistTemplate, ClinicResourceChecklist
-from ..data.resource_database import RESOURCE_DATABASE
+from ..models import ResourceChecklistItem, ClinicResourceChecklist
+from ..data.resources import RESOURCE_DATABASE
+from ..signals import items_bulk_changed
+
+# Essential items for any disaster, in the same format as the RESOURCE_DATABASE entries
+BASE_ITEMS = [
+    {"name": "First Aid Kit",
+     "description": "A kit containing basic medical supplies for treating minor injuries.",
+     "units_needed": 1,
+     "unit_of_measure": "kit",
+     "category": "Medical",
+     "priority": "High",
+     "is_essential": True
+     },
+    {"name": "Emergency Contact List",
+     "description": "A list of important phone numbers and contacts for emergencies.",
+     "units_needed": 1,
+     "unit_of_measure": "list",
+     "category": "Communication",
+     "priority": "High",
+     "is_essential": True
+     },
+    {"name": "Flashlights and Batteries",
+     "description": "Portable light sources and extra batteries for use during power outages.",
+     "units_needed": 2,
+     "unit_of_measure": "set",
+     "category": "Safety",
+     "priority": "Medium",
+     "is_essential": True
+     },
+    {"name": "Water Storage Containers",
+     "description": "Containers for storing clean water in case of water supply disruption.",
+     "units_needed": 2,
+     "unit_of_measure": "container",
+     "category": "Sustenance",
+     "priority": "Medium",
+     "is_essential": True
+     },
+    {"name": "Non-Perishable Food Supplies",
+     "description": "Food items that do not require refrigeration and have a long shelf life.",
+     "units_needed": 3,
+     "unit_of_measure": "box",
+     "category": "Sustenance",
+     "priority": "Medium",
+     "is_essential": True
+     },
+    {"name": "Portable Generator",
+     "description": "A generator to provide backup power during outages.",
+     "units_needed": 1,
+     "unit_of_measure": "unit",
+     "category": "Power",
+     "priority": "High",
+     "is_essential": True
+     },
+    {"name": "Fire Extinguishers",
+     "description": "Devices for extinguishing small fires.",
+     "units_needed": 2,
+     "unit_of_measure": "unit",
+     "category": "Safety",
+     "priority": "High",
+     "is_essential": True
+     },
+]
 
 
 class ChecklistGenerator:
     """
     Generates customized resource checklists for clinics based on disaster plans and predefined resource data.
+
+    RESOURCE_DATABASE and the base items are normalized once into an index from disaster category, such as
+    'POWER_OUTAGE', to ready-to-insert item fields. Generating a checklist then inserts the checklist and all of
+    its items with one bulk_create inside a single transaction, so the number of queries does not grow with the items.
     """
-    def __init__(self, clinic: Clinic, checklist: ClinicResourceChecklist, disaster_plan: DisasterPlan):
-        self.clinic = clinic
-        self.checklist = checklist
-        self.disaster_plan = disaster_plan
-    
+
+    CATEGORIES = {choice for choice, _ in ResourceChecklistItem._meta.get_field('category').choices}
+    UNITS = {choice for choice, _ in ResourceChecklistItem.UNIT_CHOICES}
+    PRIORITIES = {choice for choice, _ in ResourceChecklistItem._meta.get_field('priority').choices}
+    # Item categories used in the resource data that are not checklist categories
+    CATEGORY_ALIASES = {
+        'MEDICAL': 'MEDICAL_SUPPLIES',
+        'COMMUNICATION': 'COMMUNICATION_DEVICES_AND_OPERATIONAL_TOOLS',
+        'SAFETY': 'FACILITY_AND_SAFETY_GEAR',
+        'POWER': 'FACILITY_AND_SAFETY_GEAR',
+    }
+    DEFAULT_CATEGORY = 'FACILITY_AND_SAFETY_GEAR'
+    UNIT_ALIASES = {'KIT': 'UNIT', 'LIST': 'UNIT', 'SET': 'PACK', 'CONTAINER': 'UNIT', 'L': 'LITER', 'KG': 'KILOGRAM'}
+
+    _lock = threading.Lock()
+    _index: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    _base_items: List[Dict[str, Any]] = []
+
     @staticmethod
-    def generate_checklist(clinic: Clinic, disaster_plan: DisasterPlan) -> ResourceChecklist:
+    def category_key(name: str) -> str:
+        """Disaster category code of a RESOURCE_DATABASE key, such as 'POWER_OUTAGE' for 'Power Outage'."""
+        return '_'.join(name.upper().replace('-', ' ').split())
+
+    @classmethod
+    def normalize_item(cls, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert a resource data entry into ResourceChecklistItem field values.
+
+        :param item: An entry of RESOURCE_DATABASE or BASE_ITEMS.
+        :return: A dictionary of model field values, with category, unit and priority mapped onto the model choices.
+        """
+        category = cls.category_key(item.get('category') or '')
+        category = category if category in cls.CATEGORIES else cls.CATEGORY_ALIASES.get(category, cls.DEFAULT_CATEGORY)
+        unit = (item.get('unit_of_measure') or 'UNIT').upper()
+        if unit not in cls.UNITS:
+            unit = cls.UNIT_ALIASES.get(unit) or cls.UNIT_ALIASES.get(unit.rstrip('S')) or unit.rstrip('S')
+        priority = (item.get('priority') or 'MEDIUM').upper()
+        return {
+            'name': item['name'],
+            'description': item.get('description'),
+            'units_needed': item.get('units_needed', 1),
+            'unit_of_measure': unit if unit in cls.UNITS else 'UNIT',
+            'category': category,
+            'priority': priority if priority in cls.PRIORITIES else 'MEDIUM',
+            'is_essential': item.get('is_essential', False),
+            'storage_recommendations': item.get('storage_recommendations'),
+        }
+
+    @classmethod
+    def item_index(cls) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Normalized items per disaster category, built on first use.
+
+        :return: A dictionary mapping disaster category codes to lists of item field values.
+        """
+        if cls._index is None:
+            with cls._lock:
+                if cls._index is None:
+                    cls._base_items = [cls.normalize_item(item) for item in BASE_ITEMS]
+                    cls._index = {
+                        cls.category_key(name): [cls.normalize_item(item) for item in entry.get('items', [])]
+                        for name, entry in RESOURCE_DATABASE.items()
+                    }
+        return cls._index
+
+    @classmethod
+    def get_base_items(cls) -> List[Dict[str, Any]]:
+        """
+        Retrieves essential items for any disaster
+
+        :return: A list of dictionaries containing item field values.
+        """
+        cls.item_index()
+        return cls._base_items
+
+    @classmethod
+    def items_for(cls, categories: List[str]) -> List[Dict[str, Any]]:
+        """
+        Base items followed by the items of each disaster category, with items of the same name merged.
+
+        :param categories: Disaster category codes, such as ['FLOOD', 'WILDFIRE'].
+        :return: A list of item field values; merged items keep the largest units_needed.
+        """
+        index = cls.item_index()
+        items: Dict[str, Dict[str, Any]] = {}
+        for item in cls._base_items + [item for category in categories for item in index.get(category, [])]:
+            key = item['name'].casefold()
+            if key not in items:
+                items[key] = item
+            elif item['units_needed'] > items[key]['units_needed']:
+                items[key] = {**items[key], 'units_needed': item['units_needed']}
+        return list(items.values())
+
+    @staticmethod
+    def plan_categories(disaster_plan: DisasterPlan) -> List[str]:
+        """Disaster categories a plan covers: every hazard of a combined plan, or the category of its disaster type."""
+        if disaster_plan.hazards:
+            return list(disaster_plan.hazards)
+        disaster_type = DisasterTypeRegistry.get(disaster_plan.disaster_type_id)
+        return [disaster_type.category] if disaster_type else []
+
+    @classmethod
+    def generate_checklist(cls, clinic: Clinic, disaster_plan: DisasterPlan) -> ClinicResourceChecklist:
         """
         Generate a resource checklist for a given clinic and disaster plan.
 
         :param clinic: The clinic for which the checklist is being generated.
         :param disaster_plan: The disaster plan that will inform the checklist generation.
-        :return: A ResourceChecklist instance with the generated checklist items.
+        :return: A ClinicResourceChecklist instance with the generated checklist items.
         """
-        # Fetch the base items that are essential for any disaster
-        base_items = ChecklistGenerator.get_base_items()
-        # Fetch additional items from the resource database based on the disaster type
-        disaster_type = disaster_plan.disaster_type
-        additional_items = RESOURCE_DATABASE.get(disaster_type, [])
-        # Combine base items with additional items, ensuring no duplicates
-        all_items = {item['name']: item for item in base_items + additional_items}.values()
-        # Create a new ResourceChecklist instance
-        resource_checklist = ResourceChecklist.objects.create(
-            clinic=clinic,
-            disaster_plan=disaster_plan,
-            name=f"{disaster_plan.name} Resource Checklist",
-            description=f"A checklist of resources needed for the {disaster_plan.name}."
-        )
-        # Create ResourceChecklistItem instances for each item in the combined list
-        for item in all_items:
-            ResourceChecklistItem.objects.create(
-                checklist=resource_checklist,
-                name=item['name'],
-                description=item['description'],
-                quantity_needed=item['quantity_needed'],
-                unit_of_measure=item['unit_of_measure'],
-                category=item['category'],
-                priority=item['priority'],
-                is_essential=item['is_essential']
+        items = cls.items_for(cls.plan_categories(disaster_plan))
+        with transaction.atomic():
+            resource_checklist = ClinicResourceChecklist.objects.create(
+                clinic=clinic,
+                disaster_plan=disaster_plan,
+                name=f"{disaster_plan.name} Resource Checklist",
+                description=f"A checklist of resources needed for the {disaster_plan.name}.",
+                # Every generated item starts out of stock
+                item_count=len(items),
+                out_of_stock_count=len(items),
+                completion_percentage=ClinicResourceChecklist.percentage(0, len(items)),
+            )
+            created = ResourceChecklistItem.objects.bulk_create(
+                ResourceChecklistItem(checklist=resource_checklist, **item) for item in items
             )
+        items_bulk_changed.send(sender=ResourceChecklistItem, item_ids=[item.pk for item in created])
         return resource_checklist
-    
-    def get_base_items(self) -> List[Dict[str, str]]:
+
+    @staticmethod
+    def delete_checklist(checklist: ClinicResourceChecklist):
         """
-        Retrieves essential items for any disaster
+        Delete a generated checklist together with its items.
 
-        :return: A list of dictionaries containing resource information.
+        :param checklist: The checklist to delete.
         """
-        return [
-            {"name": "First Aid Kit", 
-             "description": "A kit containing basic medical supplies for treating minor injuries.", 
-             "quantity_needed": 1,
-             "unit_of_measure": "kit",
-             "category": "Medical",
-             "priority": "High",
-             "is_essential": True
-             },
-            {"name": "Emergency Contact List", 
-             "description": "A list of important phone numbers and contacts for emergencies.", 
-             "quantity_needed": 1,
-             "unit_of_measure": "list",
-             "category": "Communication",
-             "priority": "High",
-             "is_essential": True
-             },
-            {"name": "Flashlights and Batteries", 
-             "description": "Portable light sources and extra batteries for use during power outages.", 
-             "quantity_needed": 2,
-             "unit_of_measure": "set",
-             "category": "Safety",
-             "priority": "Medium",
-             "is_essential": True
-             },
-            {"name": "Water Storage Containers", 
-             "description": "Containers for storing clean water in case of water supply disruption.", 
-             "quantity_needed": 2,
-             "unit_of_measure": "container",
-             "category": "Sustenance",
-             "priority": "Medium",
-             "is_essential": True
-            },
-            {"name": "Non-Perishable Food Supplies", 
-             "description": "Food items that do not require refrigeration and have a long shelf life.", 
-             "quantity_needed": 3,
-             "unit_of_measure": "box",
-             "category": "Sustenance",
-             "priority": "Medium",
-             "is_essential": True
-             },
-            {"name": "Portable Generator", 
-             "description": "A generator to provide backup power during outages.", 
-             "quantity_needed": 1,
-             "unit_of_measure": "unit",
-             "category": "Power",
-             "priority": "High",
-             "is_essential": True
-             },
-            {"name": "Fire Extinguishers", 
-             "description": "Devices for extinguishing small fires.", 
-             "quantity_needed": 2,
-             "unit_of_measure": "unit",
-             "category": "Safety",
-             "priority": "High",
-             "is_essential": True
-             },
-        ]
-    
-    def create_clinic_checklist(self) -> ClinicResourceChecklist:
+        with transaction.atomic():
+            checklist.delete()
+
+    @classmethod
+    def regenerate_checklist(cls, checklist: ClinicResourceChecklist) -> ClinicResourceChecklist:
         """
-        Create a clinic-specific resource checklist based on the generated checklist.
+        Replace a checklist with a newly generated one for the same clinic and disaster plan.
+
+        The old checklist is deleted and the new one created in a single transaction, so a failed
+        generation leaves the old checklist in place.
 
-        :return: A ClinicResourceChecklist instance linked to the clinic and disaster plan.
+        :param checklist: The checklist to replace.
+        :return: The new ClinicResourceChecklist instance.
         """
-        return ClinicResourceChecklist.objects.create(
-            clinic=self.clinic,
-            disaster_plan=self.disaster_plan,
-            name=f"{self.disaster_plan.name} Resource Checklist",
-            description=f"A customized resource checklist for {self.clinic.name} based on the {self.disaster_plan.name}.",
-            quantity_needed=0,  # This can be updated later based on inventory and needs
-            unit_of_measure='unit',  # Default unit, can be updated based on specific items
-            category='General',  # Default category, can be updated based on specific items
-            priority='Medium',  # Default priority, can be updated based on specific items
-            is_essential=False  # Default to False, can be updated based on specific items
-        )
\ No newline at end of file
+        with transaction.atomic():
+            checklist = ClinicResourceChecklist.objects.select_for_update().select_related('clinic', 'disaster_plan').get(pk=checklist.pk)
+            clinic, disaster_plan = checklist.clinic, checklist.disaster_plan
+            cls.delete_checklist(checklist)
+            return cls.generate_checklist(clinic, disaster_plan)
@@ -0,0 +1,60 @@
+from typing import Any, Dict, Iterable, List
+from django.db.models import Count, Q
+from ..models import ClinicResourceChecklist, ResourceChecklistItem
+
+
+class ChecklistSummary:
+    """
+    Service class computing the item summaries shown with resource checklists.
+
+    The totals, stock counts and per-category and per-priority counts of a whole page of checklists come from
+    one query grouped by checklist, category and priority, with the stock counts as conditional aggregates.
+    """
+
+    @staticmethod
+    def empty() -> Dict[str, Any]:
+        return {'total_items': 0, 'items_in_stock': 0, 'items_out_of_stock': 0, 'items_by_category': {}, 'items_by_priority': {}}
+
+    @classmethod
+    def compute(cls, checklist_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Item summaries of several checklists.
+
+        :param checklist_ids: Ids of the checklists to summarize.
+        :return: A dictionary mapping each checklist id to its total_items, items_in_stock, items_out_of_stock, items_by_category and items_by_priority.
+        """
+        summaries = {checklist_id: cls.empty() for checklist_id in checklist_ids}
+        if not summaries:
+            return summaries
+        rows = (
+            ResourceChecklistItem.objects.filter(checklist_id__in=summaries.keys())
+            .order_by()
+            .values('checklist_id', 'category', 'priority')
+            .annotate(
+                total=Count('id'),
+                in_stock=Count('id', filter=Q(status='IN_STOCK')),
+                out_of_stock=Count('id', filter=Q(status='OUT_OF_STOCK')),
+            )
+        )
+        for row in rows:
+            summary = summaries[row['checklist_id']]
+            summary['total_items'] += row['total']
+            summary['items_in_stock'] += row['in_stock']
+            summary['items_out_of_stock'] += row['out_of_stock']
+            by_category = summary['items_by_category']
+            by_category[row['category']] = by_category.get(row['category'], 0) + row['total']
+            by_priority = summary['items_by_priority']
+            by_priority[row['priority']] = by_priority.get(row['priority'], 0) + row['total']
+        return summaries
+
+    @classmethod
+    def attach(cls, checklists: List[ClinicResourceChecklist]):
+        """
+        Store the item summary of each checklist on it as item_summary, skipping checklists that already have one.
+
+        :param checklists: The checklists about to be serialized.
+        """
+        pending = [checklist for checklist in checklists if not hasattr(checklist, 'item_summary')]
+        summaries = cls.compute(checklist.pk for checklist in pending)
+        for checklist in pending:
+            checklist.item_summary = summaries[checklist.pk]
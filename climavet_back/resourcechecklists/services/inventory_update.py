@@ -0,0 +1,83 @@
+from typing import Any, Dict, List, Tuple
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from ..models import ClinicResourceChecklist, ResourceChecklistItem
+
+
+class InventoryUpdater:
+    """
+    Service class applying a stock count, a batch of new current_units values, with set-based UPDATEs.
+
+    The new units are written with one CASE over the item ids, then every item's status is recomputed by the
+    database with one CASE over current_units and units_needed, the same rules as ResourceChecklistItem.update_status.
+    The counters of each affected checklist are adjusted with a single UPDATE.
+    """
+
+    MAX_ITEMS = 1000
+    # Largest signed 64-bit integer, the widest value any supported database stores
+    MAX_INTEGER = 2 ** 63 - 1
+
+    @classmethod
+    def units_range(cls) -> Tuple[int, int]:
+        """The current_units values the database column accepts, from 0 up to at most MAX_INTEGER."""
+        field = ResourceChecklistItem._meta.get_field('current_units')
+        low, high = connection.ops.integer_field_range(field.get_internal_type())
+        return max(low or 0, 0), min(cls.MAX_INTEGER if high is None else high, cls.MAX_INTEGER)
+
+    @staticmethod
+    def status_expression() -> Case:
+        return Case(
+            When(current_units__gte=F('units_needed'), then=Value('IN_STOCK')),
+            When(current_units__gt=0, then=Value('LOW_STOCK')),
+            default=Value('OUT_OF_STOCK'),
+        )
+
+    @classmethod
+    def apply(cls, units: Dict[int, int]) -> Dict[str, Any]:
+        """
+        Set the current_units of many items and recompute their status, in one transaction.
+
+        :param units: A dictionary mapping item ids to their counted units.
+        :return: A dictionary with the number of items updated, their id, current_units and new status, and the ids that do not exist.
+        :raises ValueError: If more than MAX_ITEMS items are given, or an id or unit count is out of range.
+        """
+        if len(units) > cls.MAX_ITEMS:
+            raise ValueError(f"At most {cls.MAX_ITEMS} items can be updated at once")
+        if any(not -cls.MAX_INTEGER - 1 <= item_id <= cls.MAX_INTEGER for item_id in units):
+            raise ValueError("Item ids must be 64-bit integers")
+        low, high = cls.units_range()
+        if any(not low <= value <= high for value in units.values()):
+            raise ValueError(f"current_units must be between {low} and {high}")
+        with transaction.atomic():
+            # Locks the rows, and records the statuses the checklist counters include them with
+            before = {
+                item_id: (checklist_id, status)
+                for item_id, checklist_id, status in ResourceChecklistItem.objects.select_for_update()
+                .filter(id__in=units.keys()).order_by().values_list('id', 'checklist_id', 'status')
+            }
+            items = ResourceChecklistItem.objects.filter(id__in=before.keys())
+            if before:
+                items.update(
+                    current_units=Case(
+                        *[When(id=item_id, then=Value(units[item_id])) for item_id in before],
+                        output_field=IntegerField(),
+                    ),
+                    last_updated=timezone.now(),
+                )
+                items.update(status=cls.status_expression())
+            after = list(items.order_by('id').values('id', 'checklist_id', 'current_units', 'status'))
+
+            changes: Dict[int, List] = {}
+            for item in after:
+                checklist_id, status = before[item['id']]
+                if status != item['status']:
+                    changes.setdefault(checklist_id, []).append((status, item['status']))
+            for checklist_id, checklist_changes in changes.items():
+                ClinicResourceChecklist.apply_deltas(checklist_id, ClinicResourceChecklist.status_deltas(checklist_changes))
+
+        return {
+            'updated': len(after),
+            'items': [{'id': item['id'], 'current_units': item['current_units'], 'status': item['status']} for item in after],
+            'missing': sorted(set(units) - set(before)),
+        }
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import Signal, receiver
+from .models import ClinicResourceChecklist, ResourceChecklistItem
+
+# Sent with item_ids after checklist items are created in bulk, which bypasses post_save
+items_bulk_changed = Signal()
+
+
+def deleted_with_checklist(origin):
+    # Items deleted together with their checklist leave no counters to update
+    return isinstance(origin, ClinicResourceChecklist) or getattr(origin, 'model', None) is ClinicResourceChecklist
+
+
+@receiver(pre_delete, sender=ResourceChecklistItem)
+def lock_item(sender, instance, origin=None, **kwargs):
+    # Runs inside the deletion's transaction, so the stored status read here is the one removed from the counters
+    if not deleted_with_checklist(origin):
+        instance._stored_counted = instance.stored_counted()
+
+
+@receiver(post_delete, sender=ResourceChecklistItem)
+def uncount_item(sender, instance, origin=None, **kwargs):
+    stored = getattr(instance, '_stored_counted', None)
+    if stored is not None and not deleted_with_checklist(origin):
+        ClinicResourceChecklist.adjust_counters(stored[0], removed=stored[1])
@@ -0,0 +1,20 @@
+from django.db import transaction
+from clinics.models import Clinic
+from disasterplans.models import DisasterPlan
+from jobs.services.job_queue import task
+from .models import ClinicResourceChecklist
+from .services.checklist_generator import ChecklistGenerator
+
+
+@task('resourcechecklists.generate_checklist')
+def generate_checklist(clinic_id, disaster_plan_id, replace_checklist_id=None):
+    clinic = Clinic.objects.get(id=clinic_id)
+    disaster_plan = DisasterPlan.objects.get(id=disaster_plan_id)
+    # The old checklist is deleted in the same transaction that creates its replacement
+    with transaction.atomic():
+        if replace_checklist_id is not None:
+            checklist = ClinicResourceChecklist.objects.select_for_update().filter(id=replace_checklist_id).first()
+            if checklist is not None:
+                ChecklistGenerator.delete_checklist(checklist)
+        checklist = ChecklistGenerator.generate_checklist(clinic, disaster_plan)
+    return {'checklist': checklist.id}
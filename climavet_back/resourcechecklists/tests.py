@@ -1,3 +1,241 @@
-from django.test import TestCase
+import csv
+from decimal import Decimal
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from climavet_back.testing import TestCase
+from clinics.models import Clinic
+from disasterplans.models import DisasterPlan, DisasterType
+from .models import ClinicResourceChecklist, ResourceChecklistItem
+from .services.checklist_generator import ChecklistGenerator
+from .services.checklist_summary import ChecklistSummary
 
 # Create your tests here.
+
+
+class ChecklistCounterTests(TestCase):
+    """The counters kept by item saves and deletes must always equal a recount."""
+
+    def setUp(self):
+        super().setUp()
+        plan = self.make_plan()
+        self.checklist = ClinicResourceChecklist.objects.create(clinic=plan.clinic, disaster_plan=plan, name='Flood Checklist')
+        self.other = ClinicResourceChecklist.objects.create(clinic=plan.clinic, disaster_plan=plan, name='Other Checklist')
+
+    @staticmethod
+    def make_plan(**kwargs):
+        clinic = Clinic.objects.create(
+            name='Vancouver Vet', address='1 Main St', city='Vancouver', province='BC', postal_code='V0V 0V0',
+            clinic_type='PRIVATE', species_types='MIXED', service_types='GENERAL_VETERINARY_CARE',
+        )
+        disaster_type = DisasterType.objects.create(name='Flood', category='FLOOD')
+        return DisasterPlan.objects.create(clinic=clinic, name='Flood Plan', disaster_type=disaster_type, **kwargs)
+
+    def add_item(self, checklist=None, status='OUT_OF_STOCK', units_needed=2):
+        return ResourceChecklistItem.objects.create(
+            checklist=checklist or self.checklist, name='Item', category='MEDICAL_SUPPLIES',
+            units_needed=units_needed, status=status,
+        )
+
+    @staticmethod
+    def counters(checklist):
+        checklist = ClinicResourceChecklist.objects.get(id=checklist.id)
+        return {field: getattr(checklist, field) for field in ['completion_percentage', *ClinicResourceChecklist.COUNTERS]}
+
+    def assertMatchesRecount(self):
+        kept = [self.counters(self.checklist), self.counters(self.other)]
+        self.assertEqual(ClinicResourceChecklist.recount([self.checklist.id, self.other.id]), 0)
+        self.assertEqual(kept, [self.counters(self.checklist), self.counters(self.other)])
+
+    def test_empty_checklist_is_complete(self):
+        self.assertEqual(self.counters(self.checklist)['completion_percentage'], Decimal('100.00'))
+        self.assertMatchesRecount()
+
+    def test_saving_a_status_change_moves_the_item_between_counters(self):
+        item = self.add_item()
+        self.add_item()
+        item.status = 'IN_STOCK'
+        item.save()
+        counters = self.counters(self.checklist)
+        self.assertEqual((counters['item_count'], counters['in_stock_count'], counters['out_of_stock_count']), (2, 1, 1))
+        self.assertEqual(counters['completion_percentage'], Decimal('50.00'))
+        self.assertMatchesRecount()
+
+    def test_stale_copies_do_not_count_a_change_twice(self):
+        item = self.add_item()
+        first, second = ResourceChecklistItem.objects.get(id=item.id), ResourceChecklistItem.objects.get(id=item.id)
+        first.status = second.status = 'IN_STOCK'
+        first.save()
+        second.save()
+        self.assertEqual(self.counters(self.checklist)['in_stock_count'], 1)
+        self.assertMatchesRecount()
+
+    def test_saving_other_fields_leaves_the_counters_alone(self):
+        item = self.add_item()
+        item.status = 'IN_STOCK'  # Not written, so the stored status stays counted
+        item.notes = 'Checked'
+        item.save(update_fields=['notes'])
+        self.assertEqual(self.counters(self.checklist)['in_stock_count'], 0)
+        self.assertMatchesRecount()
+
+    def test_saving_a_stale_checklist_keeps_the_counters(self):
+        item = self.add_item(units_needed=2)
+        stale = ClinicResourceChecklist.objects.get(id=self.checklist.id)
+        item.current_units = 2
+        item.update_status()
+
+        stale.review_notes = 'Reviewed'
+        stale.save()
+        counters = self.counters(self.checklist)
+        self.assertEqual((counters['in_stock_count'], counters['completion_percentage']), (1, Decimal('100.00')))
+        self.assertEqual(ClinicResourceChecklist.objects.get(id=self.checklist.id).review_notes, 'Reviewed')
+        self.assertMatchesRecount()
+
+    def test_update_status_saves_the_computed_status(self):
+        item = self.add_item(units_needed=2)
+        item.current_units = 1
+        item.update_status()
+        self.assertEqual(self.counters(self.checklist)['low_stock_count'], 1)
+        self.assertMatchesRecount()
+
+    def test_moving_an_item_to_another_checklist(self):
+        item = self.add_item(status='IN_STOCK')
+        item.checklist = self.other
+        item.save()
+        self.assertEqual(self.counters(self.checklist)['item_count'], 0)
+        self.assertEqual(self.counters(self.other)['in_stock_count'], 1)
+        self.assertMatchesRecount()
+
+    def test_deleting_items(self):
+        item = self.add_item(status='IN_STOCK')
+        self.add_item()
+        self.add_item(status='ORDERED')
+        item.delete()
+        ResourceChecklistItem.objects.filter(status='ORDERED').delete()
+        counters = self.counters(self.checklist)
+        self.assertEqual((counters['item_count'], counters['in_stock_count'], counters['ordered_count']), (1, 0, 0))
+        self.assertMatchesRecount()
+
+    def test_deleting_a_stale_copy_uses_the_stored_status(self):
+        item = self.add_item()
+        ResourceChecklistItem.objects.get(id=item.id).update_status()  # Stays OUT_OF_STOCK
+        stale = ResourceChecklistItem.objects.get(id=item.id)
+        fresh = ResourceChecklistItem.objects.get(id=item.id)
+        fresh.status = 'IN_STOCK'
+        fresh.save()
+        stale.delete()
+        self.assertEqual(self.counters(self.checklist)['item_count'], 0)
+        self.assertMatchesRecount()
+
+    def test_bulk_stock_count(self):
+        items = [self.add_item(units_needed=4) for _ in range(3)]
+        moved = self.add_item(checklist=self.other, units_needed=1)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('staff'))
+        response = client.post('/api/resource-checklists/items/bulk_update_stock/', {'items': [
+            {'id': items[0].id, 'current_units': 4},
+            {'id': items[1].id, 'current_units': 1},
+            {'id': moved.id, 'current_units': 5},
+            {'id': 0, 'current_units': 1},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['missing'], [0])
+        counters = self.counters(self.checklist)
+        self.assertEqual((counters['in_stock_count'], counters['low_stock_count'], counters['out_of_stock_count']), (1, 1, 1))
+        self.assertEqual(self.counters(self.other)['in_stock_count'], 1)
+        self.assertMatchesRecount()
+
+    def test_recount_repairs_drifted_counters(self):
+        self.add_item(status='IN_STOCK')
+        ClinicResourceChecklist.objects.filter(id=self.checklist.id).update(item_count=7, in_stock_count=0, completion_percentage=0)
+        self.assertEqual(ClinicResourceChecklist.recount([self.checklist.id]), 1)
+        counters = self.counters(self.checklist)
+        self.assertEqual((counters['item_count'], counters['in_stock_count'], counters['completion_percentage']), (1, 1, Decimal('100.00')))
+
+    def test_bulk_stock_count_rejects_non_integral_and_out_of_range_values(self):
+        item = self.add_item()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('staff'))
+        for bad in [{'id': item.id, 'current_units': 2.5}, {'id': item.id, 'current_units': 2.0},
+                    {'id': item.id, 'current_units': True}, {'id': item.id, 'current_units': '1.5'},
+                    {'id': item.id, 'current_units': 2 ** 63}, {'id': 2 ** 64, 'current_units': 1},
+                    {'id': float(item.id), 'current_units': 1}]:
+            response = client.post('/api/resource-checklists/items/bulk_update_stock/', {'items': [bad]}, format='json')
+            self.assertEqual(response.status_code, 400, bad)
+        self.assertEqual(ResourceChecklistItem.objects.get(id=item.id).current_units, 0)
+
+
+class ChecklistExportTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        plan = ChecklistCounterTests.make_plan()
+        self.checklist = ClinicResourceChecklist.objects.create(clinic=plan.clinic, disaster_plan=plan, name='Flood, Phase 1')
+        self.other = ClinicResourceChecklist.objects.create(clinic=plan.clinic, disaster_plan=plan, name='Other')
+        for checklist, name in [(self.checklist, 'Gauze'), (self.checklist, 'Water'), (self.other, 'Crates')]:
+            ResourceChecklistItem.objects.create(
+                checklist=checklist, name=name, category='MEDICAL_SUPPLIES', units_needed=2,
+                description=f'{name}, sterile\nKeep dry, "sealed"',
+            )
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content).decode('utf-8')
+        return list(csv.DictReader(content.splitlines(keepends=True)))
+
+    def test_commas_quotes_and_newlines_survive(self):
+        rows = self.export(f'/api/resource-checklists/checklists/{self.checklist.id}/export_csv/')
+        self.assertEqual([row['name'] for row in rows], ['Gauze', 'Water'])
+        self.assertEqual(rows[0]['checklist'], 'Flood, Phase 1')
+        self.assertEqual(rows[0]['description'], 'Gauze, sterile\nKeep dry, "sealed"')
+
+    def test_many_checklists_are_exported_together(self):
+        rows = self.export(f'/api/resource-checklists/checklists/export_csv/?ids={self.checklist.id},{self.other.id}')
+        self.assertEqual(
+            [(int(row['checklist_id']), row['name']) for row in rows],
+            [(self.checklist.id, 'Gauze'), (self.checklist.id, 'Water'), (self.other.id, 'Crates')],
+        )
+
+
+class ChecklistGenerationQueryTests(TestCase):
+    def assertGeneratedWithFixedQueries(self, plan):
+        ChecklistGenerator.plan_categories(plan)  # Loads the disaster type registry
+        # The checklist and item inserts in a savepoint, then the search index reading the items and replacing their documents in another
+        with self.assertNumQueries(9):
+            checklist = ChecklistGenerator.generate_checklist(plan.clinic, plan)
+        self.assertEqual(checklist.items.count(), len(ChecklistGenerator.items_for(ChecklistGenerator.plan_categories(plan))))
+        return checklist
+
+    def test_query_count_does_not_depend_on_the_number_of_items(self):
+        single = self.assertGeneratedWithFixedQueries(ChecklistCounterTests.make_plan())
+        combined = self.assertGeneratedWithFixedQueries(ChecklistCounterTests.make_plan(hazards=['FLOOD', 'WILDFIRE', 'HEATWAVE', 'EARTHQUAKE']))
+        self.assertGreater(combined.item_count, single.item_count)
+
+
+class ChecklistSummaryTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.plan = ChecklistCounterTests.make_plan()
+
+    def add_checklists(self, count):
+        for _ in range(count):
+            checklist = ClinicResourceChecklist.objects.create(clinic=self.plan.clinic, disaster_plan=self.plan, name='Checklist')
+            for status, category in [('IN_STOCK', 'MEDICAL_SUPPLIES'), ('OUT_OF_STOCK', 'MEDICAL_SUPPLIES'), ('OUT_OF_STOCK', 'SUSTENANCE')]:
+                ResourceChecklistItem.objects.create(checklist=checklist, name='Item', category=category, units_needed=1, status=status)
+
+    def test_summaries_take_one_query(self):
+        self.add_checklists(3)
+        ids = list(ClinicResourceChecklist.objects.values_list('id', flat=True))
+        with self.assertNumQueries(1):
+            summaries = ChecklistSummary.compute(ids)
+        self.assertEqual(summaries[ids[0]]['total_items'], 3)
+        self.assertEqual(summaries[ids[0]]['items_by_category'], {'MEDICAL_SUPPLIES': 2, 'SUSTENANCE': 1})
+        self.assertEqual((summaries[ids[0]]['items_in_stock'], summaries[ids[0]]['items_out_of_stock']), (1, 2))
+
+    def test_listing_does_not_query_per_checklist(self):
+        for count in (1, 4):
+            self.add_checklists(count)
+            # The page of checklists with their clinics and plans, their items, and their summaries
+            with self.assertNumQueries(3):
+                response = self.client.get('/api/resource-checklists/checklists/')
+            self.assertEqual(len(response.data['results']), ClinicResourceChecklist.objects.count())
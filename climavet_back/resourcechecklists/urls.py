@@ -0,0 +1,13 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import ResourceChecklistViewSet, ResourceChecklistItemViewSet, ChecklistTemplateViewSet
+
+router = DefaultRouter()
+
+router.register(r'checklists', ResourceChecklistViewSet, basename='resourcechecklist')
+router.register(r'items', ResourceChecklistItemViewSet, basename='resourcechecklistitem')
+router.register(r'templates', ChecklistTemplateViewSet, basename='checklisttemplate')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
\ No newline at end of file
@@ -1,28 +1,35 @@
 from django.shortcuts import render
+from django.utils.text import slugify
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.response import Response
-from .models import ResourceChecklist, ChecklistTemplate, ClinicResourceChecklist, ResourceChecklistItem
+from .models import ChecklistTemplate, ClinicResourceChecklist, ResourceChecklistItem
 from .serializers import ResourceChecklistSerializer, ResourceChecklistItemSerializer, ChecklistTemplateSerializer, ClinicResourceChecklistSerializer
 from disasterplans.models import DisasterPlan, DisasterType
 from clinics.models import Clinic
+from .services.checklist_export import ChecklistCsvExporter
 from .services.checklist_generator import ChecklistGenerator
+from .services.inventory_update import InventoryUpdater
 from rest_framework.decorators import action
+from climavet_back.pagination import IdCursorPagination
+from jobs.services.job_queue import JobQueue, accepted_response, queue_refusal, wants_async
 
 # Create your views here.
 
 class ResourceChecklistViewSet(viewsets.ModelViewSet):
-    queryset = ResourceChecklist.objects.all()
+    queryset = ClinicResourceChecklist.objects.all()
     serializer_class = ResourceChecklistSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = IdCursorPagination
 
     def get_queryset(self):
         """
         Optionally restricts the returned resource checklists to a given clinic or disaster type,
         by filtering against query parameters in the URL.
 
-        :return: A queryset of ResourceChecklist instances filtered by clinic and/or disaster type if specified.
+        :return: A queryset of ClinicResourceChecklist instances filtered by clinic and/or disaster type if specified.
         """
-        queryset = super().get_queryset()
+        # Names shown with each checklist and its items are loaded with the page, not per checklist
+        queryset = super().get_queryset().select_related('clinic', 'disaster_plan').prefetch_related('items')
         clinic_id = self.request.query_params.get('clinic')
         disaster_type = self.request.query_params.get('disaster_type')
         
@@ -38,8 +45,8 @@ class ResourceChecklistViewSet(viewsets.ModelViewSet):
         """
         Generate a resource checklist for a given clinic and disaster plan.
 
-        :param request: The HTTP request containing the clinic ID and disaster plan ID.
-        :return: A response containing the generated resource checklist or an error message if generation fails.
+        :param request: The HTTP request containing the clinic ID and disaster plan ID, and optionally an async flag.
+        :return: A response containing the generated resource checklist or an error message if generation fails, or 202 with a job id when queued.
         """
         data = request.data
         clinic_id = data.get('clinic')
@@ -54,7 +61,14 @@ class ResourceChecklistViewSet(viewsets.ModelViewSet):
             disaster_plan = DisasterPlan.objects.get(id=disaster_plan_id)
         except DisasterPlan.DoesNotExist:
             return Response({'error': 'Disaster Plan not found'}, status=status.HTTP_404_NOT_FOUND)
-        
+
+        if wants_async(request):
+            refused = queue_refusal(request)
+            if refused is not None:
+                return refused
+            job = JobQueue.enqueue('resourcechecklists.generate_checklist', request.user, clinic_id=clinic.id, disaster_plan_id=disaster_plan.id)
+            return accepted_response(request, job)
+
         try:
             resource_checklist = ChecklistGenerator.generate_checklist(clinic, disaster_plan)
             serializer = ResourceChecklistSerializer(resource_checklist)
@@ -69,15 +83,24 @@ class ResourceChecklistViewSet(viewsets.ModelViewSet):
 
         :param request: The HTTP request containing the clinic ID and disaster plan ID.
         :param pk: The primary key of the resource checklist to regenerate.
-        :return: A response containing the regenerated resource checklist or an error message if regeneration fails.
+        :return: A response containing the regenerated resource checklist or an error message if regeneration fails, or 202 with a job id when queued.
         """
         try:
             checklist = self.get_object()
             clinic = checklist.clinic
             disaster_plan = checklist.disaster_plan
 
-            ChecklistGenerator.delete_checklist(checklist)
-            new_checklist = ChecklistGenerator.generate_checklist(clinic, disaster_plan)
+            if wants_async(request):
+                refused = queue_refusal(request)
+                if refused is not None:
+                    return refused
+                job = JobQueue.enqueue(
+                    'resourcechecklists.generate_checklist', request.user,
+                    clinic_id=clinic.id, disaster_plan_id=disaster_plan.id, replace_checklist_id=checklist.id,
+                )
+                return accepted_response(request, job)
+
+            new_checklist = ChecklistGenerator.regenerate_checklist(checklist)
             serializer = ResourceChecklistSerializer(new_checklist)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -97,7 +120,7 @@ class ResourceChecklistViewSet(viewsets.ModelViewSet):
             items = checklist.items.all()
             serializer = ResourceChecklistItemSerializer(items, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
-        except ResourceChecklist.DoesNotExist:
+        except ClinicResourceChecklist.DoesNotExist:
             return Response({'error': 'Resource Checklist not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -116,7 +139,7 @@ class ResourceChecklistViewSet(viewsets.ModelViewSet):
             checklist.is_reviewed = True
             checklist.save()
             return Response({'message': 'Resource Checklist marked as reviewed'}, status=status.HTTP_200_OK)
-        except ResourceChecklist.DoesNotExist:
+        except ClinicResourceChecklist.DoesNotExist:
             return Response({'error': 'Resource Checklist not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -135,7 +158,7 @@ class ResourceChecklistViewSet(viewsets.ModelViewSet):
             checklist.is_completed = True
             checklist.save()
             return Response({'message': 'Resource Checklist marked as completed'}, status=status.HTTP_200_OK)
-        except ResourceChecklist.DoesNotExist:
+        except ClinicResourceChecklist.DoesNotExist:
             return Response({'error': 'Resource Checklist not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -143,27 +166,33 @@ class ResourceChecklistViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'], url_path="export_csv", permission_classes=[permissions.AllowAny])
     def export_csv(self, request, pk=None):
         """
-        Export the resource checklist items as a CSV file.
+        Export the resource checklist items as a CSV file, streamed as the items are read.
 
         :param request: The HTTP request.
         :param pk: The primary key of the resource checklist to export.
-        :return: A response containing the CSV file or an error message if export fails.
+        :return: A streaming response containing the CSV file, or 404 if the checklist does not exist.
         """
-        try:
-            checklist = self.get_object()
-            items = checklist.items.all()
-            # Logic to generate CSV from items goes here
-            csv_data = "name,description,quantity_needed,unit_of_measure,category,priority,is_essential\n"
-            for item in items:
-                csv_data += f"{item.name},{item.description},{item.quantity_needed},{item.unit_of_measure},{item.category},{item.priority},{item.is_essential}\n"
-            response = Response(csv_data, content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="{checklist.name}_items.csv"'
-            return response
-        except ResourceChecklist.DoesNotExist:
-            return Response({'error': 'Resource Checklist not found'}, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        
+        checklist = self.get_object()
+        filename = f"{slugify(checklist.name) or 'checklist'}-{checklist.id}-items.csv"
+        return ChecklistCsvExporter.response(ClinicResourceChecklist.objects.filter(id=checklist.id), filename)
+
+    @action(detail=False, methods=['get'], url_path='export_csv', permission_classes=[permissions.AllowAny])
+    def export_many_csv(self, request):
+        """
+        Export the items of many resource checklists as one CSV file, streamed as the items are read.
+
+        :param request: The HTTP request, optionally with comma-separated checklist ids in ?ids= and the clinic and disaster_type filters of the list endpoint.
+        :return: A streaming response containing the CSV file, or an error message if the ids are invalid.
+        """
+        checklists = self.filter_queryset(self.get_queryset())
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                checklists = checklists.filter(id__in=[int(checklist_id) for checklist_id in ids.split(',') if checklist_id.strip()])
+            except ValueError:
+                return Response({'error': 'ids must be a comma-separated list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        return ChecklistCsvExporter.response(checklists, 'checklist-items.csv')
+
     @action(detail=True, methods=['get'], url_path='export_pdf', permission_classes=[permissions.AllowAny])
     def export_pdf(self, request, pk=None):
         """
@@ -184,7 +213,7 @@ class ResourceChecklistViewSet(viewsets.ModelViewSet):
             response = Response(pdf_content, content_type='application/pdf')
             response['Content-Disposition'] = f'attachment; filename="{checklist.name}_items.pdf"'
             return response
-        except ResourceChecklist.DoesNotExist:
+        except ClinicResourceChecklist.DoesNotExist:
             return Response({'error': 'Resource Checklist not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -257,6 +286,46 @@ class ResourceChecklistItemViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
+    @staticmethod
+    def parse_integer(value) -> int:
+        """
+        Parse a JSON integer or a string of digits, rejecting floats and booleans rather than truncating them.
+
+        :param value: The value from the request body.
+        :return: The integer.
+        :raises TypeError: If the value is neither an integer nor a string.
+        :raises ValueError: If the string is not an integer.
+        """
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise TypeError(f"{value!r} is not an integer")
+        return int(value)
+
+    @action(detail=False, methods=['post'], url_path='bulk_update_stock')
+    def bulk_update_stock(self, request):
+        """
+        Record a stock count: set current_units for many items at once and recompute their status.
+
+        :param request: The HTTP request with "items", a list of {"id": ..., "current_units": ...} objects or [id, current_units] pairs.
+        :return: A response with the number of items updated, each item's new status and the ids that were not found, or an error message if the input is invalid.
+        """
+        entries = request.data.get('items') if hasattr(request.data, 'get') else request.data
+        if not isinstance(entries, list) or not entries:
+            return Response({'error': 'items must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        units = {}
+        try:
+            for entry in entries:
+                item_id, current_units = (entry['id'], entry['current_units']) if isinstance(entry, dict) else entry
+                units[self.parse_integer(item_id)] = self.parse_integer(current_units)
+        except (KeyError, TypeError, ValueError):
+            return Response({'error': 'Each item needs an integer id and current_units'}, status=status.HTTP_400_BAD_REQUEST)
+        if any(value < 0 for value in units.values()):
+            return Response({'error': 'current_units cannot be negative'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = InventoryUpdater.apply(units)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], url_path='update_status', permission_classes=[permissions.AllowAny])
     def update_status(self, request, pk=None):
         """
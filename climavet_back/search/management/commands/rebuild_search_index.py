@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from search.services.search_index import SearchIndex
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of protocols, disaster plans and checklist items."
+
+    def handle(self, *args, **options):
+        counts = SearchIndex.rebuild()
+        summary = ', '.join(f"{count} {kind.replace('_', ' ')}s" for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt: {summary}."))
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:40
+
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    # The FTS5 index only exists on SQLite; other databases use another search backend
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_document USING fts5("
+            "kind UNINDEXED, object_id UNINDEXED, title, body, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS search_document")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = []
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:10
+
+from django.db import migrations
+
+SECTIONS = [
+    'preparation_steps', 'response_steps', 'recovery_steps',
+    'emergency_contacts', 'supplies_needed', 'training_requirements',
+]
+CHUNK_SIZE = 500
+
+
+def index_existing_documents(apps, schema_editor):
+    # Plans and checklist items created before the index existed are only indexed from signals when they next
+    # change, so the index is filled here once, the same way rebuild_search_index does
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from disasterplans.data.protocols import DISASTER_PROTOCOLS
+    from search.services.search_backends import SqliteFtsBackend
+    from search.services.search_index import flatten
+
+    DisasterPlan = apps.get_model('disasterplans', 'DisasterPlan')
+    ResourceChecklistItem = apps.get_model('resourcechecklists', 'ResourceChecklistItem')
+    backend = SqliteFtsBackend()
+    backend.upsert(
+        {
+            'kind': 'protocol',
+            'object_id': protocol['id'],
+            'title': protocol['name'],
+            'body': '\n'.join(flatten([protocol.get('description')] + [protocol.get(name) for name in SECTIONS])),
+        }
+        for protocol in DISASTER_PROTOCOLS.values()
+    )
+
+    batch = []
+    for plan in DisasterPlan.objects.select_related('protocol').order_by('id').iterator(chunk_size=CHUNK_SIZE):
+        # Plan sections are the clinic's overrides, falling back to the referenced protocol version
+        protocol_sections = plan.protocol.sections if plan.protocol_id else {}
+        sections = [plan.overrides.get(name, protocol_sections.get(name, [])) for name in SECTIONS]
+        batch.append({
+            'kind': 'plan',
+            'object_id': plan.pk,
+            'title': plan.name,
+            'body': '\n'.join(flatten([plan.description, plan.common_regions] + sections)),
+        })
+        if len(batch) >= CHUNK_SIZE:
+            backend.upsert(batch)
+            batch = []
+    for item in ResourceChecklistItem.objects.order_by('id').iterator(chunk_size=CHUNK_SIZE):
+        batch.append({
+            'kind': 'checklist_item',
+            'object_id': item.pk,
+            'title': item.name,
+            'body': '\n'.join(flatten([item.description, item.storage_recommendations, item.notes])),
+        })
+        if len(batch) >= CHUNK_SIZE:
+            backend.upsert(batch)
+            batch = []
+    backend.upsert(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_search_document'),
+        ('disasterplans', '0006_disasterplan_hazards'),
+        ('resourcechecklists', '0005_empty_checklist_completion'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,137 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from django.db import connection, transaction
+
+
+class SearchBackend:
+    """
+    Interface of the search index storage. Documents are dictionaries with a kind, an object_id, a title and a body.
+
+    The backend is chosen with the SEARCH_BACKEND setting, so deployments on other databases can plug in their own.
+    """
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def delete(self, kind: str, object_ids: Iterable[int]):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query: str, kinds: Optional[Sequence[str]] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Find the documents best matching a query.
+
+        :param query: Free text; every word must match, as a word or word prefix.
+        :param kinds: Optionally restrict the results to these document kinds.
+        :param limit: Maximum number of results.
+        :return: A list of result dictionaries with kind, object_id, title, snippet and score, best match first.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def tokens(query: str) -> List[str]:
+        return re.findall(r'\w+', query.lower())
+
+
+class SqliteFtsBackend(SearchBackend):
+    """
+    Search backend storing documents in an SQLite FTS5 table, ranked with BM25.
+
+    Each document's rowid is derived from its kind and object id, so updating or deleting a document is a
+    primary key operation rather than a scan of the index.
+    """
+
+    TABLE = 'search_document'
+    KIND_CODES = {'protocol': 1, 'plan': 2, 'checklist_item': 3}
+    # BM25 weights for kind, object_id, title and body
+    WEIGHTS = (0.0, 0.0, 10.0, 1.0)
+
+    def rowid(self, kind: str, object_id: int) -> int:
+        return (self.KIND_CODES[kind] << 40) | int(object_id)
+
+    def upsert(self, documents):
+        rows = [
+            (self.rowid(doc['kind'], doc['object_id']), doc['kind'], doc['object_id'], doc['title'], doc['body'])
+            for doc in documents
+        ]
+        if not rows:
+            return
+        # One transaction, so SQLite does not commit after every row
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {self.TABLE} (rowid, kind, object_id, title, body) VALUES (%s, %s, %s, %s, %s)", rows
+            )
+
+    def delete(self, kind, object_ids):
+        rowids = [(self.rowid(kind, object_id),) for object_id in object_ids]
+        if rowids:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(f"DELETE FROM {self.TABLE} WHERE rowid = %s", rowids)
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.TABLE}")
+
+    def search(self, query, kinds=None, limit=20):
+        tokens = self.tokens(query)
+        if not tokens:
+            return []
+        # Every word is quoted, which neutralizes FTS5 query syntax, and matched as a prefix
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        sql = (
+            f"SELECT kind, object_id, title, snippet({self.TABLE}, 3, '<mark>', '</mark>', '...', 12), "
+            f"bm25({self.TABLE}, {', '.join(str(weight) for weight in self.WEIGHTS)}) AS score "
+            f"FROM {self.TABLE} WHERE {self.TABLE} MATCH %s"
+        )
+        params: List[Any] = [match]
+        if kinds:
+            sql += f" AND kind IN ({', '.join(['%s'] * len(kinds))})"
+            params.extend(kinds)
+        sql += " ORDER BY score LIMIT %s"
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            {'kind': kind, 'object_id': object_id, 'title': title, 'snippet': snippet, 'score': round(-score, 6)}
+            for kind, object_id, title, snippet, score in rows
+        ]
+
+
+class DatabaseScanBackend(SearchBackend):
+    """
+    Fallback backend for databases without FTS5. Nothing is stored; searches scan the source tables,
+    so it is only suitable for small deployments.
+    """
+
+    def upsert(self, documents):
+        pass
+
+    def delete(self, kind, object_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, query, kinds=None, limit=20):
+        from .search_index import SearchIndex
+
+        tokens = self.tokens(query)
+        if not tokens:
+            return []
+        results = []
+        for document in SearchIndex.all_documents(kinds):
+            text = f"{document['title']} {document['body']}".lower()
+            if all(token in text for token in tokens):
+                results.append({
+                    'kind': document['kind'],
+                    'object_id': document['object_id'],
+                    'title': document['title'],
+                    'snippet': document['body'][:120],
+                    'score': sum(text.count(token) for token in tokens),
+                })
+        results.sort(key=lambda result: -result['score'])
+        return results[:limit]
@@ -0,0 +1,164 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from disasterplans.data.protocols import DISASTER_PROTOCOLS
+from disasterplans.models import DisasterPlan, DisasterProtocol
+from resourcechecklists.models import ResourceChecklistItem
+from .search_backends import SearchBackend
+
+
+def flatten(value: Any) -> Iterator[str]:
+    """Yield every string inside nested lists and dictionaries."""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from flatten(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from flatten(item)
+    elif value not in (None, ''):
+        yield str(value)
+
+
+class SearchIndex:
+    """
+    Service class that turns protocols, plans and checklist items into search documents and keeps the backend up to date.
+
+    Plans and checklist items are re-indexed from model signals as they change; protocols are static and indexed on rebuild.
+    """
+
+    KINDS = ['protocol', 'plan', 'checklist_item']
+    CHUNK_SIZE = 500
+    _backend: Optional[SearchBackend] = None
+
+    @classmethod
+    def backend(cls) -> SearchBackend:
+        if cls._backend is None:
+            default = (
+                'search.services.search_backends.SqliteFtsBackend' if connection.vendor == 'sqlite'
+                else 'search.services.search_backends.DatabaseScanBackend'
+            )
+            cls._backend = import_string(getattr(settings, 'SEARCH_BACKEND', None) or default)()
+        return cls._backend
+
+    @staticmethod
+    def protocol_documents() -> List[Dict[str, Any]]:
+        return [
+            {
+                'kind': 'protocol',
+                'object_id': protocol['id'],
+                'title': protocol['name'],
+                'body': '\n'.join(flatten([protocol.get('description')] + [protocol.get(name) for name in DisasterProtocol.SECTIONS])),
+            }
+            for protocol in DISASTER_PROTOCOLS.values()
+        ]
+
+    @staticmethod
+    def plan_document(plan: DisasterPlan) -> Dict[str, Any]:
+        sections = [getattr(plan, name) for name in DisasterProtocol.SECTIONS]
+        return {
+            'kind': 'plan',
+            'object_id': plan.pk,
+            'title': plan.name,
+            'body': '\n'.join(flatten([plan.description, plan.common_regions] + sections)),
+        }
+
+    @staticmethod
+    def checklist_item_document(item: ResourceChecklistItem) -> Dict[str, Any]:
+        return {
+            'kind': 'checklist_item',
+            'object_id': item.pk,
+            'title': item.name,
+            'body': '\n'.join(flatten([item.description, item.storage_recommendations, item.notes])),
+        }
+
+    @classmethod
+    def _chunks(cls, ids: Iterable[int]) -> Iterator[List[int]]:
+        ids = list(ids)
+        for start in range(0, len(ids), cls.CHUNK_SIZE):
+            yield ids[start:start + cls.CHUNK_SIZE]
+
+    @classmethod
+    def index_plans(cls, plan_ids: Iterable[int]):
+        """
+        Re-index plans by id, dropping the ones that no longer exist.
+
+        :param plan_ids: Ids of the plans that changed.
+        """
+        for chunk in cls._chunks(plan_ids):
+            plans = list(DisasterPlan.objects.filter(id__in=chunk))
+            cls.backend().upsert(cls.plan_document(plan) for plan in plans)
+            cls.backend().delete('plan', set(chunk) - {plan.pk for plan in plans})
+
+    @classmethod
+    def index_checklist_items(cls, item_ids: Iterable[int]):
+        """
+        Re-index checklist items by id, dropping the ones that no longer exist.
+
+        :param item_ids: Ids of the checklist items that changed.
+        """
+        for chunk in cls._chunks(item_ids):
+            items = list(ResourceChecklistItem.objects.filter(id__in=chunk))
+            cls.backend().upsert(cls.checklist_item_document(item) for item in items)
+            cls.backend().delete('checklist_item', set(chunk) - {item.pk for item in items})
+
+    @classmethod
+    def remove(cls, kind: str, object_ids: Iterable[int]):
+        cls.backend().delete(kind, object_ids)
+
+    @classmethod
+    def all_documents(cls, kinds: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Build the documents of every protocol, plan and checklist item.
+
+        :param kinds: Optionally restrict the documents to these kinds.
+        :return: An iterator of documents.
+        """
+        kinds = kinds or cls.KINDS
+        if 'protocol' in kinds:
+            yield from cls.protocol_documents()
+        if 'plan' in kinds:
+            for plan in DisasterPlan.objects.order_by('id').iterator(chunk_size=cls.CHUNK_SIZE):
+                yield cls.plan_document(plan)
+        if 'checklist_item' in kinds:
+            for item in ResourceChecklistItem.objects.order_by('id').iterator(chunk_size=cls.CHUNK_SIZE):
+                yield cls.checklist_item_document(item)
+
+    @classmethod
+    def rebuild(cls) -> Dict[str, int]:
+        """
+        Recreate the whole index from the source tables.
+
+        :return: The number of documents indexed per kind.
+        """
+        backend = cls.backend()
+        backend.clear()
+        counts = {kind: 0 for kind in cls.KINDS}
+        batch = []
+        for document in cls.all_documents():
+            batch.append(document)
+            counts[document['kind']] += 1
+            if len(batch) >= cls.CHUNK_SIZE:
+                backend.upsert(batch)
+                batch = []
+        backend.upsert(batch)
+        return counts
+
+    @classmethod
+    def search(cls, query: str, kinds: Optional[Sequence[str]] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Ranked search across protocols, plans and checklist items.
+
+        :param query: Free text; every word must match, as a word or word prefix.
+        :param kinds: Optionally restrict the results to these document kinds.
+        :param limit: Maximum number of results.
+        :return: A list of results, best match first, with a link to the API resource where there is one.
+        """
+        results = cls.backend().search(query, kinds=kinds, limit=limit)
+        for result in results:
+            if result['kind'] == 'plan':
+                result['url'] = reverse('disasterplan-detail', args=[result['object_id']])
+            elif result['kind'] == 'checklist_item':
+                result['url'] = reverse('resourcechecklistitem-detail', args=[result['object_id']])
+        return results
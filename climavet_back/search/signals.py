@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from disasterplans.models import DisasterPlan
+from disasterplans.signals import plans_bulk_changed
+from resourcechecklists.models import ResourceChecklistItem
+from resourcechecklists.signals import items_bulk_changed
+from .services.search_index import SearchIndex
+
+
+@receiver(post_save, sender=DisasterPlan)
+def index_plan(sender, instance, **kwargs):
+    SearchIndex.backend().upsert([SearchIndex.plan_document(instance)])
+
+
+@receiver(plans_bulk_changed, sender=DisasterPlan)
+def index_plans(sender, plan_ids, **kwargs):
+    SearchIndex.index_plans(plan_ids)
+
+
+@receiver(post_save, sender=ResourceChecklistItem)
+def index_checklist_item(sender, instance, **kwargs):
+    SearchIndex.backend().upsert([SearchIndex.checklist_item_document(instance)])
+
+
+@receiver(items_bulk_changed, sender=ResourceChecklistItem)
+def index_checklist_items(sender, item_ids, **kwargs):
+    SearchIndex.index_checklist_items(item_ids)
+
+
+@receiver(post_delete, sender=DisasterPlan)
+def remove_plan(sender, instance, **kwargs):
+    SearchIndex.remove('plan', [instance.pk])
+
+
+@receiver(post_delete, sender=ResourceChecklistItem)
+def remove_checklist_item(sender, instance, **kwargs):
+    SearchIndex.remove('checklist_item', [instance.pk])
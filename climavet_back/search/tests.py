@@ -0,0 +1,17 @@
+from climavet_back.testing import TestCase
+from .services.search_backends import SqliteFtsBackend
+from .services.search_index import SearchIndex
+
+# Create your tests here.
+
+
+class SearchViewTests(TestCase):
+    def test_sqlite_uses_the_fts_backend_by_default(self):
+        self.assertIsInstance(SearchIndex.backend(), SqliteFtsBackend)
+
+    def test_limit_is_clamped_to_at_least_one(self):
+        SearchIndex.rebuild()
+        for limit in ('0', '-3'):
+            response = self.client.get('/api/search/', {'q': 'flood', 'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 1)
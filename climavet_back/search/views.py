@@ -0,0 +1,31 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .services.search_index import SearchIndex
+
+# Create your views here.
+class SearchView(APIView):
+    permission_classes = [permissions.AllowAny]
+    MAX_LIMIT = 100
+
+    def get(self, request):
+        """
+        Ranked full-text search across protocols, disaster plans and checklist items, with prefix matching.
+
+        :param request: The HTTP request with the query in q, optionally a comma-separated type filter and a limit.
+        :return: A response containing the matching documents, best match first.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+        unknown = set(kinds) - set(SearchIndex.KINDS)
+        if unknown:
+            return Response({'error': f"Unknown type: {', '.join(sorted(unknown))}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), self.MAX_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = SearchIndex.search(query, kinds=kinds, limit=limit)
+        return Response({'query': query, 'count': len(results), 'results': results})